@@ -0,0 +1,210 @@
+# end-to-end latency of WebDriver commands against the local fixture server (fixtures.py), for every
+# driver mode: driver_preference standard/undetected, each with and without use_wire and use_stealth.
+# headless, no network needed beyond the local server. chrome and a matching chromedriver must be
+# installed; a mode that cannot start (e.g. undetected_chromedriver without a cached driver) is
+# recorded with its error and skipped.
+#
+#   python benchmarks/bench_driver.py [--modes standard,standard+wire] [--repeat 10] [--save now.json]
+#   python benchmarks/bench_driver.py --compare baseline.json [--threshold 0.2]
+#   python benchmarks/bench_driver.py --load now.json --compare baseline.json    (report only)
+#
+# exits 1 when --compare finds a case slower than baseline by more than threshold (and min-delta ms).
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+import traceback
+
+from fixtures import FixtureServer, non_loopback_address
+
+import seleniummm
+from seleniummm import WebDriver, Locator
+
+MODES = [pref + wire + stealth
+         for pref in ('standard', 'undetected')
+         for wire in ('', '+wire')
+         for stealth in ('', '+stealth')]
+
+WAITS = [
+    ('wait_until_element_presence', (), {'id': 'appear'}),
+    ('wait_until_elements_presence', (), {'css': '.item'}),
+    ('wait_until_element_visible', (), {'id': 'reveal'}),
+    ('wait_until_elements_visible', (), {'css': '.item'}),
+    ('wait_until_element_clickable', (), {'id': 'enable'}),
+    ('wait_until_element_invisible', (), {'id': 'vanish'}),
+    ('wait_until_elements_count', (5,), {'css': '.item'}),
+]
+
+
+def summarize(samples_ms):
+    ordered = sorted(samples_ms)
+    return {'n': len(ordered), 'min_ms': ordered[0], 'median_ms': statistics.median(ordered),
+            'p90_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))], 'mean_ms': statistics.fmean(ordered)}
+
+
+def bench(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def driver_kwargs(mode):
+    return {'visible': False, 'driver_preference': mode.split('+')[0], 'use_wire': '+wire' in mode,
+            'use_stealth': '+stealth' in mode, 'window_size': (1280, 900), 'log_level': 'error'}
+
+
+def cases(d, url, repeat):
+    # (name, fn, repeat, setup). the page a case needs is loaded by the case before it or by setup.
+    wait_repeat = max(3, repeat // 2)
+    yield 'get_small', lambda: d.get(url('/click')), repeat, None
+    yield 'get_table_2000', lambda: d.get(url('/table?rows=2000')), repeat, None
+
+    cell = Locator(css='tr.row:nth-child(1000) td.c3')
+    yield 'find_element_css', lambda: d.find_element(css='tr.row:nth-child(1000) td.c3'), repeat, None
+    yield 'find_element_xpath', lambda: d.find_element(xpath='//tr[1000]/td[4]'), repeat, None
+    yield 'find_element_locator', lambda: d.find_element(cell), repeat, None
+    yield 'find_elements_2000', lambda: d.find_elements(css='tr.row'), repeat, None
+    yield 'extract_2000x2', lambda: d.extract(css='tr.row', fields={'a': ('td.c0', 'text'), 'b': ('td.c1', 'text')}), \
+        repeat, None
+
+    yield 'find_element_shadow_6', lambda: d.find_element(css=' >>> '.join(['x-host'] * 6 + ['#deep'])), repeat, \
+        lambda: d.get(url('/shadow?depth=6'))
+    yield 'find_element_frames_3', lambda: d.find_element(css='iframe >>> iframe >>> iframe >>> #inner'), repeat, \
+        lambda: d.get(url('/frames?depth=3'))
+
+    # wait cases include the 300 ms the page takes to change; compare them against each other and over time
+    for wait_mode in ('poll', 'observer'):
+        for name, args, locator in WAITS:
+            method = getattr(d, name)
+            yield f'{name}_{wait_mode}', (lambda m=method, a=args, l=locator, w=wait_mode: m(*a, **l, mode=w)), \
+                wait_repeat, lambda: d.get(url('/delayed?ms=300'))
+
+    d.get(url('/click'))
+    button = d.find_element(id='counter')
+    yield 'click_element', lambda: d.click(button), repeat, None
+    yield 'click_keyword', lambda: d.click(id='counter'), repeat, None
+
+    yield 'scroll_collect_300', lambda: sum(len(rows) for rows in d.scroll_collect(
+        '.feed-item', fields={'id': '@data-id'}, key='id', settle_ms=300)), wait_repeat, \
+        lambda: d.get(url('/scroll?total=300'))
+    if d.downloads is not None:
+        yield 'download_1mb', lambda: d.download(url('/file?size=1048576'), timeout=30), wait_repeat, None
+
+
+def run_mode(mode, url, repeat, init_runs):
+    kwargs = driver_kwargs(mode)
+    results = {}
+    samples = []
+    for _ in range(init_runs):
+        start = time.perf_counter()
+        d = WebDriver(**kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+        d.quit()
+    results['init'] = summarize(samples)
+
+    d = WebDriver(**kwargs)
+    browser_version = d.driver.capabilities.get('browserVersion')
+    try:
+        for name, fn, n, setup in cases(d, url, repeat):
+            try:
+                results[name] = bench(fn, n, setup)
+            except Exception as e:
+                results[name] = {'error': repr(e)}
+            print(f'  {name:44s} {format_case(results[name])}', flush=True)
+    finally:
+        d.quit()
+    return results, browser_version
+
+
+def format_case(case):
+    if 'error' in case:
+        return 'ERROR ' + case['error'][:80]
+    return f'{case["median_ms"]:9.1f} ms median  {case["p90_ms"]:9.1f} ms p90  (n={case["n"]})'
+
+
+def run(modes, repeat, init_runs):
+    host = non_loopback_address() or '127.0.0.1'
+    if host == '127.0.0.1' and any('+wire' in m for m in modes):
+        print('no non-loopback address: chrome bypasses the selenium-wire proxy for 127.0.0.1, '
+              'wire modes only measure proxy startup')
+    report = {'meta': {'seleniummm': seleniummm.__version__, 'python': platform.python_version(),
+                       'platform': platform.platform(), 'repeat': repeat, 'init_runs': init_runs,
+                       'started': datetime.datetime.now().isoformat(timespec='seconds'), 'browsers': {}},
+              'results': {}}
+    with FixtureServer(host=host) as server:
+        for mode in modes:
+            print(f'{mode}:', flush=True)
+            try:
+                results, browser_version = run_mode(mode, server.url, repeat, init_runs)
+                report['meta']['browsers'][mode] = browser_version
+            except Exception:
+                print(traceback.format_exc())
+                results = {'error': traceback.format_exc(limit=1).strip()}
+            report['results'][mode] = results
+    return report
+
+
+def compare(baseline, current, threshold, min_delta_ms):
+    # prints one line per case both reports have. returns the number of regressions.
+    regressions = 0
+    print(f'{"mode":26s} {"case":44s} {"base ms":>9s} {"now ms":>9s} {"ratio":>6s}')
+    for mode, cases_now in current['results'].items():
+        cases_base = baseline['results'].get(mode)
+        if not cases_base or 'error' in cases_base or 'error' in cases_now:
+            print(f'{mode:26s} (not comparable: missing or failed in one report)')
+            continue
+        for name, now in cases_now.items():
+            base = cases_base.get(name)
+            if base is None or 'error' in base or 'error' in now:
+                continue
+            ratio = now['median_ms'] / base['median_ms'] if base['median_ms'] else float('inf')
+            slower = ratio > 1 + threshold and now['median_ms'] - base['median_ms'] > min_delta_ms
+            regressions += slower
+            print(f'{mode:26s} {name:44s} {base["median_ms"]:9.1f} {now["median_ms"]:9.1f} {ratio:6.2f}'
+                  + ('  REGRESSION' if slower else ''))
+    print(f'{regressions} regression(s) over {threshold:.0%} (min {min_delta_ms} ms)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='seleniummm driver benchmarks')
+    parser.add_argument('--modes', default=','.join(MODES), help='comma separated, from: ' + ', '.join(MODES))
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--init-runs', type=int, default=3)
+    parser.add_argument('--save', help='write results as json')
+    parser.add_argument('--load', help='read results from json instead of running')
+    parser.add_argument('--compare', help='baseline json to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown of the median')
+    parser.add_argument('--min-delta', type=float, default=2.0, help='ignore slowdowns below this many ms')
+    args = parser.parse_args()
+
+    if args.load:
+        with open(args.load) as f:
+            report = json.load(f)
+    else:
+        modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+        unknown = [m for m in modes if m not in MODES]
+        if unknown:
+            parser.error(f'unknown mode: {", ".join(unknown)}')
+        report = run(modes, args.repeat, args.init_runs)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'saved {args.save}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        sys.exit(1 if compare(baseline, report, args.threshold, args.min_delta) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# import-time budget for `import seleniummm`, measured with `python -X importtime`.
+# exits 1 when the cumulative import time exceeds the budget or an optional
+# dependency is imported eagerly.
+#
+#   python benchmarks/bench_import.py [budget_ms] [runs]
+import subprocess
+import sys
+
+DEFERRED = ('selenium_stealth', 'screeninfo', 'seleniumwire', 'undetected_chromedriver', 'sqlite3')
+
+
+def measure():
+    probe = f'import seleniummm, sys; print(",".join(m for m in {DEFERRED!r} if m in sys.modules))'
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe],
+                          capture_output=True, text=True, check=True)
+    # import time: self [us] | cumulative | imported package
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    total_us = next(c for _, c, n in rows if n.strip() == 'seleniummm')
+    eager = [m for m in proc.stdout.strip().split(',') if m]
+    return total_us, rows, eager
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 500
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    results = [measure() for _ in range(runs)]
+    total_us, rows, eager = min(results, key=lambda r: r[0])
+    print(f'import seleniummm: {total_us / 1000:.1f} ms (best of {runs}, budget {budget_ms:.0f} ms)')
+    print('slowest modules (self time):')
+    for self_us, _, name in sorted(rows, reverse=True)[:10]:
+        print(f'  {self_us / 1000:7.1f} ms  {name.strip()}')
+
+    failed = False
+    if eager:
+        print(f'FAIL: imported eagerly: {", ".join(eager)}')
+        failed = True
+    if total_us / 1000 > budget_ms:
+        print('FAIL: over budget')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# per-call python overhead of keyword lookup vs compiled Locator.
+# chromedriver is replaced with a no-op so only seleniummm's own dispatch cost is measured.
+#
+#   python benchmarks/bench_locator.py [iterations]
+import sys
+import timeit
+
+from seleniummm import WebDriver, Locator
+
+
+class NullDriver:
+    def find_element(self, by, value):
+        return None
+
+    def find_elements(self, by, value):
+        return []
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    driver = WebDriver.__new__(WebDriver)
+    driver.driver = NullDriver()
+    locator = Locator(css='div.item > a')
+
+    cases = {
+        'find_element(css=...)': lambda: driver.find_element(css='div.item > a'),
+        'find_element(Locator)': lambda: driver.find_element(locator),
+        'find_elements(css=...)': lambda: driver.find_elements(css='div.item > a'),
+        'find_elements(Locator)': lambda: driver.find_elements(locator),
+        'raw driver.find_element': lambda: driver.driver.find_element(*locator.condition),
+    }
+    for name, fn in cases.items():
+        sec = min(timeit.repeat(fn, number=n, repeat=3))
+        print(f'{name:26s} {sec / n * 1e6:8.2f} us/call')
+
+    driver.driver = None
+
+
+if __name__ == '__main__':
+    main()
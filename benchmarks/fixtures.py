@@ -0,0 +1,179 @@
+# synthetic pages for the driver benchmarks, served on a free port (127.0.0.1 unless a host is given).
+#
+#   /table?rows=2000&cols=8     large table, rows carry class 'row'
+#   /shadow?depth=6             nested open shadow roots, innermost <button id="deep">
+#   /frames?depth=3             nested same-origin iframes, innermost <p id="inner">
+#   /delayed?ms=300             #appear/.item added, #vanish removed, #reveal shown, #enable enabled after ms
+#   /scroll?total=300&batch=20  infinite feed of .feed-item
+#   /click                      button#counter counting its clicks
+#   /file?size=1048576          attachment of size bytes
+#
+#   python benchmarks/fixtures.py [port]     serve until interrupted
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def _page(title, body, script=''):
+    return (f'<!doctype html><html><head><meta charset="utf-8"><title>{title}</title></head>'
+            f'<body>{body}<script>{script}</script></body></html>')
+
+
+def table(rows=2000, cols=8):
+    head = ''.join(f'<th>col{c}</th>' for c in range(cols))
+    body = ''.join('<tr class="row">' + ''.join(f'<td class="c{c}">r{r}c{c}</td>' for c in range(cols)) + '</tr>'
+                   for r in range(rows))
+    return _page('table', f'<table id="data"><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>')
+
+
+def shadow(depth=6):
+    return _page('shadow', '<div id="root"></div>', f'''
+let parent = document.getElementById('root');
+for (let i = 0; i < {depth}; i++) {{
+    const host = document.createElement('x-host');
+    parent.appendChild(host);
+    parent = host.attachShadow({{mode: 'open'}});
+}}
+parent.innerHTML = '<button id="deep">deep</button>';''')
+
+
+def frames(depth=3):
+    if depth <= 0:
+        return _page('frame', '<p id="inner">inner</p>')
+    return _page('frames', f'<iframe src="/frames?depth={depth - 1}"></iframe>')
+
+
+def delayed(ms=300):
+    return _page('delayed', '''
+<div id="vanish">vanish</div>
+<div id="reveal" style="display:none">reveal</div>
+<button id="enable" disabled>enable</button>
+<div id="list"></div>''', f'''
+setTimeout(() => {{
+    const appear = document.createElement('div');
+    appear.id = 'appear';
+    appear.textContent = 'appear';
+    document.body.appendChild(appear);
+    for (let i = 0; i < 5; i++) {{
+        const item = document.createElement('div');
+        item.className = 'item';
+        item.textContent = 'item ' + i;
+        document.getElementById('list').appendChild(item);
+    }}
+    document.getElementById('vanish').remove();
+    document.getElementById('reveal').style.display = 'block';
+    document.getElementById('enable').disabled = false;
+}}, {ms});''')
+
+
+def scroll(total=300, batch=20):
+    return _page('scroll', '<div id="feed"></div><div id="sentinel" style="height:10px"></div>', f'''
+let count = 0;
+function more() {{
+    const feed = document.getElementById('feed');
+    for (let i = 0; i < {batch} && count < {total}; i++, count++) {{
+        const item = document.createElement('div');
+        item.className = 'feed-item';
+        item.style.height = '60px';
+        item.dataset.id = String(count);
+        item.textContent = 'item ' + count;
+        feed.appendChild(item);
+    }}
+}}
+more();
+new IntersectionObserver(entries => {{
+    if (entries.some(e => e.isIntersecting)) setTimeout(more, 50);
+}}).observe(document.getElementById('sentinel'));''')
+
+
+def click():
+    return _page('click', '<button id="counter" onclick="this.textContent = +this.textContent + 1">0</button>')
+
+
+PAGES = {'/table': table, '/shadow': shadow, '/frames': frames, '/delayed': delayed, '/scroll': scroll,
+         '/click': click}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        args = {k: int(v[0]) for k, v in parse_qs(url.query).items()}
+        if url.path == '/file':
+            size = args.get('size', 1024 * 1024)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Disposition', f'attachment; filename="bench-{size}.bin"')
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            chunk = b'\0' * 65536
+            while size > 0:
+                self.wfile.write(chunk[:size])
+                size -= len(chunk)
+            return
+        page = PAGES.get(url.path)
+        if page is None:
+            self.send_error(404)
+            return
+        body = page(**args).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def non_loopback_address():
+    # chrome never sends loopback hosts through a proxy, so selenium-wire would not see the
+    # fixture traffic on 127.0.0.1. no packet is sent: connecting a udp socket only picks a route.
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(('10.255.255.255', 1))
+            address = s.getsockname()[0]
+        return None if address.startswith('127.') else address
+    except OSError:
+        return None
+
+
+class FixtureServer:
+    def __init__(self, port=0, host='127.0.0.1'):
+        self.__server = ThreadingHTTPServer((host, port), _Handler)
+        self.__server.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.__server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def url(self, path):
+        return self.base_url + path
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name='fixture-server', daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+
+if __name__ == '__main__':
+    server = FixtureServer(int(sys.argv[1]) if len(sys.argv) > 1 else 8000)
+    print(f'serving fixtures on {server.base_url}')
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
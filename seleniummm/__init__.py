@@ -1,7 +1,41 @@
 from .driver import *
+from .locator import Locator
+from .pool import WebDriverPool
+from .profiles import ProfileTemplate
+from .metrics import MemorySink, JsonLinesSink, PrometheusSink
+from .session import SessionStore
+from .downloads import Download
+from .plan import InteractionPlan, StepResult
+from .watchdog import MemoryWatchdog
+from .runner import CrawlRunner, JobResult
+from .cdp import CdpChannel, CdpError
+from .aio import AsyncWebDriver
+from .screencast import Screencast, Frame
+from .wirecache import WireCache
 
 __all__ = [
-    WebDriver
+    WebDriver,
+    Locator,
+    NetworkIdle,
+    PageResult,
+    WebDriverPool,
+    ProfileTemplate,
+    MemorySink,
+    JsonLinesSink,
+    PrometheusSink,
+    SessionStore,
+    Download,
+    InteractionPlan,
+    StepResult,
+    MemoryWatchdog,
+    CrawlRunner,
+    JobResult,
+    CdpChannel,
+    CdpError,
+    AsyncWebDriver,
+    Screencast,
+    Frame,
+    WireCache
 ]
 
 __version__ = '0.9.4'
\ No newline at end of file
@@ -0,0 +1,191 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import selenium.common.exceptions as Exceptions
+
+from .driver import WebDriver
+from .locator import Locator
+
+DEFAULT_MAX_THREADS = 32
+
+_default_executor = None
+_default_executor_lock = threading.Lock()
+
+
+def _shared_executor():
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ThreadPoolExecutor(DEFAULT_MAX_THREADS, thread_name_prefix='seleniummm-aio')
+        return _default_executor
+
+
+def _check(driver, kind, locator, count):
+    # one non-blocking look at the page. returns the wait value or None.
+    # frames a deep locator entered are left again unless elements behind them are returned.
+    mark = driver.__frame_mark__()
+    value = None
+    try:
+        value = _look(driver, kind, locator, count)
+        return value
+    finally:
+        if value is None or value is True:
+            driver.__leave_frames__(mark)
+
+
+def _look(driver, kind, locator, count):
+    try:
+        elements = driver.find_elements(locator)
+        first = elements[0] if elements else None
+        if kind == 'presence':
+            return first
+        if kind == 'presence_all':
+            return elements or None
+        if kind == 'visible':
+            return first if first is not None and first.is_displayed() else None
+        if kind == 'visible_all':
+            return elements if elements and all(e.is_displayed() for e in elements) else None
+        if kind == 'clickable':
+            return first if first is not None and first.is_displayed() and first.is_enabled() else None
+        if kind == 'invisible':
+            return True if first is None or not first.is_displayed() else None
+        if kind == 'count':
+            return elements if len(elements) >= count else None
+    except Exceptions.StaleElementReferenceException:
+        return True if kind == 'invisible' else None
+    raise ValueError(f'unknown wait kind: {kind}')
+
+
+def _alert(driver):
+    try:
+        return driver.driver.switch_to.alert
+    except Exceptions.NoAlertPresentException:
+        return None
+
+
+class AsyncWebDriver:
+    # asyncio facade over one WebDriver. commands run on a thread pool shared by all instances
+    # (DEFAULT_MAX_THREADS threads unless an executor is given), one command per browser at a time.
+    # wait_until_* do not hold a thread while waiting: each short check borrows one, the pause in
+    # between is asyncio.sleep, so cancelling or timing out a wait is immediate.
+    #
+    #   async with await AsyncWebDriver.create(visible=False) as d:
+    #       await d.get(url)
+    #       rows = await d.wait_until_elements_presence(css='tr')
+    # methods without an async version here (script, extract, select, ...) run on the pool as coroutines.
+    def __init__(self, driver:WebDriver, executor=None, poll_interval=0.1):
+        self.sync = driver
+        self.poll_interval = poll_interval
+        self.__executor = executor or _shared_executor()
+        self.__lock = None      # created by run() in the running loop, again if the loop changes
+        self.__lock_loop = None
+
+    @classmethod
+    async def create(cls, executor=None, poll_interval=0.1, **driver_kwargs):
+        executor = executor or _shared_executor()
+        driver = await asyncio.get_running_loop().run_in_executor(executor, functools.partial(WebDriver, **driver_kwargs))
+        return cls(driver, executor, poll_interval)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.quit()
+
+    async def run(self, fn, *args, **kwargs):
+        # fn(*args, **kwargs) on the pool. a cancelled caller does not interrupt a running command:
+        # the browser stays locked until it returns so the next command never overlaps it.
+        loop = asyncio.get_running_loop()
+        if self.__lock_loop is not loop:
+            self.__lock, self.__lock_loop = asyncio.Lock(), loop
+        lock = self.__lock
+        await lock.acquire()
+        try:
+            future = loop.run_in_executor(self.__executor, functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            lock.release()
+            raise
+        future.add_done_callback(lambda _: lock.release())
+        return await asyncio.shield(future)
+
+    def __getattr__(self, name):
+        if name == 'sync':
+            raise AttributeError(name)
+        attr = getattr(self.sync, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        return call
+
+    async def get(self, url, ready=None, timeout=None):
+        return await self.run(self.sync.get, url, ready, timeout)
+
+    async def click(self, *args, **kwargs):
+        return await self.run(self.sync.click, *args, **kwargs)
+
+    async def find_element(self, *args, **kwargs):
+        return await self.run(self.sync.find_element, *args, **kwargs)
+
+    async def find_elements(self, *args, **kwargs):
+        return await self.run(self.sync.find_elements, *args, **kwargs)
+
+    async def quit(self):
+        return await self.run(self.sync.quit)
+
+    async def __poll(self, check, what, timeout):
+        timeout = self.sync.get_wait_timeout() if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            value = await self.run(check)
+            if value is not None:
+                return value
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Exceptions.TimeoutException(f'wait timed out after {timeout} sec: {what}')
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def __wait(self, kind, locator, count=None, timeout=None):
+        if not isinstance(locator, Locator):
+            locator = Locator(**locator)
+        return await self.__poll(functools.partial(_check, self.sync, kind, locator, count),
+                                 f'{kind} {locator.condition}', timeout)
+
+    async def wait_until_alert_visible(self, timeout=None):
+        return await self.__poll(functools.partial(_alert, self.sync), 'alert', timeout)
+
+    async def wait_until_element_visible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, timeout=None):
+        return await self.__wait('visible', cls if isinstance(cls, Locator) else
+                                 dict(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag), timeout=timeout)
+
+    async def wait_until_element_presence(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, timeout=None):
+        return await self.__wait('presence', cls if isinstance(cls, Locator) else
+                                 dict(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag), timeout=timeout)
+
+    async def wait_until_elements_presence(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, timeout=None):
+        return await self.__wait('presence_all', cls if isinstance(cls, Locator) else
+                                 dict(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag), timeout=timeout)
+
+    async def wait_until_elements_visible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, timeout=None):
+        return await self.__wait('visible_all', cls if isinstance(cls, Locator) else
+                                 dict(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag), timeout=timeout)
+
+    async def wait_until_element_clickable(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, timeout=None):
+        return await self.__wait('clickable', cls if isinstance(cls, Locator) else
+                                 dict(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag), timeout=timeout)
+
+    async def wait_until_element_invisible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, timeout=None):
+        return await self.__wait('invisible', cls if isinstance(cls, Locator) else
+                                 dict(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag), timeout=timeout)
+
+    async def wait_until_elements_count(self, count, cls=None, id=None, xpath=None, name=None, css=None, tag=None, timeout=None):
+        return await self.__wait('count', cls if isinstance(cls, Locator) else
+                                 dict(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag), count, timeout)
+
+    async def wait_until_window_number_to_be(self, n, timeout=None):
+        return await self.__poll(lambda: True if len(self.sync.driver.window_handles) == n else None,
+                                 f'{n} windows', timeout)
@@ -0,0 +1,96 @@
+import functools
+import re
+
+
+def _extension_patterns(*extensions):
+    # anchored to the end of the path, with or without a query string. a bare '*.ico*' would
+    # also match hosts like iconfinder.com and block whole documents.
+    return [p for ext in extensions for p in (f'*://*/*.{ext}', f'*://*/*.{ext}?*')]
+
+
+def _domain_patterns(*domains):
+    # the domain itself and its subdomains, not any host merely containing the name
+    return [p for domain in domains for p in (f'*://{domain}/*', f'*://*.{domain}/*')]
+
+
+# url patterns for Network.setBlockedURLs. '*' is the only wildcard.
+RESOURCE_URL_PATTERNS = {
+    'image': _extension_patterns('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'),
+    'media': _extension_patterns('mp4', 'webm', 'ogg', 'mp3', 'm4a', 'wav', 'm3u8', 'mpd'),
+    'font': _extension_patterns('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'stylesheet': _extension_patterns('css'),
+}
+
+# Sec-Fetch-Dest values per resource type. used by the selenium-wire interceptor.
+RESOURCE_FETCH_DEST = {
+    'image': ('image',),
+    'media': ('video', 'audio', 'track'),
+    'font': ('font',),
+    'stylesheet': ('style',),
+    'script': ('script',),
+}
+
+TRACKER_PATTERNS = _domain_patterns(
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'connect.facebook.net',
+    'hotjar.com',
+    'scorecardresearch.com',
+    'criteo.com',
+    'adnxs.com',
+)
+
+BLOCK_PROFILES = {
+    'no-media': {'types': ['image', 'media']},
+    'no-trackers': {'patterns': TRACKER_PATTERNS},
+    'text-only': {'types': ['image', 'media', 'font', 'stylesheet'], 'patterns': TRACKER_PATTERNS},
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(pattern):
+    return re.compile('.*'.join(re.escape(part) for part in pattern.split('*')), re.DOTALL)
+
+
+def url_matches(url, pattern):
+    # Network.setBlockedURLs semantics: '*' matches any run of characters, everything else is literal
+    return _compile(pattern).fullmatch(url) is not None
+
+
+class BlockRule:
+    def __init__(self, types=(), patterns=()):
+        unknown = [t for t in types if t not in RESOURCE_FETCH_DEST]
+        if unknown:
+            raise ValueError(f'unknown resource types: {unknown}')
+        self.types = tuple(types)
+        self.patterns = tuple(patterns)
+        self.__fetch_dest = {dest for t in self.types for dest in RESOURCE_FETCH_DEST[t]}
+
+    @staticmethod
+    def of(spec):
+        # spec: profile name, {'types': [...], 'patterns': [...]} or BlockRule
+        if spec is None or isinstance(spec, BlockRule):
+            return spec
+        if isinstance(spec, str):
+            if spec not in BLOCK_PROFILES:
+                raise ValueError(f'unknown block profile: {spec}')
+            spec = BLOCK_PROFILES[spec]
+        return BlockRule(spec.get('types', ()), spec.get('patterns', ()))
+
+    def url_patterns(self):
+        # 'script' has no reliable url form; it is blocked by the wire interceptor only.
+        urls = [p for t in self.types for p in RESOURCE_URL_PATTERNS.get(t, ())]
+        return urls + list(self.patterns)
+
+    def blocks(self, url, fetch_dest=None):
+        if fetch_dest in self.__fetch_dest:
+            return True
+        return any(url_matches(url, p) for p in self.patterns)
+
+    def interceptor(self):
+        def intercept(request):
+            if self.blocks(request.url, request.headers.get('Sec-Fetch-Dest')):
+                request.abort()
+        return intercept
@@ -0,0 +1,157 @@
+import itertools
+import json
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from urllib.request import urlopen
+
+from selenium.common.exceptions import WebDriverException, JavascriptException, TimeoutException
+
+from tedious import intent_logger
+info, dbg, err, logger = intent_logger.get('seleniummm')
+
+
+class CdpError(WebDriverException):
+    def __init__(self, msg, code=None):
+        super().__init__(msg)
+        self.code = code
+
+
+class CdpChannel:
+    # persistent devtools websocket to the browser, living next to chromedriver.
+    # commands go straight to the browser: send() returns a Future so several commands can be
+    # in flight at once, call() waits for one reply. page commands need a session from attach(target_id);
+    # chromedriver window handles are the target ids. events are delivered to on(method, callback)
+    # from the reader thread as callback(method, params), only those of one session if session_id is given.
+    # callbacks must not wait for replies (call/batch) since replies arrive on that same thread; send() is fine.
+    def __init__(self, debugger_address, timeout=30, on_close=None):
+        import websocket    # websocket-client, installed with selenium
+        with urlopen(f'http://{debugger_address}/json/version', timeout=5) as r:
+            url = json.load(r)['webSocketDebuggerUrl']
+        # chrome refuses websocket clients sending an Origin without --remote-allow-origins
+        self.__ws = websocket.create_connection(url, timeout=timeout, suppress_origin=True,
+                                                enable_multithread=True)
+        self.__ws.settimeout(None)
+        self.timeout = timeout
+        self.on_close = on_close
+        self.closed = False
+        self.__ids = itertools.count(1)
+        self.__lock = threading.Lock()
+        self.__pending = {}
+        self.__handlers = {}
+        self.__sessions = {}    # target id -> session id
+        self.__reader = threading.Thread(target=self.__read, name='seleniummm-cdp', daemon=True)
+        self.__reader.start()
+        dbg(f'cdp channel connected: {url}')
+
+    def send(self, method, params=None, session_id=None):
+        future = Future()
+        if self.closed:
+            future.set_exception(CdpError('cdp channel closed'))
+            return future
+        msg = {'id': next(self.__ids), 'method': method, 'params': params or {}}
+        if session_id:
+            msg['sessionId'] = session_id
+        with self.__lock:
+            self.__pending[msg['id']] = future
+        try:
+            self.__ws.send(json.dumps(msg))
+        except Exception as e:
+            with self.__lock:
+                self.__pending.pop(msg['id'], None)
+            future.set_exception(CdpError(f'cdp send failed: {e!r}'))
+        return future
+
+    def call(self, method, params=None, session_id=None, timeout=None):
+        timeout = timeout or self.timeout
+        try:
+            return self.send(method, params, session_id).result(timeout)
+        except FutureTimeout:
+            raise TimeoutException(f'no reply to {method} in {timeout} sec')
+
+    def batch(self, commands, session_id=None, timeout=None):
+        # commands: [(method, params), ...]. all are sent before the first reply is awaited.
+        futures = [self.send(method, params, session_id) for method, params in commands]
+        return [f.result(timeout or self.timeout) for f in futures]
+
+    def on(self, method, callback, session_id=None):
+        self.__handlers.setdefault(method, []).append((callback, session_id))
+
+    def off(self, method, callback):
+        self.__handlers[method] = [h for h in self.__handlers.get(method, []) if h[0] != callback]
+
+    def attach(self, target_id):
+        session_id = self.__sessions.get(target_id)
+        if session_id is None:
+            session_id = self.call('Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+            self.__sessions[target_id] = session_id
+        return session_id
+
+    def evaluate(self, target_id, expression, await_promise=False, timeout=None):
+        # value of expression in the top document of the target. js errors raise JavascriptException.
+        result = self.call('Runtime.evaluate', {'expression': expression, 'returnByValue': True,
+                                                'awaitPromise': await_promise},
+                           self.attach(target_id), timeout)
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise JavascriptException(details.get('exception', {}).get('description') or details.get('text'))
+        return result['result'].get('value')
+
+    def query_all(self, target_id, selector):
+        # node ids of all css matches in the top document
+        session_id = self.attach(target_id)
+        root = self.call('DOM.getDocument', {'depth': 0}, session_id)['root']['nodeId']
+        return self.call('DOM.querySelectorAll', {'nodeId': root, 'selector': selector}, session_id)['nodeIds']
+
+    def __read(self):
+        while True:
+            try:
+                msg = json.loads(self.__ws.recv())
+            except Exception as e:
+                if not self.closed:
+                    dbg('cdp channel lost: ' + repr(e))
+                break
+            if 'id' in msg:
+                with self.__lock:
+                    future = self.__pending.pop(msg['id'], None)
+                if future is None:
+                    continue
+                if 'error' in msg:
+                    future.set_exception(CdpError(msg['error'].get('message'), msg['error'].get('code')))
+                else:
+                    future.set_result(msg.get('result', {}))
+                continue
+
+            method, params = msg.get('method'), msg.get('params', {})
+            if method == 'Target.detachedFromTarget' or method == 'Target.targetDestroyed':
+                for target_id, session_id in list(self.__sessions.items()):
+                    if target_id == params.get('targetId') or session_id == params.get('sessionId'):
+                        del self.__sessions[target_id]
+            for callback, session_id in list(self.__handlers.get(method, ())):
+                if session_id is not None and session_id != msg.get('sessionId'):
+                    continue
+                try:
+                    callback(method, params)
+                except Exception as e:
+                    err(f'cdp event handler failed on {method}: {e!r}')
+        self.__shutdown()
+
+    def __shutdown(self):
+        was_closed = self.closed
+        self.closed = True
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(CdpError('cdp channel closed'))
+        if not was_closed and self.on_close:
+            self.on_close()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.__ws.close()
+        except Exception:
+            pass
+        self.__shutdown()
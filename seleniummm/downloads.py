@@ -0,0 +1,281 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import shutil
+import struct
+import threading
+import time
+from dataclasses import dataclass
+
+from selenium.common.exceptions import TimeoutException
+
+from tedious import intent_logger
+info, dbg, err, logger = intent_logger.get('seleniummm')
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+EVENT_HEADER = struct.Struct('iIII')
+
+COPY_CHUNK = 1024 * 1024
+
+
+def _partial(name):
+    # chrome writes 'Unconfirmed N.crdownload' / '<name>.crdownload' and renames when finished
+    return name.endswith('.crdownload') or name.startswith('.com.google.Chrome') or name.startswith('Unconfirmed ')
+
+
+class DirectoryWatcher:
+    # finished-file events of one directory. inotify on linux, directory scan elsewhere.
+    def __init__(self, directory):
+        self.directory = directory
+        self.__fd = None
+        self.__known = set(os.listdir(directory))
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+            if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+            self.__fd = fd
+        except (OSError, AttributeError, TypeError):
+            self.__fd = None    # no inotify. scan on a short interval instead
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __read_events(self, timeout):
+        ready, _, _ = select.select([self.__fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.__fd, 64 * 1024)
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            names.append(data[offset:offset + length].rstrip(b'\0').decode(errors='replace'))
+            offset += length
+        return names
+
+    def __scan(self, timeout):
+        time.sleep(min(timeout, 0.1))
+        return os.listdir(self.directory)
+
+    def wait_new_file(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException(f'no finished download in {self.directory} within {timeout} sec')
+            names = self.__read_events(remaining) if self.__fd is not None else self.__scan(remaining)
+            for name in names:
+                if name in self.__known or _partial(name):
+                    continue
+                path = os.path.join(self.directory, name)
+                if os.path.isfile(path):
+                    self.__known.add(name)
+                    return path
+
+    def close(self):
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+
+@dataclass
+class Download:
+    path: str
+    size: int
+    elapsed_sec: float
+    digest: str = None
+
+
+def finish_file(path, copy_to=None, hash_name=None):
+    # single pass over the file: hash and/or copy chunk by chunk
+    if copy_to is None and hash_name is None:
+        return path, None
+    h = hashlib.new(hash_name) if hash_name else None
+    if copy_to is not None and os.path.isdir(copy_to):
+        copy_to = os.path.join(copy_to, os.path.basename(path))
+    with open(path, 'rb') as src:
+        dst = open(copy_to, 'wb') if copy_to is not None else None
+        try:
+            while True:
+                chunk = src.read(COPY_CHUNK)
+                if not chunk:
+                    break
+                if h:
+                    h.update(chunk)
+                if dst:
+                    dst.write(chunk)
+        finally:
+            if dst:
+                dst.close()
+    if copy_to is not None:
+        shutil.copystat(path, copy_to)
+    return (copy_to if copy_to is not None else path), (h.hexdigest() if h else None)
+
+
+def unique_path(directory, name):
+    # name, or 'name (n).ext' like chrome when it is taken
+    stem, ext = os.path.splitext(name or 'download')
+    path = os.path.join(directory, stem + ext)
+    n = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f'{stem} ({n}){ext}')
+        n += 1
+    return path
+
+
+class DownloadManager:
+    # downloads of one WebDriver instance, each instance in its own directory.
+    # with the cdp channel, chrome reports every download by guid and saves it as <guid>; the file is
+    # renamed to its suggested name once complete. download() claims the guid its own action started,
+    # so concurrent downloads are not mixed up. without the channel the directory is watched instead.
+    def __init__(self, driver, directory, apply_behavior=False):
+        self.__driver = driver
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        os.makedirs(self.directory, exist_ok=True)
+        self.__channel = None
+        self.__changed = threading.Condition()
+        self.__entries = {}     # guid -> {'seq', 'url', 'name', 'state', 'path', 'claimed'}
+        self.__seq = 0
+        self.__active = 0       # download() calls in progress
+        if apply_behavior:
+            # prefs do not apply to an attached browser
+            try:
+                driver.driver.execute_cdp_cmd('Browser.setDownloadBehavior',
+                                              {'behavior': 'allow', 'downloadPath': self.directory})
+            except Exception:
+                driver.driver.execute_cdp_cmd('Page.setDownloadBehavior',
+                                              {'behavior': 'allow', 'downloadPath': self.directory})
+
+    def __track(self):
+        # True when download events arrive over the cdp channel, opened here if needed.
+        # the behavior is reset by chrome when the channel closes.
+        channel = self.__driver.cdp
+        if channel is None or channel.closed:
+            channel = self.__driver.open_cdp_channel()
+        if channel is None:
+            return False
+        if channel is not self.__channel:
+            channel.on('Browser.downloadWillBegin', self.__on_event)
+            channel.on('Browser.downloadProgress', self.__on_event)
+            channel.call('Browser.setDownloadBehavior', {'behavior': 'allowAndName', 'downloadPath': self.directory,
+                                                         'eventsEnabled': True})
+            self.__channel = channel
+        return True
+
+    def __on_event(self, method, params):
+        # reader thread
+        with self.__changed:
+            if method == 'Browser.downloadWillBegin':
+                self.__seq += 1
+                self.__entries[params['guid']] = {'seq': self.__seq, 'url': params.get('url'),
+                                                  'name': params.get('suggestedFilename'), 'state': 'inProgress',
+                                                  'path': None, 'claimed': False}
+            else:
+                entry = self.__entries.get(params['guid'])
+                if entry is None or params.get('state') not in ('completed', 'canceled'):
+                    return
+                entry['state'] = params['state']
+                if entry['state'] == 'completed':
+                    saved = os.path.join(self.directory, params['guid'])
+                    entry['path'] = unique_path(self.directory, entry['name'])
+                    try:
+                        os.rename(saved, entry['path'])
+                    except OSError:
+                        entry['path'] = saved
+                self.__prune()
+            self.__changed.notify_all()
+
+    def __prune(self):
+        # finished downloads nobody waits for. kept while a download() call may still claim them.
+        if self.__active == 0:
+            for guid in [g for g, e in self.__entries.items() if e['state'] != 'inProgress' and not e['claimed']]:
+                del self.__entries[guid]
+
+    def __claim(self, url, since):
+        # guid of the first download begun after since, preferring one of url
+        candidates = sorted((e['seq'], guid) for guid, e in self.__entries.items() if e['seq'] > since and not e['claimed'])
+        for _, guid in candidates:
+            if url is None or self.__entries[guid]['url'] == url:
+                break
+        else:
+            if not candidates:
+                return None
+            guid = candidates[0][1]     # redirected
+        self.__entries[guid]['claimed'] = True
+        return guid
+
+    def __start(self, target):
+        # starts the download. returns its absolute url when known
+        if isinstance(target, str):
+            return self.__driver.driver.execute_script('''
+                const a = document.createElement('a');
+                a.href = arguments[0];
+                a.download = '';
+                document.body.appendChild(a);
+                a.click();
+                a.remove();
+                return a.href;''', target)
+        if callable(target):
+            target()
+        else:
+            self.__driver.click(target)
+        return None
+
+    def __wait_tracked(self, url, since, timeout):
+        deadline = time.monotonic() + timeout
+        guid = None
+        with self.__changed:
+            while True:
+                if guid is None:
+                    guid = self.__claim(url, since)
+                if guid is not None and self.__entries[guid]['state'] != 'inProgress':
+                    entry = self.__entries.pop(guid)
+                    if entry['state'] == 'canceled':
+                        raise Exception(f'download canceled: {entry["url"]}')
+                    return entry['path']
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.__channel.closed:
+                    if guid is not None:
+                        self.__entries.pop(guid, None)
+                    if remaining <= 0:
+                        raise TimeoutException(f'no finished download in {self.directory} within {timeout} sec')
+                    raise Exception('cdp channel lost while waiting for the download')
+                self.__changed.wait(min(remaining, 1))
+
+    def download(self, target, timeout=60, copy_to=None, hash_name=None):
+        # target: url, WebElement/Locator to click, or callable that starts the download
+        start = time.perf_counter()
+        try:
+            tracked = self.__track()
+        except Exception as e:
+            dbg('download events unavailable, watching the directory: ' + repr(e))
+            tracked = False
+
+        if tracked:
+            with self.__changed:
+                self.__active += 1
+                since = self.__seq
+            try:
+                path = self.__wait_tracked(self.__start(target), since, timeout)
+            finally:
+                with self.__changed:
+                    self.__active -= 1
+                    self.__prune()
+        else:
+            with DirectoryWatcher(self.directory) as watcher:
+                self.__start(target)
+                path = watcher.wait_new_file(timeout)
+
+        path, digest = finish_file(path, copy_to, hash_name)
+        return Download(path, os.path.getsize(path), time.perf_counter() - start, digest)
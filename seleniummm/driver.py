@@ -1,10 +1,16 @@
 import logging
-import os, platform, sys
+import os, platform
+import shutil
 from multipledispatch import dispatch
-import screeninfo
+import base64
 import inspect
+import json
+import time
 import traceback
-from selenium_stealth import stealth
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
 
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.remote.webelement import WebElement
@@ -20,6 +26,20 @@ from selenium.webdriver.remote.remote_connection import LOGGER as selenium_logge
 from urllib3.connectionpool import log as urllib_logger
 
 from tedious import intent_logger
+from . import js
+from .locator import Locator, DEEP
+from .blocking import BlockRule
+from .wirecache import WireCache
+from .profiles import ProfileTemplate
+from .downloads import DownloadManager
+from .tabs import TabRegistry
+from .plan import InteractionPlan
+from .session import SessionStore
+from .watchdog import MemoryWatchdog
+from .cdp import CdpChannel, CdpError
+from .screencast import Screencast, write_base64
+from . import metrics as metrics_module
+from .netlog import NetworkLogReader, EVENTS as NETWORK_EVENTS
 info, dbg, err, logger = intent_logger.get('seleniummm')
 
 root_path = os.path.dirname(__file__)
@@ -27,18 +47,52 @@ root_path = os.path.dirname(__file__)
 webdriver=None
 uwebdriver=None
 
-class WebDriver:
-    def __import_submodule(self, use_wire):
-        if use_wire:
-            from seleniumwire import webdriver as wd
-            import seleniumwire.undetected_chromedriver as uwd
-        else:
-            from selenium import webdriver as wd
-            import undetected_chromedriver as uwd
+POLL_CONDITIONS = {
+    'presence': EC.presence_of_element_located,
+    'presence_all': EC.presence_of_all_elements_located,
+    'visible': EC.visibility_of_element_located,
+    'visible_all': EC.visibility_of_all_elements_located,
+    'clickable': EC.element_to_be_clickable,
+    'invisible': EC.invisibility_of_element,
+}
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+class NetworkIdle:
+    # ready condition for WebDriver.get(): no new resource loaded for idle_ms after the document is parsed
+    def __init__(self, idle_ms=500):
+        self.idle_ms = idle_ms
+
+    def __repr__(self):
+        return f'NetworkIdle({self.idle_ms})'
+
+@dataclass
+class PageResult:
+    # one entry yielded by WebDriver.get_many()
+    url: str
+    value: Any = None
+    error: Exception = None
+    load_sec: float = 0.0
+    total_sec: float = 0.0
 
+class WebDriver:
+    def __import_submodule(self, use_wire, undetected):
+        # imported on first use so `import seleniummm` does not pay for wire/undetected
         global webdriver, uwebdriver
-        webdriver = wd
-        uwebdriver = uwd
+        if undetected:
+            if use_wire:
+                import seleniumwire.undetected_chromedriver as uwd
+            else:
+                import undetected_chromedriver as uwd
+            uwebdriver = uwd
+        else:
+            if use_wire:
+                from seleniumwire import webdriver as wd
+            else:
+                from selenium import webdriver as wd
+            webdriver = wd
 
     def __init__(self, 
                  set_download_path=None, 
@@ -58,148 +112,400 @@ class WebDriver:
                  proxy:str=None,
                  log_level:str="info",
                  debug_port=None,
-                 use_wire=False) -> None:
-        self.__import_submodule(use_wire)
+                 use_wire=False,
+                 wait_mode='poll',
+                 block_resources=None,
+                 performance_log=False,
+                 page_load_strategy='normal',
+                 wire_cache:WireCache=None,
+                 attach_to=None,
+                 profile_template:ProfileTemplate=None,
+                 metrics:metrics_module.MetricsSink=None,
+                 watchdog:MemoryWatchdog=None,
+                 cdp_channel=False) -> None:
+        self.__init_kwargs = {k: v for k, v in locals().items() if k != 'self'}    # for restart(). first, arguments only
+        init_start = time.perf_counter()
         urllib_logger.setLevel(logging.INFO)
         log_level = intent_logger.conv_level_code(log_level)
         selenium_logger.setLevel(log_level)
         logger.setLevel(log_level)
 
+        self.driver = None
+        self.cdp = None
+        self.__own_download_dir = None     # created here, removed on quit()
         if set_download_path is None:
-            set_download_path = root_path
+            # one directory per instance, so parallel workers do not collide
+            import tempfile
+            set_download_path = self.__own_download_dir = tempfile.mkdtemp(prefix='seleniummm-download-')
+
+        # throwaway copy of a prepared user-data-dir. removed on quit()
+        self.__profile_clone = None
+        if profile_template is not None:
+            self.__profile_clone = profile_template.clone()
+            profile = {'root': self.__profile_clone, 'name': profile_template.name}
 
         try:
-            self.__monitors = screeninfo.get_monitors()
-        except:
             self.__monitors = None
+            if window_size is None or hide:
+                try:
+                    import screeninfo
+                    self.__monitors = screeninfo.get_monitors()
+                except:
+                    self.__monitors = None
+
+            def create_option(undetected:bool,
+                              user_agent:str=None,
+                              proxy:str=None):
+                if undetected:
+                    options = uwebdriver.ChromeOptions()
+                else:
+                    options = webdriver.ChromeOptions()
+
+                if not visible: 
+                    options.add_argument('--headless')
+                if window_size:
+                    options.add_argument(f'--window-size={window_size[0]},{window_size[1]}')
+                elif self.__monitors != None:
+                    options.add_argument(f'--window-size={self.__monitors[0].width},{self.__monitors[0].height}')
+                else:
+                    options.add_argument(f'--window-size=1920,1080')
+
+                if proxy:
+                    options.add_argument(f'--proxy-server={proxy}')
+                options.add_argument('-ignore-certificate-errors')
+                options.add_argument('--disable-extensions')
+                options.add_argument('--no-sandbox')
+                if open_devtools:
+                    options.add_argument("--auto-open-devtools-for-tabs")
+                if performance_log:     # read through network_log()
+                    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+                    options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+                if user_agent:
+                    options.add_argument(f'--user-agent={user_agent}')
+                if profile:
+                    options.add_argument(f'--user-data-dir={os.path.expanduser(profile["root"])}')
+                    options.add_argument(f'--profile-directory={profile["name"]}')
+
+                if not undetected:
+                    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+                    options.add_experimental_option('excludeSwitches', ['enable-logging'])
+                    options.add_experimental_option('useAutomationExtension', False)
+                options.add_argument('--disable-blink-features=AutomationControlled')
+
+                if debug_port is not None:  # usually 9222
+                    options.add_argument(f'--remote-debugging-port={debug_port}')
+                options.add_argument("--lang=" + lang)
+                # 'normal': wait for load event, 'eager': DOMContentLoaded, 'none': return right after navigation starts
+                options.page_load_strategy = page_load_strategy
+                options.add_argument('--disable-dev-shm-usage')
+
+                # chrome://prefs-internals/
+                prefs = {
+                    "download.default_directory": set_download_path,
+                    "download.prompt_for_download": False,
+                    "download.directory_upgrade": True,
+                    "safebrowsing.enabled": True,
+                    "plugins.always_open_pdf_externally": True
+                }
+                if disable_download:
+                    prefs['download.download_restrictions'] = 3
+                options.add_experimental_option("prefs", prefs)
+                return options
 
-        def create_option(undetected:bool,
-                          user_agent:str=None,
-                          proxy:str=None):
-            if undetected:
-                options = uwebdriver.ChromeOptions()
-            else:
+            self.driver = None
+            # when chromedriver needs to be selected forcibly...
+            # webdriver_service = Service('./chromedriver/chromedriver')
+            # self.driver = webdriver.Chrome(options=options, service=webdriver_service)
+            if attach_to is not None:
+                # browser already running with --remote-debugging-port. nothing is launched,
+                # launch options do not apply.
+                self.__import_submodule(use_wire, False)
                 options = webdriver.ChromeOptions()
-
-            if not visible: 
-                options.add_argument('--headless')
-            if window_size:
-                options.add_argument(f'--window-size={window_size[0]},{window_size[1]}')
-            elif self.__monitors != None:
-                options.add_argument(f'--window-size={self.__monitors[0].width},{self.__monitors[0].height}')
-            else:
-                options.add_argument(f'--window-size=1920,1080')
-
-            if proxy:
-                options.add_argument(f'--proxy-server={proxy}')
-            options.add_argument('-ignore-certificate-errors')
-            options.add_argument('--disable-extensions')
-            options.add_argument('--no-sandbox')
-            if open_devtools:
-                options.add_argument("--auto-open-devtools-for-tabs")
-            options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
-            if user_agent:
-                options.add_argument(f'--user-agent={user_agent}')
-            if profile:
-                options.add_argument(f'--user-data-dir={os.path.expanduser(profile["root"])}')
-                options.add_argument(f'--profile-directory={profile["name"]}')
-
-            if not undetected:
-                options.add_experimental_option("excludeSwitches", ["enable-automation"])
-                options.add_experimental_option('excludeSwitches', ['enable-logging'])
-                options.add_experimental_option('useAutomationExtension', False)
-            options.add_argument('--disable-blink-features=AutomationControlled')
-
-            if debug_port is not None:  # usually 9222
-                options.add_argument(f'--remote-debugging-port={debug_port}')
-            options.add_argument("--lang=" + lang)
-            options.add_argument('--disable-dev-shm-usage')
-
-            # chrome://prefs-internals/
-            prefs = {
-                "download.default_directory": set_download_path,
-                "download.prompt_for_download": False,
-                "download.directory_upgrade": True,
-                "safebrowsing.enabled": True,
-                "plugins.always_open_pdf_externally": True
-            }
-            if disable_download:
-                prefs['download.download_restrictions'] = 3
-            options.add_experimental_option("prefs", prefs)
-            return options
-
-        self.driver = None
-        # when chromedriver needs to be selected forcibly...
-        # webdriver_service = Service('./chromedriver/chromedriver')
-        # self.driver = webdriver.Chrome(options=options, service=webdriver_service)
-        if driver_preference == 'standard':
-            self.driver = webdriver.Chrome(service=Service(), options=create_option(False, user_agent, proxy))
-            info('chromedriver(standard) initialized')
-        elif driver_preference == 'undetected':
-            self.driver = uwebdriver.Chrome(options=create_option(True, user_agent, proxy))
-            info('chromedriver(undetected) initialized')
-        else:
-            # try undetected driver first. selenium webdriver is fallback.
-            try:
-                self.driver = uwebdriver.Chrome(options=create_option(True, user_agent, proxy))
-                info('chromedriver(undetected) initialized')
-            except:
-                print(traceback.format_exc())
-                err('undetected_chromedriver init failed. fallback to standard selenium')
+                options.debugger_address = attach_to if isinstance(attach_to, str) else f'127.0.0.1:{attach_to}'
+                options.page_load_strategy = page_load_strategy
+                if performance_log:
+                    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+                self.driver = webdriver.Chrome(service=Service(), options=options)
+                self.flavor = 'attached'
+                info(f'chromedriver(attached) initialized: {options.debugger_address}')
+            elif driver_preference == 'standard':
+                self.__import_submodule(use_wire, False)
                 self.driver = webdriver.Chrome(service=Service(), options=create_option(False, user_agent, proxy))
+                self.flavor = 'standard'
                 info('chromedriver(standard) initialized')
+            elif driver_preference == 'undetected':
+                self.__import_submodule(use_wire, True)
+                self.driver = uwebdriver.Chrome(options=create_option(True, user_agent, proxy))
+                self.flavor = 'undetected'
+                info('chromedriver(undetected) initialized')
+            else:
+                # try undetected driver first. selenium webdriver is fallback.
+                try:
+                    self.__import_submodule(use_wire, True)
+                    self.driver = uwebdriver.Chrome(options=create_option(True, user_agent, proxy))
+                    self.flavor = 'undetected'
+                    info('chromedriver(undetected) initialized')
+                except:
+                    print(traceback.format_exc())
+                    err('undetected_chromedriver init failed. fallback to standard selenium')
+                    self.__import_submodule(use_wire, False)
+                    self.driver = webdriver.Chrome(service=Service(), options=create_option(False, user_agent, proxy))
+                    self.flavor = 'standard'
+                    info('chromedriver(standard) initialized')
                 
-        if self.driver == None:
-            raise Exception('driver initialization error.')
-        if use_stealth:
-            stealth(
-                self.driver,
-                languages=["ko-KR", "ko"],
-                vendor="Google Inc.",
-                platform="Win32",
-                webgl_vendor="Intel Inc.",
-                renderer="Intel Iris OpenGL Engine",
-                fix_hairline=True,
-            )
-
-        # if not visible:
-        #     # def interceptor(request):
-        #     #     required_headers = {
-        #     #         'sec-ch-ua-arch': 'x86',
-        #     #         'sec-ch-ua-bitness': '64',
-        #     #         'sec-ch-ua-full-version': '123.0.6312.107',
-        #     #         'sec-ch-ua-full-version-list': '"Google Chrome";v="123.0.6312.107", "Not:A-Brand";v="8.0.0.0", "Chromium";v="123.0.6312.107"'
-        #     #     }
-
-        #     #     for key in request.headers.keys():
-        #     #         if key.casefold() == 'sec-ch-ua' and 'headless' in request.headers[key].casefold():
-        #     #             org = request.headers[key]
-        #     #             del request.headers[key]
-        #     #             request.headers[key] = org.replace('Headless', '').replace('headless', '').replace('HEADLESS', '')
-        #     #         elif key.casefold() in required_headers.keys():
-        #     #             required_headers.pop(key.casefold())
+            if self.driver == None:
+                raise Exception('driver initialization error.')
+            if use_wire:
+                self.flavor += '+wire'
+            self.__use_stealth = use_stealth
+            if use_stealth:
+                self.__apply_stealth__()
+
+            # if not visible:
+            #     # def interceptor(request):
+            #     #     required_headers = {
+            #     #         'sec-ch-ua-arch': 'x86',
+            #     #         'sec-ch-ua-bitness': '64',
+            #     #         'sec-ch-ua-full-version': '123.0.6312.107',
+            #     #         'sec-ch-ua-full-version-list': '"Google Chrome";v="123.0.6312.107", "Not:A-Brand";v="8.0.0.0", "Chromium";v="123.0.6312.107"'
+            #     #     }
+
+            #     #     for key in request.headers.keys():
+            #     #         if key.casefold() == 'sec-ch-ua' and 'headless' in request.headers[key].casefold():
+            #     #             org = request.headers[key]
+            #     #             del request.headers[key]
+            #     #             request.headers[key] = org.replace('Headless', '').replace('headless', '').replace('HEADLESS', '')
+            #     #         elif key.casefold() in required_headers.keys():
+            #     #             required_headers.pop(key.casefold())
                 
-        #     #     for key in required_headers.keys():
-        #     #         request.headers[key] = required_headers[key]
+            #     #     for key in required_headers.keys():
+            #     #         request.headers[key] = required_headers[key]
                     
-        #     self.driver.request_interceptor = interceptor
-
-        info('port: ' + str(debug_port))
+            #     self.driver.request_interceptor = interceptor
+
+            self.tabs = TabRegistry(self.driver)
+            self.cdp = None
+            self.__cdp_target = None    # window handle cdp scripts run in. None: ask chromedriver
+            self.__in_frame = False
+            self.__frame_depth = 0      # frames entered by deep lookups, see __leave_frames__()
+            self.__origins = set()     # origins loaded through get()/get_many(), cleared by reset()
+            self.__init_scripts = []   # [window handle, identifier, source] of add_init_script()
+            self.__page_load_strategy = page_load_strategy
+            self.__nav_seq = 0
+            if cdp_channel:
+                self.open_cdp_channel()
+            self.downloads = None if disable_download else DownloadManager(self, set_download_path, apply_behavior=attach_to is not None)
+            self.__use_wire = use_wire
+            self.__performance_log = performance_log
+            self.__block_rule = None
+            self.__wire_cache = None
+            if block_resources:
+                self.set_blocked_resources(block_resources)
+            if wire_cache:
+                self.set_wire_cache(wire_cache)
+
+            info('port: ' + str(debug_port))
             
-        self.hide = hide
-        if self.hide:
-            self.wnd_hidden()
-        self.minimize = minimize
-        if self.minimize:
-            self.wnd_min()
-
-        self.set_wait_timeout(wait_timeout_sec)
+            self.hide = hide
+            if self.hide:
+                self.wnd_hidden()
+            self.minimize = minimize
+            if self.minimize:
+                self.wnd_min()
+
+            self.__script_timeout = 0
+            self.__page_load_timeout = None
+            self.set_wait_timeout(wait_timeout_sec)
+            self.set_wait_mode(wait_mode)
+            self.last_wait_sec = None
+
+            self.__metrics = None
+            if metrics:
+                metrics.record('init', time.perf_counter() - init_start, 'ok', '', self.flavor)
+                self.set_metrics(metrics)
+
+            self.watchdog = watchdog
+            if watchdog:
+                watchdog.attach(self)
+        except BaseException:
+            # a half-built instance keeps neither chrome nor the profile clone around
+            try:
+                self.quit()
+            except Exception:
+                dbg('quit after failed init failed: ' + traceback.format_exc())
+            raise
+
+    def __apply_stealth__(self):
+        # per tab: the patches are init scripts of the current tab
+        from selenium_stealth import stealth
+        stealth(
+            self.driver,
+            languages=["ko-KR", "ko"],
+            vendor="Google Inc.",
+            platform="Win32",
+            webgl_vendor="Intel Inc.",
+            renderer="Intel Iris OpenGL Engine",
+            fix_hairline=True,
+        )
+
+    def __tab_replaced__(self, old):
+        # the current tab took the place of the closed tab old (MemoryWatchdog.recycle_tab).
+        # per tab setup moves over: blocked urls, stealth and the add_init_script() sources of old,
+        # under new identifiers. a screencast of old ends with it.
+        self.tabs.forget(old)
+        self.__context_changed__()
+        if self.__block_rule:
+            self.__apply_blocked_urls__()
+        if self.__use_stealth:
+            self.__apply_stealth__()
+        moved = [source for handle, _, source in self.__init_scripts if handle == old]
+        self.__init_scripts = [s for s in self.__init_scripts if s[0] != old]
+        for source in moved:
+            self.add_init_script(source)
+
+    def restart(self, keep_session=True):
+        # relaunch the browser with the same constructor arguments.
+        # cookies of all domains and storage of the current origin are carried over.
+        store_path = None
+        if keep_session and self.driver is not None:
+            import tempfile
+            fd, store_path = tempfile.mkstemp(prefix='seleniummm-session-', suffix='.sqlite')
+            os.close(fd)
+            store = SessionStore(store_path)
+            store.save(self)
+            store.close()
+
+        # a download directory created by this instance is kept across the restart
+        own_download_dir, self.__own_download_dir = self.__own_download_dir, None
+        self.quit()
+        kwargs = dict(self.__init_kwargs)
+        if own_download_dir:
+            kwargs['set_download_path'] = own_download_dir
+        self.__init__(**kwargs)
+        self.__own_download_dir = own_download_dir
+        if store_path:
+            store = SessionStore(store_path)
+            store.restore(self)
+            store.close()
+            os.remove(store_path)
+        info('browser restarted')
+
+    def open_cdp_channel(self):
+        # direct devtools websocket. script(), extract() and observer waits run over it, and tabs
+        # become live from Target events. all of them fall back to chromedriver while the channel is
+        # missing or lost, and inside frames. switch windows/frames through this class (not
+        # self.driver.switch_to) so the channel follows the current tab.
+        address = self.driver.capabilities.get('goog:chromeOptions', {}).get('debuggerAddress')
+        if not address:
+            err('no debugger address. cdp channel disabled')
+            return None
+        try:
+            self.cdp = CdpChannel(address, on_close=self.__cdp_closed__)
+            for event in ('Target.targetCreated', 'Target.targetInfoChanged', 'Target.targetDestroyed'):
+                self.cdp.on(event, self.tabs.on_event)
+            self.tabs.refresh()
+            self.cdp.call('Target.setDiscoverTargets', {'discover': True})
+            self.tabs.live = True
+            info(f'cdp channel opened: {address}')
+        except Exception as e:
+            err('cdp channel failed. chromedriver only: ' + repr(e))
+            if self.cdp:
+                self.cdp.close()
+            self.cdp = None
+        return self.cdp
+
+    def __cdp_closed__(self):
+        self.tabs.live = False
+        err('cdp channel closed. chromedriver only from now')
+
+    def __context_changed__(self, in_frame=False):
+        self.__cdp_target = None
+        self.__in_frame = in_frame
+        if not in_frame:
+            self.__frame_depth = 0
+
+    def __enter_frame__(self, frame):
+        self.driver.switch_to.frame(frame)
+        self.__frame_depth += 1
+        self.__context_changed__(in_frame=True)
+
+    def __frame_mark__(self):
+        return self.__frame_depth, self.__in_frame
+
+    def __leave_frames__(self, mark):
+        # back to the frame current at __frame_mark__(), leaving what deep lookups entered since
+        depth, in_frame = mark
+        if self.__frame_depth <= depth:
+            return
+        try:
+            while self.__frame_depth > depth:
+                self.driver.switch_to.parent_frame()
+                self.__frame_depth -= 1
+        except Exceptions.WebDriverException:
+            self.driver.switch_to.default_content()     # frame detached meanwhile
+            in_frame = False
+        self.__context_changed__(in_frame)
+
+    @contextmanager
+    def __frames_restored__(self):
+        # interaction through a deep locator: frames entered to reach the element are left afterwards
+        mark = self.__frame_mark__()
+        try:
+            yield
+        finally:
+            self.__leave_frames__(mark)
+
+    def __cdp_script__(self, source, args=(), is_async=False, timeout=None):
+        # (True, value) when the script ran over the cdp channel, (False, None) to take the chromedriver path.
+        # js errors raise JavascriptException like execute_script.
+        if self.cdp is None or self.cdp.closed or self.__in_frame:
+            return False, None
+        try:
+            args = json.dumps(list(args))
+        except TypeError:
+            return False, None  # WebElement arguments
+        try:
+            if self.__cdp_target is None:
+                self.__cdp_target = self.driver.current_window_handle
+            expression = js.CDP_CALL_BEGIN + source + js.CDP_CALL_END + args + (', true)' if is_async else ', false)')
+            result = self.cdp.evaluate(self.__cdp_target, expression, True, timeout)
+        except CdpError as e:
+            dbg('cdp script failed, using chromedriver: ' + repr(e))
+            self.__cdp_target = None
+            return False, None
+        if result.get('stashed'):
+            return True, self.driver.execute_script(js.UNSTASH)
+        return True, result['value']
+
+    def __cdp_cmd__(self, method, params):
+        # page command for the current tab. over the cdp channel when open, chromedriver otherwise
+        if self.cdp is not None and not self.cdp.closed:
+            try:
+                if self.__cdp_target is None:
+                    self.__cdp_target = self.driver.current_window_handle
+                return self.cdp.call(method, params, self.cdp.attach(self.__cdp_target))
+            except CdpError as e:
+                dbg(f'cdp {method} failed, using chromedriver: {e!r}')
+                self.__cdp_target = None
+        return self.driver.execute_cdp_cmd(method, params)
+
+    def set_metrics(self, sink:metrics_module.MetricsSink=None):
+        # per-command latency/outcome records to sink. None removes the wrappers, so no overhead when off.
+        if self.__metrics:
+            metrics_module.uninstrument(self)
+        self.__metrics = sink
+        if sink:
+            metrics_module.instrument(self, sink, self.flavor)
     
     def close(self):
+        handle = self.driver.current_window_handle
         self.driver.close()
+        self.tabs.forget(handle)
+        self.__context_changed__()
 
     def script(self, s):
-        return self.driver.execute_script(s)
+        ok, value = self.__cdp_script__(s)
+        return value if ok else self.driver.execute_script(s)
     
     def page_down(self):
         self.find_element(tag='body').send_keys(Keys.PAGE_DOWN)
@@ -214,9 +520,102 @@ class WebDriver:
         self.find_element(tag='body').send_keys(Keys.UP)
 
     def quit(self):
+        if self.cdp is not None:
+            self.cdp.close()
+            self.cdp = None
         if self.driver != None:
             self.driver.quit()
             self.driver = None
+        if self.__profile_clone:
+            ProfileTemplate.discard(self.__profile_clone)
+            self.__profile_clone = None
+        if self.__own_download_dir:
+            shutil.rmtree(self.__own_download_dir, ignore_errors=True)
+            self.__own_download_dir = None
+
+    def is_alive(self):
+        if self.driver == None:
+            return False
+        try:
+            self.driver.current_window_handle
+            return True
+        except:
+            return False
+
+    def reset(self):
+        # back to a clean single blank tab. used when a pooled driver is returned.
+        # storage is cleared for every origin seen: pages loaded through get()/get_many(), history and
+        # frames of each open tab, and cookie domains.
+        try:
+            handles = self.driver.window_handles
+            origins = set(self.__origins)
+            for handle in reversed(handles):
+                self.driver.switch_to.window(handle)
+                origins |= self.__tab_origins__()
+                if handle != handles[0]:
+                    self.driver.close()
+                    self.tabs.forget(handle)
+            self.driver.switch_to.window(handles[0])
+            self.driver.switch_to.default_content()
+            self.__context_changed__()
+            for cookie in self.driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']:
+                domain = cookie['domain'].lstrip('.')
+                origins.update((f'https://{domain}', f'http://{domain}'))
+            for origin in origins:
+                if not origin.startswith(('http://', 'https://')):
+                    continue
+                self.driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+                try:
+                    # session storage belongs to the tab, not to the origin's storage
+                    self.driver.execute_cdp_cmd('DOMStorage.clear', {
+                        'storageId': {'securityOrigin': origin, 'isLocalStorage': False}})
+                except Exceptions.WebDriverException:
+                    pass
+            self.__origins.clear()
+            for handle, identifier, source in self.__init_scripts:
+                if handle == handles[0]:
+                    self.remove_init_script(identifier)
+            self.__init_scripts = []
+            try:
+                self.driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            except:
+                self.driver.delete_all_cookies()
+            self.driver.get('about:blank')
+            return True
+        except:
+            err('driver reset failed: ' + traceback.format_exc())
+            return False
+
+    def add_init_script(self, source):
+        # runs source in every new document of the current tab, before the page's own scripts.
+        # returns the identifier for remove_init_script(). reset() removes them all.
+        identifier = self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': source})['identifier']
+        self.__init_scripts.append([self.driver.current_window_handle, identifier, source])
+        return identifier
+
+    def remove_init_script(self, identifier):
+        # identifiers are per tab: removes the one registered on the current tab
+        handle = self.driver.current_window_handle
+        self.__init_scripts = [s for s in self.__init_scripts if s[:2] != [handle, identifier]]
+        try:
+            self.driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': identifier})
+        except Exceptions.WebDriverException:
+            pass    # already gone with its tab
+
+    def __tab_origins__(self):
+        # origins in the history and frame tree of the current tab
+        origins = set()
+        try:
+            for entry in self.driver.execute_cdp_cmd('Page.getNavigationHistory', {})['entries']:
+                origins.add(_origin(entry['url']))
+            nodes = [self.driver.execute_cdp_cmd('Page.getFrameTree', {})['frameTree']]
+            while nodes:
+                node = nodes.pop()
+                origins.add(node['frame'].get('securityOrigin', ''))
+                nodes.extend(node.get('childFrames', ()))
+        except Exceptions.WebDriverException:
+            pass
+        return origins
 
     def wnd_size(self, w,h):
         self.driver.set_window_size(w,h)
@@ -225,6 +624,7 @@ class WebDriver:
         self.driver.set_window_position(x, y)
 
     def wnd_hidden(self):
+        import screeninfo
         monitors = screeninfo.get_monitors()
         max_h=0
         for m in monitors:
@@ -243,38 +643,353 @@ class WebDriver:
 
     def set_wait_timeout(self, sec):
         self.__wait_timeout = sec
-
-    def get(self, url):
+        self.__ensure_script_timeout__(sec)
+
+    def get_wait_timeout(self):
+        return self.__wait_timeout
+
+    def __ensure_script_timeout__(self, sec):
+        # observer/ready waits run as async script. keep script timeout above wait timeout.
+        if self.__script_timeout < sec + 5:
+            self.__script_timeout = max(30, sec + 5)
+            self.driver.set_script_timeout(self.__script_timeout)
+
+    def set_wait_mode(self, mode):
+        # 'poll': WebDriverWait polling every 500ms, 'observer': MutationObserver in page
+        if mode not in ('poll', 'observer'):
+            raise ValueError(f'unknown wait mode: {mode}')
+        self.__wait_mode = mode
+
+    def get(self, url, ready=None, timeout=None):
+        # ready: Locator(presence), js expression string, NetworkIdle(idle_ms) or callable(driver).
+        #        combine with page_load_strategy 'eager'/'none' to return as soon as the page is usable.
+        #        only checked once the new document has committed, never against the previous page.
+        # timeout: cap for navigation + readiness. wait timeout is used for readiness if None.
+        start = time.perf_counter()
+        if self.watchdog:
+            self.watchdog.before_navigation()   # a recycled tab gets its setup in __tab_replaced__()
+        if timeout != self.__page_load_timeout:
+            self.driver.set_page_load_timeout(timeout if timeout is not None else 300)    # 300: chromedriver default
+            self.__page_load_timeout = timeout
+        # 'normal' returns after the load event of the new document. the others may return before it commits.
+        token = None
+        if ready is not None and self.__page_load_strategy != 'normal':
+            token = self.__mark_navigation__(url)
+        self.__origins.add(_origin(url))
         self.driver.get(url)
+        if self.__in_frame:
+            self.__context_changed__()  # navigation returns to the top document
         if self.minimize:
             self.wnd_min()
+        if ready is None:
+            return None
+
+        remaining = (timeout if timeout is not None else self.__wait_timeout) - (time.perf_counter() - start)
+        return self.__wait_ready__(ready, max(0, remaining), token)
+
+    def __mark_navigation__(self, url):
+        # token the document being left carries and the next one does not. None when the page cannot be
+        # marked or the navigation keeps the document.
+        self.__nav_seq += 1
+        token = f'smm-nav-{self.__nav_seq}'
+        try:
+            return token if self.driver.execute_script(js.NAV_MARK + 'return marked;', url, token) else None
+        except Exceptions.WebDriverException:
+            return None
+
+    def __wait_committed__(self, token, deadline):
+        while True:
+            try:
+                if self.driver.execute_script(js.COMMITTED, token):
+                    return
+            except Exceptions.WebDriverException:
+                pass    # document being replaced
+            if time.perf_counter() >= deadline:
+                raise Exceptions.TimeoutException('navigation did not commit')
+            time.sleep(0.05)
+
+    def __wait_ready__(self, ready, timeout, token=None):
+        # token: from __mark_navigation__. the old document it marks never counts as ready.
+        deadline = time.perf_counter() + timeout
+        if isinstance(ready, NetworkIdle):
+            kind, arg = 'network_idle', ready.idle_ms
+        elif isinstance(ready, str):
+            kind, arg = 'predicate', ready
+        elif isinstance(ready, Locator) or callable(ready):
+            if token is not None:
+                self.__wait_committed__(token, deadline)
+            remaining = max(0, deadline - time.perf_counter())
+            if isinstance(ready, Locator):
+                return self.__wait__('presence', ready.condition, timeout=remaining)
+            return WebDriverWait(self.driver, remaining).until(ready)
+        else:
+            raise ValueError(f'unsupported ready condition: {ready!r}')
+
+        self.__ensure_script_timeout__(timeout)
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise Exceptions.TimeoutException(f'page not ready: {ready!r}')
+            try:
+                result = self.driver.execute_async_script(js.READY_WAIT, kind, arg, token, int(remaining * 1000))
+            except Exceptions.TimeoutException:
+                raise
+            except Exceptions.WebDriverException:
+                # document replaced while waiting. happens with page_load_strategy 'none'
+                time.sleep(0.05)
+                continue
+            if result is None or result.get('timeout'):
+                raise Exceptions.TimeoutException(f'page not ready: {ready!r}')
+            return result['value']
 
     def open_new_tab(self):
-        last_wnd_cnt = len(self.driver.window_handles)
+        # new window command returns once the tab exists. no need to poll the window count.
         self.driver.switch_to.new_window('tab')
-        self.wait_until_window_number_to_be(last_wnd_cnt+1)
+        self.__context_changed__()
+        if self.__block_rule:
+            self.__apply_blocked_urls__()
         if self.minimize:
             self.wnd_min()
 
+    def get_many(self, urls, max_tabs=4, handler=None, ready=None, timeout=None):
+        # loads urls in up to max_tabs tabs at once and yields PageResult as each page becomes ready.
+        # handler(driver, url) runs with the ready tab selected, its return value goes to PageResult.value.
+        #        errors of handler, timeouts and failed navigations go to PageResult.error. a handler may
+        #        close its tab, the next url then gets a new one.
+        # ready: None(load event), js expression string or Locator(presence). checked without blocking,
+        #        and only once the new document of the tab has committed.
+        # timeout: per url, wait timeout if None.
+        timeout = self.__wait_timeout if timeout is None else timeout
+        # each check gets the navigation token of its tab. the document that token marks is the old one.
+        if isinstance(ready, Locator):
+            check = lambda token: ((token is None or self.driver.execute_script(js.COMMITTED, token))
+                                   and len(self.find_elements(ready)) > 0)
+        elif isinstance(ready, str):
+            check = lambda token: bool(self.driver.execute_script(js.NAV_GUARD + f'return !!({ready});', token))
+        elif ready is None:
+            check = lambda token: self.driver.execute_script(
+                js.NAV_GUARD + "return document.readyState === 'complete';", token)
+        else:
+            raise ValueError(f'unsupported ready condition: {ready!r}')
+
+        origin = self.driver.current_window_handle
+        pending = iter(urls)
+        idle = [origin]
+        active = {}     # handle -> (url, navigation start, navigation token)
+        failed = []     # PageResult of urls whose navigation could not start
+        dropped = []    # tabs of those, not reused
+
+        def navigate(handle):
+            url = next(pending, None)
+            if url is None:
+                idle.append(handle)
+                return
+            try:
+                self.driver.switch_to.window(handle)
+                if self.__block_rule:
+                    self.__apply_blocked_urls__()
+                self.__origins.add(_origin(url))
+                # assigning location does not wait for the load, unlike driver.get()
+                self.__nav_seq += 1
+                token = f'smm-nav-{self.__nav_seq}'
+                marked = self.driver.execute_script(js.NAV_MARK + 'location.href = url; return marked;', url, token)
+            except Exceptions.WebDriverException as e:
+                # e.g. the handler closed the tab. the url fails, the others go on in other tabs
+                failed.append(PageResult(url, error=e))
+                dropped.append(handle)
+                return
+            active[handle] = (url, time.perf_counter(), token if marked else None)
+
+        def fill():
+            # one more tab per url until max_tabs. a tab goes idle once the urls run out
+            while len(active) < max_tabs and len(idle) == 0:
+                self.driver.switch_to.new_window('tab')
+                navigate(self.driver.current_window_handle)
+
+        try:
+            navigate(idle.pop())
+            fill()
+            yield from failed
+            failed.clear()
+
+            while active:
+                progressed = False
+                for handle, (url, started, token) in list(active.items()):
+                    self.driver.switch_to.window(handle)
+                    result = PageResult(url)
+                    try:
+                        ready_now = check(token)
+                    except Exceptions.WebDriverException:
+                        ready_now = False   # document is being replaced
+                    if not ready_now and time.perf_counter() - started < timeout:
+                        continue
+
+                    progressed = True
+                    result.load_sec = time.perf_counter() - started
+                    if not ready_now:
+                        result.error = Exceptions.TimeoutException(f'page not ready in {timeout} sec: {url}')
+                    elif handler:
+                        self.__context_changed__()
+                        try:
+                            result.value = handler(self, url)
+                        except Exception as e:
+                            result.error = e
+                    result.total_sec = time.perf_counter() - started
+                    del active[handle]
+                    navigate(handle)
+                    fill()
+                    yield result
+                    yield from failed
+                    failed.clear()
+
+                if not progressed:
+                    time.sleep(0.05)
+        finally:
+            remaining = self.driver.window_handles
+            for handle in idle + list(active) + dropped:
+                if handle != origin and handle in remaining:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+            if origin in remaining:
+                self.driver.switch_to.window(origin)
+            self.__context_changed__()
+
+    def set_blocked_resources(self, spec=None):
+        # spec: 'no-media', 'text-only', 'no-trackers', {'types': [...], 'patterns': [...]}
+        #       None unblocks everything.
+        # types: image, media, font, stylesheet, script(use_wire only)
+        self.__block_rule = BlockRule.of(spec)
+        self.__apply_blocked_urls__()
+        if self.__use_wire:
+            # selenium-wire sees Sec-Fetch-Dest, so blocks by type regardless of url shape
+            self.__install_interceptors__()
+        info(f'blocked resources: {spec}')
+
+    def set_wire_cache(self, cache:WireCache=None):
+        # record/replay http cache. requires use_wire=True. None detaches.
+        if not self.__use_wire:
+            raise Exception('wire cache requires use_wire=True')
+        self.__wire_cache = cache
+        self.__install_interceptors__()
+        info(f'wire cache: {cache.mode if cache else None}')
+
+    def __install_interceptors__(self):
+        # selenium-wire holds a single interceptor of each kind. chain ours in order:
+        # blocking first, then cache. a request answered by one is not passed on.
+        request_chain = []
+        if self.__block_rule:
+            request_chain.append(self.__block_rule.interceptor())
+        if self.__wire_cache:
+            request_chain.append(self.__wire_cache.request_interceptor)
+
+        if request_chain:
+            def request_interceptor(request):
+                for intercept in request_chain:
+                    intercept(request)
+                    if request.response:
+                        return
+            self.driver.request_interceptor = request_interceptor
+        else:
+            try:
+                del self.driver.request_interceptor
+            except AttributeError:
+                pass
+
+        if self.__wire_cache:
+            self.driver.response_interceptor = self.__wire_cache.response_interceptor
+        else:
+            try:
+                del self.driver.response_interceptor
+            except AttributeError:
+                pass
+
+    def __apply_blocked_urls__(self):
+        urls = self.__block_rule.url_patterns() if self.__block_rule else []
+        if urls:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': urls})
+
+    def network_log(self, events=tuple(NETWORK_EVENTS), maxlen=1000, callback=None):
+        # events: subset of 'request', 'response', 'finished', 'failed'
+        # kept in a ring buffer of maxlen, or handed to callback instead.
+        if not self.__performance_log:
+            raise Exception('performance log is disabled. create WebDriver with performance_log=True')
+        return NetworkLogReader(self.driver, events, maxlen, callback)
+
+    def download(self, target, timeout=60, copy_to=None, hash_name=None):
+        # target: url, WebElement/Locator to click or callable starting the download.
+        # returns Download(path, size, elapsed_sec, digest) once the file is complete.
+        # copy_to/hash_name('sha256', ...) are done in a single pass over the file.
+        # downloads are told apart by their cdp guid, so this opens the cdp channel if needed.
+        # without set_download_path files land in a temporary directory removed on quit(): use copy_to to keep them.
+        if self.downloads is None:
+            raise Exception('download is disabled.')
+        return self.downloads.download(target, timeout, copy_to, hash_name)
+
+    def capture(self, target=None, out=None, format='jpeg', quality=80, full_page=False, scale=1):
+        # screenshot through Page.captureScreenshot.
+        # target: None(viewport), Locator/css string/WebElement to clip to, or {'x','y','width','height'}
+        #         in page css pixels. element coordinates are taken in the current frame, so capture
+        #         elements from the top document.
+        # out: file path or binary file object written without decoding the whole image at once,
+        #      bytes returned if None. quality applies to jpeg/webp.
+        if format not in ('jpeg', 'png', 'webp'):
+            raise ValueError(f'unsupported capture format: {format}')
+        params = {'format': format, 'captureBeyondViewport': bool(full_page)}
+        if format != 'png':
+            params['quality'] = quality
+
+        if isinstance(target, (Locator, str)):
+            target = self.find_element(target if isinstance(target, Locator) else Locator(css=target))
+        if isinstance(target, WebElement):
+            target = self.driver.execute_script('''
+                const r = arguments[0].getBoundingClientRect();
+                return {x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height};''',
+                target)
+            params['captureBeyondViewport'] = True
+        elif target is None and full_page:
+            target = self.driver.execute_script('''
+                const e = document.documentElement;
+                return {x: 0, y: 0, width: Math.max(e.scrollWidth, document.body ? document.body.scrollWidth : 0),
+                        height: Math.max(e.scrollHeight, document.body ? document.body.scrollHeight : 0)};''')
+        if target is not None:
+            if target['width'] <= 0 or target['height'] <= 0:
+                raise ValueError(f'empty capture area: {target}')
+            params['clip'] = {'x': target['x'], 'y': target['y'], 'width': target['width'],
+                              'height': target['height'], 'scale': scale}
+
+        data = self.__cdp_cmd__('Page.captureScreenshot', params)['data']
+        if out is None:
+            return base64.b64decode(data)
+        write_base64(data, out)
+        return out
+
+    def screencast(self, format='jpeg', quality=60, max_width=None, max_height=None, every_nth_frame=1, max_queue=8):
+        # started Screencast of the current tab. frames are cdp events, so this opens the cdp channel if needed.
+        if self.cdp is None or self.cdp.closed:
+            if self.open_cdp_channel() is None:
+                raise Exception('screencast needs the cdp channel, which could not be opened.')
+        if self.__cdp_target is None:
+            self.__cdp_target = self.driver.current_window_handle
+        return Screencast(self.cdp, self.__cdp_target, format, quality, max_width, max_height,
+                          every_nth_frame, max_queue).start()
+
     def get_current_url(self) -> str:
         return self.driver.current_url
     
     def get_cookies(self, backup_path=None):
+        # for a restorable session of all domains, use SessionStore
         cookies = self.driver.get_cookies()
         if backup_path:
-            if 'time' not in sys.modules:
-                import time
-            if 'json' not in sys.modules:
-                import json
-            if 'Path' not in sys.modules:
-                from pathlib import Path
+            from pathlib import Path
 
             p = Path(backup_path)
             p.mkdir(mode=0o744, parents=True, exist_ok=True)
-            file_name = f'{self.get_current_url()}.{time.strftime("%Y%m%d-%H%M%S", time.localtime())}.json'
+            host = urlsplit(self.get_current_url()).netloc or 'blank'
+            file_name = f'{host}.{time.strftime("%Y%m%d-%H%M%S", time.localtime())}.json'
             with (p/file_name).open('w') as f:
                 json.dump(cookies, f)
-        return self.driver.get_cookies()
+        return cookies
 
     @dispatch(WebElement)
     def mouse_over(self, element):            
@@ -282,15 +997,26 @@ class WebDriver:
 
     @dispatch(cls=str, id=str, xpath=str, name=str, css=str, tag=str, element_idx=int)
     def mouse_over(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, element_idx=0):        
-        elems = self.find_elements(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag)
-        if elems == None or len(elems) == 0 or len(elems) < element_idx:
-            return
-        
-        self.mouse_over(elems[element_idx])
+        with self.__frames_restored__():
+            elems = self.find_elements(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag)
+            if elems == None or len(elems) == 0 or len(elems) < element_idx:
+                return
+
+            self.mouse_over(elems[element_idx])
+
+    @dispatch(Locator, element_idx=int)
+    def mouse_over(self, locator, element_idx=0):
+        with self.__frames_restored__():
+            elems = self.find_elements(locator)
+            if len(elems) <= element_idx:
+                return
+
+            self.mouse_over(elems[element_idx])
     
     @dispatch(WebElement, open_new_tab=bool)
     def click(self, element:WebElement, open_new_tab:bool=False):
-        wnd_cnt = len(self.driver.window_handles)
+        # window count only matters for re-minimizing
+        wnd_cnt = self.tabs.count() if self.minimize else 0
         if open_new_tab:
             # linux/windows: control, mac: command
             cmdkey = Keys.COMMAND if 'darwin' in platform.system().lower() else Keys.COMMAND
@@ -305,16 +1031,70 @@ class WebDriver:
                 element.send_keys(Keys.ENTER)      # sometimes exception happens
 
         # seems that window resize/move/focused when new tab popups up.
-        if self.minimize and wnd_cnt != len(self.driver.window_handles):
+        if self.minimize and wnd_cnt != self.tabs.count():
             self.wnd_min()
 
     @dispatch(cls=str, id=str, xpath=str, name=str, css=str, tag=str, open_new_tab=bool)
     def click(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, open_new_tab=False):
-        elem = self.find_element(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag)
-        if elem == None:
-            return
-        
-        self.click(elem, open_new_tab=open_new_tab)
+        with self.__frames_restored__():
+            elem = self.find_element(cls=cls, id=id, xpath=xpath, name=name, css=css, tag=tag)
+            if elem == None:
+                return
+
+            self.click(elem, open_new_tab=open_new_tab)
+
+    @dispatch(Locator, open_new_tab=bool)
+    def click(self, locator, open_new_tab=False):
+        with self.__frames_restored__():
+            self.click(self.find_element(locator), open_new_tab=open_new_tab)
+
+    @dispatch(Locator)
+    def find_element(self, locator):
+        if locator.kind == 'deep':
+            return self.__deep_find__(locator.value)
+        return self.driver.find_element(locator.by, locator.value)
+
+    @dispatch((ShadowRoot, WebElement), Locator)
+    def find_element(self, scope, locator):
+        if locator.kind == 'deep':
+            return self.__deep_find__(locator.value, scope)
+        return scope.find_element(locator.by, locator.value)
+
+    @dispatch(Locator)
+    def find_elements(self, locator):
+        if locator.kind == 'deep':
+            return self.__deep_find__(locator.value, all=True)
+        return self.driver.find_elements(locator.by, locator.value)
+
+    @dispatch((ShadowRoot, WebElement), Locator)
+    def find_elements(self, scope, locator):
+        if locator.kind == 'deep':
+            return self.__deep_find__(locator.value, scope, True)
+        return scope.find_elements(locator.by, locator.value)
+
+    def __deep_query__(self, path, scope=None, all=False):
+        # whole piercing path in one script per frame. every iframe on the path is entered with
+        # switch_to.frame, since element references are only valid in the frame they were found in.
+        # returns (matches, segments resolved in the innermost frame)
+        segments = [s.strip() for s in path.split(DEEP)]
+        while True:
+            result = self.driver.execute_script(js.DEEP_QUERY, segments, all, scope)
+            if 'frame' not in result:
+                return result['elements'], segments
+            self.__enter_frame__(result['frame'])
+            segments = segments[result['rest']:]
+            scope = None
+
+    def __deep_find__(self, path, scope=None, all=False):
+        # elements behind an iframe on the path can only be used from inside that frame, so the driver
+        # stays in the innermost frame entered (switch_to_frame() returns to the top document).
+        # click()/mouse_over() by locator return to the previous frame themselves.
+        elements, _ = self.__deep_query__(path, scope, all)
+        if all:
+            return elements
+        if len(elements) == 0:
+            raise Exceptions.NoSuchElementException(f'no element for deep locator: {path}')
+        return elements[0]
 
     @dispatch(cls=str, id=str, xpath=str, name=str, css=str, tag=str)
     def find_element(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
@@ -330,6 +1110,8 @@ class WebDriver:
         elif name:
             return self.driver.find_element(By.NAME, name)
         elif css:
+            if DEEP in css:
+                return self.__deep_find__(css, None, False)
             return self.driver.find_element(By.CSS_SELECTOR, css)
         elif tag:
             return self.driver.find_element(By.TAG_NAME, tag)
@@ -350,6 +1132,8 @@ class WebDriver:
         elif name:
             return shadow.find_element(By.NAME, name)
         elif css:
+            if DEEP in css:
+                return self.__deep_find__(css, shadow, False)
             return shadow.find_element(By.CSS_SELECTOR, css)
         elif tag:
             return shadow.find_element(By.TAG_NAME, tag)
@@ -370,6 +1154,8 @@ class WebDriver:
         elif name:
             return element.find_element(By.NAME, name)
         elif css:
+            if DEEP in css:
+                return self.__deep_find__(css, element, False)
             return element.find_element(By.CSS_SELECTOR, css)
         elif tag:
             return element.find_element(By.TAG_NAME, tag)
@@ -390,6 +1176,8 @@ class WebDriver:
         elif name:
             return shadow.find_elements(By.NAME, name)
         elif css:
+            if DEEP in css:
+                return self.__deep_find__(css, shadow, True)
             return shadow.find_elements(By.CSS_SELECTOR, css)
         elif tag:
             return shadow.find_elements(By.TAG_NAME, tag)
@@ -410,6 +1198,8 @@ class WebDriver:
         elif name:
             return element.find_elements(By.NAME, name)
         elif css:
+            if DEEP in css:
+                return self.__deep_find__(css, element, True)
             return element.find_elements(By.CSS_SELECTOR, css)
         elif tag:
             return element.find_elements(By.TAG_NAME, tag)
@@ -430,6 +1220,8 @@ class WebDriver:
         elif name:
             return self.driver.find_elements(By.NAME, name)
         elif css:
+            if DEEP in css:
+                return self.__deep_find__(css, None, True)
             return self.driver.find_elements(By.CSS_SELECTOR, css)
         elif tag:
             return self.driver.find_elements(By.TAG_NAME, tag)
@@ -437,6 +1229,8 @@ class WebDriver:
             return []
 
     def find_children(self, element, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
+        if isinstance(cls, Locator):
+            return self.find_elements(element, cls)
         if not self.__inserted_param_check__(inspect.currentframe(), at_least=2, at_most=2):   # find all
             return element.find_elements(By.XPATH, './/*')
         elif cls:
@@ -448,12 +1242,93 @@ class WebDriver:
         elif name:
             return element.find_elements(By.NAME, name)
         elif css:
+            if DEEP in css:
+                return self.__deep_find__(css, element, True)
             return element.find_elements(By.CSS_SELECTOR, css)
         elif tag:
             return element.find_elements(By.TAG_NAME, tag)
         else:
             return []
 
+    def extract(self, scope=None, cls=None, id=None, xpath=None, name=None, css=None, tag=None, fields=None, as_columns=False):
+        # all rows and fields in a single execute_script instead of .text/.get_attribute() per element.
+        # field spec: 'text', 'text_content', 'html', 'outer_html', 'tag', '@attribute', '.property'
+        #             or (child_css, spec) to read from the first matching child.
+        # scope: WebElement or ShadowRoot, document if None.
+        # locator: keywords, or a Locator as extract(locator, ...) / extract(scope, locator, ...)
+        if isinstance(scope, Locator):
+            scope, cls = None, scope
+        if isinstance(cls, Locator):
+            by, value = cls.condition
+        elif len([x for x in (cls, id, xpath, name, css, tag) if x is not None]) != 1:
+            dbg('extract needs exactly one locator')
+            return {} if as_columns else []
+        else:
+            by, value = self.__get_ec_condition__(cls, id, xpath, name, css, tag)
+        if not fields:
+            fields = {'text': 'text'}
+        for key, spec in fields.items():
+            if not self.__valid_field_spec__(spec):
+                raise ValueError(f'invalid field spec for {key}: {spec!r}')
+
+        # an iframe on a deep path is entered, read from and left again
+        mark = self.__frame_mark__()
+        try:
+            while True:
+                rows = None
+                if scope is None:
+                    ok, rows = self.__cdp_script__(js.EXTRACT, (None, by, value, fields, as_columns))
+                if rows is None:
+                    rows = self.driver.execute_script(js.EXTRACT, scope, by, value, fields, as_columns)
+                if not (isinstance(rows, dict) and '__smm_frame' in rows):
+                    return rows
+                self.__enter_frame__(rows['__smm_frame'])
+                value = DEEP.join([s.strip() for s in value.split(DEEP)][rows['rest']:])
+                scope = None
+        finally:
+            self.__leave_frames__(mark)
+
+    def scroll_collect(self, item, fields=None, key=None, limit=None, until=None, batch_size=50,
+                       settle_ms=1500, round_timeout_sec=10, container=None):
+        # scrolls an infinite feed from inside the page and yields batches (lists of dicts) of newly
+        # rendered items only. stops when the feed stops growing, limit items were yielded or
+        # until(batch) returns True.
+        # item: Locator or css string. fields: same specs as extract(). key: field name to dedupe by,
+        #       whole element html if None. container: scrollable WebElement, document if None.
+        if not isinstance(item, Locator):
+            item = Locator(css=item)
+        if not fields:
+            fields = {'text': 'text'}
+        for name, spec in fields.items():
+            if not self.__valid_field_spec__(spec):
+                raise ValueError(f'invalid field spec for {name}: {spec!r}')
+        if key is not None and key not in fields:
+            raise ValueError(f'key must be one of fields: {key}')
+
+        self.__ensure_script_timeout__(round_timeout_sec + settle_ms / 1000)
+        total = 0
+        try:
+            while True:
+                result = self.driver.execute_async_script(js.SCROLL_COLLECT, item.by, item.value, fields, key,
+                                                          batch_size, settle_ms, round_timeout_sec * 1000, container)
+                rows = result['rows']
+                if limit is not None:
+                    rows = rows[:limit - total]
+                if rows:
+                    total += len(rows)
+                    yield rows
+                if limit is not None and total >= limit:
+                    break
+                if until is not None and until(rows):
+                    break
+                if result['end']:
+                    break
+        finally:
+            try:
+                self.driver.execute_script('if (window.__smm_scroll) window.__smm_scroll.stop();')
+            except Exceptions.WebDriverException:
+                pass
+
     def select(self, element, index=None, text=None, value=None):
         if not self.__inserted_param_check__(inspect.currentframe(), 2, 2):
             err('error param')
@@ -473,6 +1348,10 @@ class WebDriver:
             err('select error: ' + repr(e))
             return False
 
+    def plan(self):
+        # batched form interaction. see InteractionPlan
+        return InteractionPlan(self)
+
     def confirm(self, ok=True):
         alert = self.wait_until_alert_visible()
 
@@ -487,54 +1366,57 @@ class WebDriver:
     def wait_until_alert_visible(self):
         return WebDriverWait(self.driver, self.__wait_timeout).until(EC.alert_is_present())
 
-    def wait_until_element_visible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
-        if not self.__inserted_param_check__(inspect.currentframe()):
+    def wait_until_element_visible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, mode=None):
+        condition = self.__locator_condition__(inspect.currentframe(), cls, id, xpath, name, css, tag)
+        if condition is None:
             return
+        return self.__wait__('visible', condition, mode)
 
-        condition = self.__get_ec_condition__(cls, id, xpath, name, css, tag)
-        return WebDriverWait(self.driver, self.__wait_timeout).until(EC.visibility_of_element_located(condition))
-    
-    def wait_until_element_presence(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
-        if not self.__inserted_param_check__(inspect.currentframe()):
+    def wait_until_element_presence(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, mode=None):
+        condition = self.__locator_condition__(inspect.currentframe(), cls, id, xpath, name, css, tag)
+        if condition is None:
             return
+        return self.__wait__('presence', condition, mode)
 
-        condition = self.__get_ec_condition__(cls, id, xpath, name, css, tag)
-        return WebDriverWait(self.driver, self.__wait_timeout).until(EC.presence_of_element_located(condition))
-    
-    def wait_until_elements_presence(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
-        if not self.__inserted_param_check__(inspect.currentframe()):
+    def wait_until_elements_presence(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, mode=None):
+        condition = self.__locator_condition__(inspect.currentframe(), cls, id, xpath, name, css, tag)
+        if condition is None:
             return
+        return self.__wait__('presence_all', condition, mode)
 
-        condition = self.__get_ec_condition__(cls, id, xpath, name, css, tag)
-        return WebDriverWait(self.driver, self.__wait_timeout).until(EC.presence_of_all_elements_located(condition))
-    
-    def wait_until_elements_visible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
-        if not self.__inserted_param_check__(inspect.currentframe()):
+    def wait_until_elements_visible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, mode=None):
+        condition = self.__locator_condition__(inspect.currentframe(), cls, id, xpath, name, css, tag)
+        if condition is None:
             return
+        return self.__wait__('visible_all', condition, mode)
 
-        condition = self.__get_ec_condition__(cls, id, xpath, name, css, tag)
-        return WebDriverWait(self.driver, self.__wait_timeout).until(EC.visibility_of_all_elements_located(condition))
-
-    def wait_until_element_clickable(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
-        if not self.__inserted_param_check__(inspect.currentframe()):
+    def wait_until_element_clickable(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, mode=None):
+        condition = self.__locator_condition__(inspect.currentframe(), cls, id, xpath, name, css, tag)
+        if condition is None:
             return
+        return self.__wait__('clickable', condition, mode)
 
-        condition = self.__get_ec_condition__(cls, id, xpath, name, css, tag)
-        return WebDriverWait(self.driver, self.__wait_timeout).until(EC.element_to_be_clickable(condition))
+    def wait_until_element_invisible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, mode=None):
+        condition = self.__locator_condition__(inspect.currentframe(), cls, id, xpath, name, css, tag)
+        if condition is None:
+            return
+        return self.__wait__('invisible', condition, mode)
 
-    def wait_until_element_invisible(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None):
-        if not self.__inserted_param_check__(inspect.currentframe()):
+    def wait_until_elements_count(self, count, cls=None, id=None, xpath=None, name=None, css=None, tag=None, mode=None):
+        condition = self.__locator_condition__(inspect.currentframe(), cls, id, xpath, name, css, tag, ignore=('mode', 'count'))
+        if condition is None:
             return
-        
-        condition = self.__get_ec_condition__(cls, id, xpath, name, css, tag)
-        return WebDriverWait(self.driver, self.__wait_timeout).until(EC.invisibility_of_element(condition))
-    
+        return self.__wait__('count', condition, mode, count)
+
     def wait_until_window_number_to_be(self, n):
         return WebDriverWait(self.driver, self.__wait_timeout).until(EC.number_of_windows_to_be(n))
 
 
     def switch_to_window(self, idx=0):
-        self.driver.switch_to.window(self.driver.window_handles[idx])
+        self.driver.switch_to.window(self.tabs.handles()[idx])
+        self.__context_changed__()
+        if self.__block_rule:
+            self.__apply_blocked_urls__()    # blocked urls are per tab
         if self.minimize:
             self.wnd_min()
 
@@ -548,11 +1430,15 @@ class WebDriver:
             self.driver.switch_to.frame(frame)
         else:
             self.driver.switch_to.default_content()
+        self.__context_changed__(in_frame=bool(idx or frame))
 
     def expand_shadow_root(self, element):
         return self.driver.execute_script('return arguments[0].shadowRoot', element)
     
-    def get_all_window_titles(self, driver):
+    def get_all_window_titles(self, driver=None):
+        if driver is None or driver is self.driver:
+            return self.tabs.titles()
+
         main_window = driver.current_window_handle
         all_handles = driver.window_handles
         
@@ -566,6 +1452,74 @@ class WebDriver:
         driver.switch_to.window(main_window)
         return window_titles
     
+    def __wait__(self, kind, condition, mode=None, count=None, timeout=None):
+        mode = mode or self.__wait_mode
+        if timeout is None:
+            timeout = self.__wait_timeout
+        start = time.perf_counter()
+        try:
+            if condition[0] == 'deep':
+                # chromedriver cannot resolve piercing paths, so these always wait in page, inside the
+                # innermost frame of the path. the driver stays there when the wait returns, as after
+                # find_element(); a timeout returns to the frame the wait started in.
+                mode = 'observer'
+                deadline = start + timeout
+                mark = self.__frame_mark__()
+                while True:
+                    try:
+                        _, segments = self.__deep_query__(condition[1])
+                        value = self.__observe__(kind, ('deep', DEEP.join(segments)), count,
+                                                 max(0, deadline - time.perf_counter()))
+                        if value is not None:
+                            return value
+                        # a frame showed up on the path. enter it on the next round
+                    except Exceptions.TimeoutException:
+                        self.__leave_frames__(mark)
+                        raise
+                    except Exceptions.WebDriverException as e:
+                        dbg('observer wait failed, retry: ' + repr(e))
+                        time.sleep(0.05)
+                    self.__leave_frames__(mark)
+                    if time.perf_counter() >= deadline:
+                        raise Exceptions.TimeoutException(f'observer wait timed out: {kind} {condition}')
+
+            if mode == 'observer':
+                try:
+                    return self.__observe__(kind, condition, count, timeout)
+                except Exceptions.TimeoutException:
+                    raise
+                except Exceptions.WebDriverException as e:
+                    # page navigated away or script blocked. continue with polling for the rest of timeout.
+                    dbg('observer wait failed, fallback to polling: ' + repr(e))
+                    timeout = max(0, timeout - (time.perf_counter() - start))
+
+            if kind == 'count':
+                ec = lambda d: (lambda elems: elems if len(elems) >= count else False)(d.find_elements(*condition))
+            else:
+                ec = POLL_CONDITIONS[kind](condition)
+            return WebDriverWait(self.driver, timeout).until(ec)
+        finally:
+            self.last_wait_sec = time.perf_counter() - start
+            dbg(f'wait {kind} {condition}: {self.last_wait_sec:.3f}s ({mode})')
+
+    def __observe__(self, kind, condition, count, timeout):
+        by, value = condition
+        ok, result = self.__cdp_script__(js.OBSERVE_WAIT, (by, value, kind, count, int(timeout * 1000)), True, timeout + 5)
+        if not ok:
+            self.__ensure_script_timeout__(timeout)
+            result = self.driver.execute_async_script(js.OBSERVE_WAIT, by, value, kind, count, int(timeout * 1000))
+        if result is None or result.get('timeout'):
+            raise Exceptions.TimeoutException(f'observer wait timed out: {kind} {condition}')
+        return None if result.get('frame') else result['value']     # None: deep path reached a frame
+
+    def __locator_condition__(self, inspect_frame, cls, id, xpath, name, css, tag, ignore=('mode',)):
+        # Locator passed in place of cls skips the frame inspection
+        if isinstance(cls, Locator):
+            return cls.condition
+        if not self.__inserted_param_check__(inspect_frame, ignore=ignore):
+            return None
+        return self.__get_ec_condition__(cls, id, xpath, name, css, tag)
+
     def __get_ec_condition__(self, cls, id, xpath, name, css, tag):
         condition = None
         if cls:
@@ -577,17 +1531,24 @@ class WebDriver:
         elif name:
             condition = (By.NAME, name)
         elif css:
-            condition = (By.CSS_SELECTOR, css)
+            condition = ('deep', css) if DEEP in css else (By.CSS_SELECTOR, css)
         elif tag:
             condition = (By.TAG_NAME, tag)
         return condition
 
-    def __get_param_list__(self, inspect_frame):
+    def __valid_field_spec__(self, spec):
+        if isinstance(spec, (tuple, list)):
+            return len(spec) == 2 and isinstance(spec[0], str) and self.__valid_field_spec__(spec[1])
+        if not isinstance(spec, str) or len(spec) == 0:
+            return False
+        return spec in ('text', 'text_content', 'html', 'outer_html', 'tag') or (spec[0] in '@.' and len(spec) > 1)
+
+    def __get_param_list__(self, inspect_frame, ignore=()):
         arg_info = inspect.getargvalues(inspect_frame)
-        return [ arg_info[3][key] for key in arg_info[0][1:] ]
+        return [ arg_info[3][key] for key in arg_info[0][1:] if key not in ignore ]
     
-    def __inserted_param_check__(self, inspect_frame, at_least=1, at_most=1):
-        params = self.__get_param_list__(inspect_frame)
+    def __inserted_param_check__(self, inspect_frame, at_least=1, at_most=1, ignore=()):
+        params = self.__get_param_list__(inspect_frame, ignore)
         # params.count(None) does not work for ShadowRoot. 
         # count() seems == for check equality.
         # But ShadowRoot does not support None check using ==, supports 'is'/'is not' only. 
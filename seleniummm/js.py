@@ -0,0 +1,405 @@
+# javascript snippets injected through execute_script / execute_async_script.
+# locator 'by' values are the selenium By strings ('class name', 'css selector', ...)
+
+# 'deep' locator: css segments joined by '>>>'. each step descends into the shadow root of every match.
+# an iframe on the path stops the walk with {frame, rest}: chromedriver element references belong to
+# the frame they were found in, so the caller switches into the frame and continues with the remaining
+# segments. with intoFrames (scripts that only read values) same-origin iframes are searched in place.
+DEEP = '''
+function __smm_deep(scope, segments, all, intoFrames) {
+    let roots = [scope];
+    for (let i = 0; i < segments.length; i++) {
+        const found = [];
+        for (const root of roots) found.push(...root.querySelectorAll(segments[i]));
+        if (i === segments.length - 1) return {elements: all ? found : found.slice(0, 1)};
+        roots = [];
+        for (const el of found) {
+            if (el.shadowRoot) {
+                roots.push(el.shadowRoot);
+            } else if (el.tagName === 'IFRAME' || el.tagName === 'FRAME') {
+                let doc = null;
+                if (intoFrames) try { doc = el.contentDocument; } catch (e) {}
+                if (!doc) return {frame: el, rest: i + 1};
+                roots.push(doc);
+            }
+        }
+    }
+    return {elements: []};
+}
+'''
+
+# __smm_locate: {elements} or, for a deep path reaching a frame, {frame, rest}
+LOCATE_ALL = DEEP + '''
+function __smm_locate(scope, by, value, intoFrames) {
+    scope = scope || document;
+    if (by === 'deep') {
+        return __smm_deep(scope, value.split('>>>').map(s => s.trim()), true, intoFrames);
+    }
+    if (by === 'xpath') {
+        const doc = scope.ownerDocument || scope;
+        const snap = doc.evaluate(value, scope, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const out = [];
+        for (let i = 0; i < snap.snapshotLength; i++) out.push(snap.snapshotItem(i));
+        return {elements: out};
+    }
+    let sel = value;
+    if (by === 'class name') sel = '.' + CSS.escape(value);
+    else if (by === 'id') sel = '[id="' + CSS.escape(value) + '"]';
+    else if (by === 'name') sel = '[name="' + CSS.escape(value) + '"]';
+    return {elements: Array.from(scope.querySelectorAll(sel))};
+}
+function __smm_locate_all(scope, by, value, intoFrames) {
+    return __smm_locate(scope, by, value, intoFrames).elements || [];
+}
+'''
+
+READ_FIELD = '''
+function __smm_read_field(el, spec) {
+    if (Array.isArray(spec)) {
+        const child = el.querySelector(spec[0]);
+        return child ? __smm_read_field(child, spec[1]) : null;
+    }
+    if (spec === 'text') return el.innerText !== undefined ? el.innerText : el.textContent;
+    if (spec === 'text_content') return el.textContent;
+    if (spec === 'html') return el.innerHTML;
+    if (spec === 'outer_html') return el.outerHTML;
+    if (spec === 'tag') return el.tagName.toLowerCase();
+    if (spec[0] === '@') return el.getAttribute(spec.slice(1));
+    if (spec[0] === '.') {
+        const v = el[spec.slice(1)];
+        if (v === null || v === undefined) return null;
+        return (typeof v === 'object') ? String(v) : v;
+    }
+    throw new Error('unknown field spec: ' + spec);
+}
+'''
+
+DEEP_QUERY = DEEP + '''
+const [segments, all, scope] = arguments;
+return __smm_deep(scope || document, segments, all, false);
+'''
+
+EXTRACT = LOCATE_ALL + READ_FIELD + '''
+const [scope, by, value, fields, columns] = arguments;
+const found = __smm_locate(scope, by, value, false);
+if (found.frame) return {__smm_frame: found.frame, rest: found.rest};
+const elems = found.elements;
+const names = Object.keys(fields);
+if (columns) {
+    const out = {};
+    for (const n of names) out[n] = elems.map(e => __smm_read_field(e, fields[n]));
+    return out;
+}
+return elems.map(e => {
+    const row = {};
+    for (const n of names) row[n] = __smm_read_field(e, fields[n]);
+    return row;
+});
+'''
+
+IS_VISIBLE = '''
+function __smm_visible(el) {
+    if (el.checkVisibility) return el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true});
+    const style = window.getComputedStyle(el);
+    return el.getClientRects().length > 0 && style.visibility !== 'hidden' && style.opacity !== '0';
+}
+'''
+
+# resolves with {value: ...} when the condition holds, {timeout: true} otherwise.
+# re-checks on every dom mutation. a slow in-page tick covers css transitions and
+# layout-only changes that produce no mutation record.
+OBSERVE_WAIT = LOCATE_ALL + IS_VISIBLE + '''
+const [by, value, kind, count, timeoutMs, done] = arguments;
+function check() {
+    const found = __smm_locate(document, by, value, false);
+    if (found.frame) return {frame: true};     // the caller enters the frame and waits there
+    const els = found.elements;
+    const first = els[0];
+    switch (kind) {
+        case 'presence': return first ? {value: first} : null;
+        case 'presence_all': return els.length ? {value: els} : null;
+        case 'visible': return (first && __smm_visible(first)) ? {value: first} : null;
+        case 'visible_all': return (els.length && els.every(__smm_visible)) ? {value: els} : null;
+        case 'clickable': return (first && __smm_visible(first) && !first.disabled) ? {value: first} : null;
+        case 'invisible': return (!first || !__smm_visible(first)) ? {value: true} : null;
+        case 'count': return els.length >= count ? {value: els} : null;
+    }
+    throw new Error('unknown wait kind: ' + kind);
+}
+const initial = check();
+if (initial) { done(initial); return; }
+
+let finished = false;
+let observer, tick, timer;
+function finish(result) {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearInterval(tick);
+    clearTimeout(timer);
+    done(result);
+}
+function recheck() {
+    const result = check();
+    if (result) finish(result);
+}
+observer = new MutationObserver(recheck);
+observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+tick = setInterval(recheck, 250);
+timer = setTimeout(() => finish({timeout: true}), timeoutMs);
+'''
+
+# marks the current document before a navigation, so a readiness check can tell the old document
+# from the committed one. a fragment-only navigation keeps the document and is not marked.
+NAV_MARK = '''
+const [url, token] = arguments;
+const target = new URL(url, location.href);
+const marked = !(target.hash !== '' && target.href.split('#')[0] === location.href.split('#')[0]);
+if (marked) document.__smm_nav = token;
+'''
+
+COMMITTED = 'return document.__smm_nav !== arguments[0];'
+
+# prefix of a readiness check taking the navigation token as first argument
+NAV_GUARD = 'if (arguments[0] !== null && document.__smm_nav === arguments[0]) return false;\n'
+
+# readiness for get(url, ready=...). resolves with {value: ...} or {timeout: true}.
+# network_idle: no resource timing entry for arg ms once the document is parsed.
+READY_WAIT = '''
+const [kind, arg, navToken, timeoutMs, done] = arguments;
+let check, observer = null;
+if (kind === 'predicate') {
+    const fn = new Function('return (' + arg + ');');
+    check = () => {
+        try {
+            const v = fn();
+            return v ? {value: v} : null;
+        } catch (e) {
+            return null;
+        }
+    };
+} else if (kind === 'network_idle') {
+    let last = performance.now();
+    observer = new PerformanceObserver(() => { last = performance.now(); });
+    observer.observe({type: 'resource', buffered: false});
+    check = () => (document.readyState !== 'loading' && performance.now() - last >= arg) ? {value: true} : null;
+} else {
+    throw new Error('unknown ready kind: ' + kind);
+}
+function guarded() {
+    // still on the document the navigation started from, or the blank one preceding it
+    if (navToken !== null && document.__smm_nav === navToken) return null;
+    return location.href === 'about:blank' ? null : check();
+}
+const initial = kind === 'predicate' ? guarded() : null;
+if (initial) { done(initial); return; }
+
+let tick, timer;
+function finish(result) {
+    clearInterval(tick);
+    clearTimeout(timer);
+    if (observer) observer.disconnect();
+    done(result);
+}
+tick = setInterval(() => {
+    const result = guarded();
+    if (result) finish(result);
+}, 50);
+timer = setTimeout(() => finish({timeout: true}), timeoutMs);
+'''
+
+STORAGE_MARKER = '__smm_restored'
+
+# {origin, local: {...}, session: {...}} of the current document. restore markers are left out.
+STORAGE_SNAPSHOT = '''
+function dump(storage) {
+    const out = {};
+    for (let i = 0; i < storage.length; i++) {
+        const k = storage.key(i);
+        if (k !== '%(marker)s') out[k] = storage.getItem(k);
+    }
+    return out;
+}
+try {
+    return {origin: location.origin, local: dump(localStorage), session: dump(sessionStorage)};
+} catch (e) {
+    return null;    // opaque origin
+}
+''' % {'marker': STORAGE_MARKER}
+
+# registered with Page.addScriptToEvaluateOnNewDocument. seeds storage once per restore token,
+# so values the site changes afterwards are not overwritten on the next navigation.
+STORAGE_SEED = '''
+(function (data, token) {
+    const entry = data[location.origin];
+    if (!entry) return;
+    try {
+        for (const [storage, items] of [[localStorage, entry.local], [sessionStorage, entry.session]]) {
+            if (!items || storage.getItem('%(marker)s') === token) continue;
+            for (const [k, v] of Object.entries(items)) storage.setItem(k, v);
+            storage.setItem('%(marker)s', token);
+        }
+    } catch (e) {}
+})(__DATA__, __TOKEN__);
+''' % {'marker': STORAGE_MARKER}
+
+# one round of WebDriver.scroll_collect(). state survives between rounds in window.__smm_scroll.
+# items are registered with an IntersectionObserver as the MutationObserver sees them rendered,
+# and read when they enter the viewport (also catches recycled nodes of virtualized lists).
+# scrolls one viewport at a time so virtualized lists render every row.
+SCROLL_COLLECT = LOCATE_ALL + READ_FIELD + '''
+const [by, value, fields, keyField, batchSize, settleMs, maxMs, container, done] = arguments;
+const sig = JSON.stringify([by, value, keyField, Object.keys(fields)]);
+let st = window.__smm_scroll;
+if (!st || st.sig !== sig) {
+    if (st) st.stop();
+    st = window.__smm_scroll = {sig: sig, seen: new Set(), pending: [], observed: new WeakSet(), lastChange: performance.now()};
+    st.read = (el) => {
+        const row = {};
+        for (const n of Object.keys(fields)) row[n] = __smm_read_field(el, fields[n]);
+        const key = keyField ? row[keyField] : el.outerHTML;
+        if (key === null || key === undefined || st.seen.has(key)) return;
+        st.seen.add(key);
+        st.pending.push(row);
+    };
+    st.io = new IntersectionObserver((entries) => {
+        for (const e of entries) if (e.isIntersecting) st.read(e.target);
+    }, {root: container || null});
+    st.register = () => {
+        for (const el of __smm_locate_all(container || document, by, value, true)) {
+            if (st.observed.has(el)) continue;
+            st.observed.add(el);
+            st.io.observe(el);
+        }
+    };
+    st.mo = new MutationObserver(() => { st.lastChange = performance.now(); st.register(); });
+    st.mo.observe(container || document.body, {subtree: true, childList: true, characterData: true});
+    st.stop = () => { st.io.disconnect(); st.mo.disconnect(); delete window.__smm_scroll; };
+}
+st.register();
+
+const scroller = container || document.scrollingElement || document.documentElement;
+const started = performance.now();
+let height = scroller.scrollHeight;
+function atBottom() {
+    return scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 2;
+}
+function finish(end) {
+    done({rows: st.pending.splice(0), end: end, height: scroller.scrollHeight});
+}
+function step() {
+    const now = performance.now();
+    if (scroller.scrollHeight !== height) {
+        height = scroller.scrollHeight;
+        st.lastChange = now;
+    }
+    if (st.pending.length >= batchSize) return finish(false);
+    if (atBottom()) {
+        if (now - st.lastChange >= settleMs) return finish(st.pending.length === 0);
+    } else {
+        scroller.scrollTop += Math.max(1, Math.floor(scroller.clientHeight * 0.9));
+    }
+    if (now - started >= maxMs) return finish(false);
+    setTimeout(step, 80);
+}
+step();
+'''
+
+# runs InteractionPlan steps in order, stops at the first failing step.
+# values are set through the prototype setter so framework-controlled inputs (react etc.) see them.
+# progress is stored after every step, in sessionStorage as well so that it survives a same-origin
+# navigation. read with PLAN_PROGRESS when the script is cut off (navigation, alert).
+RUN_PLAN = LOCATE_ALL + '''
+const [steps, token] = arguments;
+function fire(el, type) { el.dispatchEvent(new Event(type, {bubbles: true})); }
+function progress(done) {
+    window.__smm_plan = JSON.stringify({token: token, done: done});
+    try { sessionStorage.setItem('__smm_plan', window.__smm_plan); } catch (e) {}
+}
+const results = [];
+progress(0);
+for (let i = 0; i < steps.length; i++) {
+    const s = steps[i];
+    try {
+        const el = __smm_locate_all(document, s.by, s.value, true)[0];
+        if (!el) throw new Error('element not found: ' + s.value);
+        switch (s.action) {
+            case 'fill': {
+                el.focus();
+                const desc = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(el), 'value');
+                if (desc && desc.set) desc.set.call(el, s.arg); else el.value = s.arg;
+                fire(el, 'input');
+                fire(el, 'change');
+                break;
+            }
+            case 'select': {
+                const options = Array.from(el.options);
+                let idx = -1;
+                if (s.arg.index !== null) idx = s.arg.index;
+                else if (s.arg.text !== null) idx = options.findIndex(o => o.text.trim() === s.arg.text);
+                else idx = options.findIndex(o => o.value === s.arg.value);
+                if (idx < 0 || idx >= options.length) throw new Error('option not found');
+                el.selectedIndex = idx;
+                fire(el, 'input');
+                fire(el, 'change');
+                break;
+            }
+            case 'check':
+                if (el.checked !== s.arg) el.click();
+                break;
+            case 'click':
+                el.click();
+                break;
+            default:
+                throw new Error('unknown action: ' + s.action);
+        }
+        results.push({ok: true});
+        progress(i + 1);
+    } catch (e) {
+        results.push({ok: false, error: String(e)});
+        break;
+    }
+}
+delete window.__smm_plan;
+try { sessionStorage.removeItem('__smm_plan'); } catch (e) {}
+return results;
+'''
+
+# {token, done} left by an interrupted RUN_PLAN of token, null if there is none
+PLAN_PROGRESS = '''
+let state = window.__smm_plan;
+try {
+    state = state || sessionStorage.getItem('__smm_plan');
+    sessionStorage.removeItem('__smm_plan');
+} catch (e) {}
+delete window.__smm_plan;
+if (!state) return null;
+state = JSON.parse(state);
+return state.token === arguments[0] ? state : null;
+'''
+
+# execute_script / execute_async_script body run through Runtime.evaluate on the cdp channel.
+# CDP_CALL_BEGIN + body + CDP_CALL_END, followed by the json encoded arguments array and ', <async>)'.
+# results holding DOM nodes cannot travel by value: they are parked in window.__smm_ret and
+# read once through chromedriver with UNSTASH.
+CDP_CALL_BEGIN = '''((__smm_fn, __smm_args, __smm_async) => {
+function __smm_has_node(v, depth) {
+    if (v instanceof Node) return true;
+    if (!v || typeof v !== 'object' || v === window || depth > 2) return false;
+    return Object.values(v).some(x => __smm_has_node(x, depth + 1));
+}
+return new Promise((done, fail) => {
+    try {
+        if (__smm_async) __smm_fn.apply(null, __smm_args.concat([done]));
+        else done(__smm_fn.apply(null, __smm_args));
+    } catch (e) { fail(e); }
+}).then(r => {
+    if (__smm_has_node(r, 0)) { window.__smm_ret = r; return {stashed: true}; }
+    return {value: r === undefined ? null : r};
+});
+})(function() {
+'''
+CDP_CALL_END = '''
+}, '''
+
+UNSTASH = 'const r = window.__smm_ret; delete window.__smm_ret; return r;'
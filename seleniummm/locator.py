@@ -0,0 +1,72 @@
+from selenium.webdriver.common.by import By
+
+KIND_TO_BY = {
+    'cls': By.CLASS_NAME,
+    'id': By.ID,
+    'xpath': By.XPATH,
+    'name': By.NAME,
+    'css': By.CSS_SELECTOR,
+    'tag': By.TAG_NAME,
+    'deep': 'deep',     # resolved by seleniummm in page script, not by chromedriver
+}
+
+# piercing separator: 'host >>> inner-host >>> target'. iframes on the path are entered too.
+DEEP = '>>>'
+
+
+class Locator:
+    # immutable, validated once. pass it where cls/id/xpath/name/css/tag keywords are accepted
+    # to skip the per-call parameter inspection and by-dispatch.
+    __slots__ = ('kind', 'by', 'value', 'condition', '__hash')
+
+    def __init__(self, cls=None, id=None, xpath=None, name=None, css=None, tag=None, deep=None):
+        given = [(kind, value) for kind, value in
+                 (('cls', cls), ('id', id), ('xpath', xpath), ('name', name), ('css', css), ('tag', tag),
+                  ('deep', deep))
+                 if value is not None]
+        if len(given) != 1:
+            raise ValueError(f'exactly one locator keyword required, got {len(given)}')
+
+        kind, value = given[0]
+        if not isinstance(value, str) or len(value) == 0:
+            raise ValueError(f'locator value must be a non-empty string: {kind}={value!r}')
+        if kind == 'css' and DEEP in value:
+            kind = 'deep'
+        if kind == 'deep' and any(len(s.strip()) == 0 for s in value.split(DEEP)):
+            raise ValueError(f'empty segment in deep locator: {value!r}')
+
+        by = KIND_TO_BY[kind]
+        object.__setattr__(self, 'kind', kind)
+        object.__setattr__(self, 'by', by)
+        object.__setattr__(self, 'value', value)
+        object.__setattr__(self, 'condition', (by, value))
+        object.__setattr__(self, '_Locator__hash', hash((by, value)))
+
+    def __setattr__(self, key, value):
+        raise AttributeError('Locator is immutable')
+
+    def __delattr__(self, key):
+        raise AttributeError('Locator is immutable')
+
+    def __iter__(self):
+        # allows driver.find_element(*locator) and use as an expected_conditions locator
+        return iter(self.condition)
+
+    def __eq__(self, other):
+        if not isinstance(other, Locator):
+            return NotImplemented
+        return self.condition == other.condition
+
+    def __hash__(self):
+        return self.__hash
+
+    def __repr__(self):
+        return f'Locator({self.kind}={self.value!r})'
+
+    def __reduce__(self):
+        # picklable for worker processes
+        return (_rebuild, (self.kind, self.value))
+
+
+def _rebuild(kind, value):
+    return Locator(**{kind: value})
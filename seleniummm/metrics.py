@@ -0,0 +1,160 @@
+import json
+import math
+import threading
+import time
+import weakref
+
+from selenium.common.exceptions import TimeoutException
+
+from .locator import Locator, DEEP
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, math.inf)
+
+LOCATOR_KINDS = ('cls', 'id', 'xpath', 'name', 'css', 'tag')
+
+# WebDriver methods wrapped while metrics are enabled
+COMMANDS = ('get', 'find_element', 'find_elements', 'click', 'mouse_over', 'select', 'script', 'extract',
+            'wait_until_alert_visible', 'wait_until_element_visible', 'wait_until_element_presence',
+            'wait_until_elements_presence', 'wait_until_elements_visible', 'wait_until_element_clickable',
+            'wait_until_element_invisible', 'wait_until_elements_count', 'wait_until_window_number_to_be')
+
+# set while an instrumented call runs on this thread. only the outermost call is recorded,
+# so click(locator) is not counted again as the find_element it makes.
+_nesting = threading.local()
+
+
+class Histogram:
+    __slots__ = ('count', 'total', 'buckets', 'errors', 'timeouts')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.errors = 0
+        self.timeouts = 0
+
+    def add(self, seconds, outcome):
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        if outcome == 'error':
+            self.errors += 1
+        elif outcome == 'timeout':
+            self.timeouts += 1
+
+
+class MetricsSink:
+    # receives one record per instrumented command
+    def record(self, command, seconds, outcome, locator, flavor):
+        raise NotImplementedError
+
+
+class MemorySink(MetricsSink):
+    # histograms is guarded by _lock, which subclasses hold while reading it
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms = {}    # (command, locator, flavor) -> Histogram
+
+    def record(self, command, seconds, outcome, locator, flavor):
+        key = (command, locator, flavor)
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = Histogram()
+            h.add(seconds, outcome)
+
+    def summary(self):
+        with self._lock:
+            return [{'command': c, 'locator': l, 'flavor': f, 'count': h.count,
+                     'mean_sec': h.total / h.count if h.count else 0.0,
+                     'error_rate': h.errors / h.count if h.count else 0.0,
+                     'timeout_rate': h.timeouts / h.count if h.count else 0.0}
+                    for (c, l, f), h in sorted(self.histograms.items())]
+
+
+class JsonLinesSink(MetricsSink):
+    def __init__(self, path):
+        self.__lock = threading.Lock()
+        self.__file = open(path, 'a', buffering=1)
+
+    def record(self, command, seconds, outcome, locator, flavor):
+        line = json.dumps({'ts': time.time(), 'command': command, 'sec': seconds, 'outcome': outcome,
+                           'locator': locator, 'flavor': flavor})
+        with self.__lock:
+            self.__file.write(line + '\n')
+
+    def close(self):
+        self.__file.close()
+
+
+class PrometheusSink(MemorySink):
+    # text exposition format. serve render() from an http handler or write it to a textfile collector.
+    def render(self, prefix='seleniummm'):
+        lines = [f'# TYPE {prefix}_command_seconds histogram',
+                 f'# TYPE {prefix}_command_errors_total counter',
+                 f'# TYPE {prefix}_command_timeouts_total counter']
+        with self._lock:
+            for (command, locator, flavor), h in sorted(self.histograms.items()):
+                labels = f'command="{command}",locator="{locator}",flavor="{flavor}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS, h.buckets):
+                    cumulative += n
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'{prefix}_command_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'{prefix}_command_seconds_sum{{{labels}}} {h.total}')
+                lines.append(f'{prefix}_command_seconds_count{{{labels}}} {h.count}')
+                lines.append(f'{prefix}_command_errors_total{{{labels}}} {h.errors}')
+                lines.append(f'{prefix}_command_timeouts_total{{{labels}}} {h.timeouts}')
+        return '\n'.join(lines) + '\n'
+
+
+def locator_kind(args, kwargs):
+    for arg in args:
+        if isinstance(arg, Locator):
+            return arg.kind
+    for kind in LOCATOR_KINDS:
+        if kwargs.get(kind) is not None:
+            # labelled like the equivalent Locator
+            return 'deep' if kind == 'css' and DEEP in kwargs[kind] else kind
+    return ''
+
+
+def timed(obj, name, sink, flavor):
+    # wraps the class attribute, not the bound method, so dispatched methods resolve per call.
+    # weakref keeps the instance collectable while the wrapper is attached to it.
+    ref = weakref.ref(obj)
+    cls = type(obj)
+    original = getattr(cls, name)
+
+    def call(*args, **kwargs):
+        if getattr(_nesting, 'active', False):
+            return original.__get__(ref(), cls)(*args, **kwargs)
+        start = time.perf_counter()
+        outcome = 'ok'
+        _nesting.active = True
+        try:
+            return original.__get__(ref(), cls)(*args, **kwargs)
+        except TimeoutException:
+            outcome = 'timeout'
+            raise
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            _nesting.active = False
+            sink.record(name, time.perf_counter() - start, outcome, locator_kind(args, kwargs), flavor)
+    call.__name__ = name
+    return call
+
+
+def instrument(obj, sink, flavor, commands=COMMANDS):
+    for name in commands:
+        setattr(obj, name, timed(obj, name, sink, flavor))
+
+
+def uninstrument(obj, commands=COMMANDS):
+    for name in commands:
+        obj.__dict__.pop(name, None)
@@ -0,0 +1,107 @@
+import json
+from collections import deque
+from dataclasses import dataclass, field
+
+
+@dataclass
+class NetworkRequest:
+    request_id: str
+    url: str
+    method: str
+    resource_type: str
+    timestamp: float
+
+
+@dataclass
+class NetworkResponse:
+    request_id: str
+    url: str
+    status: int
+    mime_type: str
+    from_cache: bool
+    timestamp: float
+    timing: dict = field(default_factory=dict)
+
+
+@dataclass
+class NetworkFinished:
+    request_id: str
+    timestamp: float
+    encoded_data_length: int
+
+
+@dataclass
+class NetworkFailed:
+    request_id: str
+    timestamp: float
+    error_text: str
+    canceled: bool
+
+
+def _request(p):
+    return NetworkRequest(p['requestId'], p['request']['url'], p['request']['method'],
+                          p.get('type', ''), p['timestamp'])
+
+
+def _response(p):
+    r = p['response']
+    return NetworkResponse(p['requestId'], r['url'], r['status'], r.get('mimeType', ''),
+                           r.get('fromDiskCache', False) or r.get('fromPrefetchCache', False),
+                           p['timestamp'], r.get('timing') or {})
+
+
+def _finished(p):
+    return NetworkFinished(p['requestId'], p['timestamp'], int(p.get('encodedDataLength', 0)))
+
+
+def _failed(p):
+    return NetworkFailed(p['requestId'], p['timestamp'], p.get('errorText', ''), p.get('canceled', False))
+
+
+# event name: (devtools method, parser)
+EVENTS = {
+    'request': ('Network.requestWillBeSent', _request),
+    'response': ('Network.responseReceived', _response),
+    'finished': ('Network.loadingFinished', _finished),
+    'failed': ('Network.loadingFailed', _failed),
+}
+
+
+class NetworkLogReader:
+    # drains the chromedriver 'performance' log incrementally.
+    # entries whose method is not wanted are dropped before json parsing.
+    def __init__(self, driver, events=tuple(EVENTS), maxlen=1000, callback=None):
+        unknown = [e for e in events if e not in EVENTS]
+        if unknown:
+            raise ValueError(f'unknown network events: {unknown}')
+        self.driver = driver
+        self.callback = callback
+        self.events = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.__wanted = {EVENTS[e][0]: EVENTS[e][1] for e in events}
+        self.__markers = [(f'"method":"{method}"', method) for method in self.__wanted]
+
+    def poll(self):
+        new_events = []
+        for entry in self.driver.get_log('performance'):
+            raw = entry['message']
+            method = next((m for marker, m in self.__markers if marker in raw), None)
+            if method is None:
+                self.dropped += 1
+                continue
+
+            message = json.loads(raw)['message']
+            if message.get('method') != method:     # marker matched inside a payload
+                self.dropped += 1
+                continue
+            new_events.append(self.__wanted[method](message['params']))
+
+        if self.callback:
+            for event in new_events:
+                self.callback(event)
+        else:
+            self.events.extend(new_events)
+        return new_events
+
+    def clear(self):
+        self.events.clear()
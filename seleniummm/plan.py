@@ -0,0 +1,136 @@
+import uuid
+from dataclasses import dataclass
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.support.select import Select
+
+from . import js
+from .locator import Locator
+
+
+@dataclass
+class StepResult:
+    index: int
+    action: str
+    ok: bool
+    error: str = None
+    via: str = 'script'     # 'script' or 'webdriver'
+
+
+class InteractionPlan:
+    # collects form steps and runs them in a single injected script.
+    # steps after the first failing one are retried one by one through webdriver commands, which also
+    # produce trusted input events. hover always goes through webdriver: synthetic events do not trigger
+    # css :hover. a script cut off by navigation or an alert is not retried from the step it was in,
+    # which may already have taken effect (a submit), and not at all when its progress cannot be read.
+    #
+    #   driver.plan().fill('#id', 'me').select('#country', text='Korea').check('#agree').click('#submit').run()
+    def __init__(self, driver):
+        self.__driver = driver
+        self.steps = []
+
+    def __add(self, action, target, arg=None):
+        locator = target if isinstance(target, Locator) else Locator(css=target)
+        self.steps.append((action, locator, arg))
+        return self
+
+    def fill(self, target, text):
+        if not isinstance(text, str):
+            raise ValueError(f'fill text must be a string: {text!r}')
+        return self.__add('fill', target, text)
+
+    def select(self, target, index=None, text=None, value=None):
+        # same choices as WebDriver.select(): exactly one of index/text/value
+        if len([x for x in (index, text, value) if x is not None]) != 1:
+            raise ValueError('select needs exactly one of index, text, value')
+        return self.__add('select', target, {'index': index, 'text': text, 'value': value})
+
+    def check(self, target, checked=True):
+        return self.__add('check', target, bool(checked))
+
+    def hover(self, target):
+        return self.__add('hover', target)
+
+    def click(self, target):
+        return self.__add('click', target)
+
+    def run(self, batch=True, fallback=True):
+        results = []
+        i = 0
+        while i < len(self.steps):
+            action, locator, arg = self.steps[i]
+            if batch and action != 'hover':
+                end = next((j for j in range(i, len(self.steps)) if self.steps[j][0] == 'hover'), len(self.steps))
+                done, failure = self.__run_batch(i, end)
+                results += [StepResult(j, self.steps[j][0], True) for j in range(i, done)]
+                i = done
+                if failure is None:
+                    continue
+                error, replayable = failure
+                if not (fallback and replayable):
+                    results.append(StepResult(i, self.steps[i][0], False, error))
+                    return results
+                batch = False   # the rest one by one
+                continue
+
+            try:
+                self.__run_step(action, locator, arg)
+                results.append(StepResult(i, action, True, via='webdriver'))
+            except Exception as e:
+                results.append(StepResult(i, action, False, repr(e), 'webdriver'))
+                break
+            i += 1
+        return results
+
+    def __run_batch(self, start, end):
+        # steps[start:end] in one script. returns (index of the first step not done, None or (error, replayable))
+        payload = [{'action': a, 'by': l.by, 'value': l.value, 'arg': arg} for a, l, arg in self.steps[start:end]]
+        token = uuid.uuid4().hex
+        try:
+            raw = self.__driver.driver.execute_script(js.RUN_PLAN, payload, token)
+        except WebDriverException as e:
+            progress = self.__progress(token)
+            if progress is None:
+                return start, (f'batch interrupted, progress unknown: {e!r}', False)
+            done = start + progress['done']
+            if done >= end:
+                return end, None
+            return done, (f'batch interrupted: {e!r}', False)
+        for k, r in enumerate(raw):
+            if not r['ok']:
+                return start + k, (r.get('error'), True)
+        return end, None
+
+    def __progress(self, token):
+        try:
+            return self.__driver.driver.execute_script(js.PLAN_PROGRESS, token)
+        except WebDriverException:
+            return None     # alert still open, or the page is gone
+
+    def __run_step(self, action, locator, arg):
+        # a deep locator leaves the driver in the frame of its element. the next step looks up from where
+        # the plan started, like the batch does.
+        with self.__driver.__frames_restored__():
+            self.__run_located(action, locator, arg)
+
+    def __run_located(self, action, locator, arg):
+        driver = self.__driver
+        element = driver.find_element(locator)
+        if action == 'fill':
+            element.clear()
+            element.send_keys(arg)
+        elif action == 'select':
+            s = Select(element)
+            if arg['index'] is not None:
+                s.select_by_index(arg['index'])
+            elif arg['text'] is not None:
+                s.select_by_visible_text(arg['text'])
+            else:
+                s.select_by_value(arg['value'])
+        elif action == 'check':
+            if element.is_selected() != arg:
+                element.click()
+        elif action == 'hover':
+            driver.mouse_over(element)
+        elif action == 'click':
+            driver.click(element)
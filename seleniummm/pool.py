@@ -0,0 +1,138 @@
+import queue
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from .driver import WebDriver, info, dbg, err
+
+# seconds to wait before each retry of a failed background replacement
+REPLACE_RETRY_DELAYS = (1, 5, 15, 30)
+
+
+class WebDriverPool:
+    def __init__(self, size=2, lease_timeout_sec=None, **driver_kwargs):
+        # driver_kwargs are passed to every WebDriver(...) as is.
+        self.size = size
+        self.lease_timeout_sec = lease_timeout_sec
+        self.__driver_kwargs = driver_kwargs
+        self.__idle = queue.Queue()
+        self.__lock = threading.Lock()
+        self.__drivers = []
+        self.__replacing = 0
+        self.__closed = False
+
+        # warm up in parallel. startup time is dominated by chrome launch.
+        workers = [threading.Thread(target=self.__spawn, daemon=True) for _ in range(size)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+        if len(self.__drivers) == 0:
+            raise Exception('driver pool initialization error.')
+        for _ in range(size - len(self.__drivers)):
+            self.__replace_async()
+        info(f'driver pool ready: {len(self.__drivers)}/{size}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def __spawn(self):
+        try:
+            driver = WebDriver(**self.__driver_kwargs)
+        except:
+            err('pool driver init failed: ' + traceback.format_exc())
+            return False
+
+        with self.__lock:
+            if self.__closed:
+                driver.quit()
+                return False
+            self.__drivers.append(driver)
+        self.__idle.put(driver)
+        return True
+
+    def __replace_async(self):
+        with self.__lock:
+            self.__replacing += 1
+        threading.Thread(target=self.__replace, daemon=True).start()
+
+    def __replace(self):
+        # retried, so a transient launch failure does not shrink the pool for good
+        try:
+            for delay in (0,) + REPLACE_RETRY_DELAYS:
+                time.sleep(delay)
+                if self.__closed or self.__spawn():
+                    return
+            err(f'driver replacement failed {len(REPLACE_RETRY_DELAYS) + 1} times. pool shrinks')
+        finally:
+            with self.__lock:
+                self.__replacing -= 1
+
+    def __discard(self, driver):
+        with self.__lock:
+            if driver in self.__drivers:
+                self.__drivers.remove(driver)
+        try:
+            driver.quit()
+        except:
+            dbg('quit of broken driver failed')
+
+    def acquire(self, timeout=None):
+        # waits in short slices, so a pool that lost all its drivers raises instead of blocking forever
+        if self.__closed:
+            raise Exception('driver pool is closed.')
+        if timeout is None:
+            timeout = self.lease_timeout_sec
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.5 if deadline is None else min(0.5, max(0, deadline - time.monotonic()))
+            try:
+                return self.__idle.get(timeout=wait)
+            except queue.Empty:
+                pass
+            if self.__closed:
+                raise Exception('driver pool is closed.')
+            with self.__lock:
+                if not self.__drivers and not self.__replacing:
+                    raise Exception('driver pool has no drivers left. replacements failed.')
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f'no idle driver within {timeout} sec')
+
+    def release(self, driver):
+        if self.__closed:
+            self.__discard(driver)
+            return
+
+        if driver.is_alive() and driver.reset():
+            self.__idle.put(driver)
+        else:
+            err('broken driver returned to pool. replacing in background')
+            self.__discard(driver)
+            self.__replace_async()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def idle_count(self):
+        return self.__idle.qsize()
+
+    def close(self):
+        with self.__lock:
+            self.__closed = True
+            drivers = self.__drivers
+            self.__drivers = []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except:
+                dbg('quit failed while closing pool')
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+
+from tedious import intent_logger
+info, dbg, err, logger = intent_logger.get('seleniummm')
+
+FICLONE = 0x40049409    # linux ioctl, btrfs/xfs/overlay with reflink support
+
+# never cloned: live-instance locks and caches chrome rebuilds on demand
+SKIP_NAMES = {'SingletonLock', 'SingletonSocket', 'SingletonCookie', 'lockfile',
+              'Cache', 'Code Cache', 'GPUCache', 'ShaderCache', 'GrShaderCache', 'Crashpad'}
+
+# directories chrome only reads (unpacked extensions, spellcheck dictionaries). updates land in new
+# version directories instead of rewriting files, so their files may be shared by hardlink.
+READ_ONLY_DIRS = {'Extensions', 'Dictionaries'}
+
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+class ProfileTemplate:
+    # a prepared user-data-dir (logged in, extensions set up...) cloned per WebDriver instance.
+    # link:
+    #   'auto':     reflink (copy-on-write) when the filesystem supports it, plain copy otherwise
+    #   'hardlink': hardlink files of READ_ONLY_DIRS, the rest as 'auto'. chrome writes sqlite/leveldb
+    #               files in place, so sharing those inodes would corrupt the template.
+    #   'copy':     plain copy
+    def __init__(self, root, name='Default', link='auto', clone_dir=None):
+        if link not in ('auto', 'hardlink', 'copy'):
+            raise ValueError(f'unknown link mode: {link}')
+        self.root = os.path.expanduser(root)
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(f'profile template not found: {self.root}')
+        self.name = name
+        self.link = link
+        self.clone_dir = clone_dir
+        self.__reflink_ok = link != 'copy'
+
+    def __copy_file(self, src, dst, read_only=False):
+        if self.link == 'hardlink' and read_only:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                pass    # cross-device. fall through to copy
+        if self.__reflink_ok:
+            try:
+                _reflink(src, dst)
+                return
+            except (ImportError, OSError):
+                dbg('reflink not supported. clone profiles by copy')
+                self.__reflink_ok = False
+        shutil.copy2(src, dst)
+
+    def clone(self):
+        dst_root = tempfile.mkdtemp(prefix='seleniummm-profile-', dir=self.clone_dir)
+        try:
+            for dir_path, dir_names, file_names in os.walk(self.root):
+                dir_names[:] = [d for d in dir_names if d not in SKIP_NAMES]
+                rel = os.path.relpath(dir_path, self.root)
+                target = dst_root if rel == '.' else os.path.join(dst_root, rel)
+                read_only = any(part in READ_ONLY_DIRS for part in rel.split(os.sep))
+                os.makedirs(target, exist_ok=True)
+                for file_name in file_names:
+                    if file_name in SKIP_NAMES:
+                        continue
+                    src = os.path.join(dir_path, file_name)
+                    dst = os.path.join(target, file_name)
+                    if os.path.islink(src):
+                        os.symlink(os.readlink(src), dst)
+                    else:
+                        self.__copy_file(src, dst, read_only)
+        except BaseException:
+            self.discard(dst_root)
+            raise
+        info(f'profile cloned: {self.root} -> {dst_root}')
+        return dst_root
+
+    @staticmethod
+    def discard(path):
+        shutil.rmtree(path, ignore_errors=True)
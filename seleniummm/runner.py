@@ -0,0 +1,215 @@
+import multiprocessing
+import queue
+import signal
+import sys
+import time
+import traceback
+from collections import Counter, deque
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from .driver import WebDriver, info, err
+
+
+@dataclass
+class JobResult:
+    index: int
+    item: object
+    ok: bool
+    value: object = None
+    error: str = None
+    attempts: int = 1
+    elapsed_sec: float = 0.0
+    worker: int = None
+
+
+def default_handler(driver, item):
+    driver.get(item)
+    return driver.driver.title
+
+
+def _host(item):
+    url = item if isinstance(item, str) else item.get('url', '') if isinstance(item, dict) else ''
+    return urlsplit(url).netloc
+
+
+def _worker(worker_id, driver_kwargs, handler, tasks, results):
+    # one WebDriver per process. a dead browser is reported as 'crash' and replaced before the next job.
+    # SIGTERM (the runner's last resort at shutdown) exits through finally, so chrome is not orphaned.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    driver = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            index, item = task
+            start = time.perf_counter()
+            try:
+                if driver is None:
+                    driver = WebDriver(**driver_kwargs)
+                value = handler(driver, item)
+                results.put(('done', index, worker_id, 'ok', value, None, time.perf_counter() - start))
+            except Exception:
+                status = 'error'
+                if driver is None or not driver.is_alive():
+                    status = 'crash'
+                    try:
+                        if driver is not None:
+                            driver.quit()
+                    except Exception:
+                        pass
+                    driver = None
+                results.put(('done', index, worker_id, status, None, traceback.format_exc(), time.perf_counter() - start))
+    finally:
+        if driver is not None:
+            driver.quit()
+
+
+class CrawlRunner:
+    # M worker processes, each owning a WebDriver built from driver_kwargs.
+    # handler(driver, item) must be picklable (module level function). items are urls or dicts with 'url'.
+    # jobs whose browser (or worker process) died are retried on a fresh instance up to retries times.
+    # per_host caps concurrent jobs per url host.
+    # on exit (or when the generator is closed) workers finish their job and quit their browser first.
+    def __init__(self, workers=2, driver_kwargs=None, handler=default_handler, per_host=None, retries=2,
+                 start_method='spawn', shutdown_timeout=60):
+        self.workers = workers
+        self.driver_kwargs = driver_kwargs or {}
+        self.handler = handler
+        self.per_host = per_host
+        self.retries = retries
+        self.shutdown_timeout = shutdown_timeout
+        self.__ctx = multiprocessing.get_context(start_method)
+        self.stats = Counter()
+        self.started_at = None
+
+    def throughput(self):
+        if not self.started_at:
+            return 0.0
+        return self.stats['completed'] / (time.perf_counter() - self.started_at)
+
+    def __spawn(self, worker_id, results):
+        # each process gets its own task queue, so the owner of a job is known as it is handed out.
+        # the queue of a dead worker goes with it.
+        tasks = self.__ctx.Queue()
+        p = self.__ctx.Process(target=_worker, name=f'seleniummm-worker-{worker_id}', daemon=True,
+                               args=(worker_id, self.driver_kwargs, self.handler, tasks, results))
+        p.start()
+        return p, tasks
+
+    @staticmethod
+    def __drain(results, timeout):
+        # every message available now, waiting up to timeout for the first
+        try:
+            messages = [results.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                messages.append(results.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def run(self, items, ordered=False):
+        # generator of JobResult. ordered=True yields in item order, otherwise as completed.
+        results = self.__ctx.Queue()
+        pending = deque([index, item, 0] for index, item in enumerate(items))
+        self.stats['submitted'] += len(pending)
+        busy = {}                   # worker id -> job it runs
+        host_inflight = Counter()
+        buffered = {}
+        next_index = 0
+        workers = {wid: self.__spawn(wid, results) for wid in range(self.workers)}     # wid -> (process, tasks)
+        self.started_at = time.perf_counter()
+
+        def finish(job, worker_id, ok, value, error, elapsed):
+            index, item, attempts = job
+            host_inflight[_host(item)] -= 1
+            self.stats['completed' if ok else 'failed'] += 1
+            return JobResult(index, item, ok, value, error, attempts + 1, elapsed, worker_id)
+
+        def retry_or_fail(job, worker_id, error, elapsed):
+            self.stats['crashed'] += 1
+            if job[2] < self.retries:
+                host_inflight[_host(job[1])] -= 1
+                job[2] += 1
+                self.stats['retried'] += 1
+                pending.appendleft(job)
+                return None
+            return finish(job, worker_id, False, None, error, elapsed)
+
+        try:
+            while pending or busy:
+                # hand out one job per idle worker, respecting per-host limits
+                for _ in range(len(pending)):
+                    idle = [wid for wid in workers if wid not in busy]
+                    if not idle:
+                        break
+                    job = pending.popleft()
+                    host = _host(job[1])
+                    if self.per_host and host_inflight[host] >= self.per_host:
+                        pending.append(job)
+                        continue
+                    host_inflight[host] += 1
+                    busy[idle[0]] = job
+                    workers[idle[0]][1].put((job[0], job[1]))
+
+                # deaths are noted before draining, so what a worker sent before it died is read first
+                dead = [wid for wid, (p, _) in workers.items() if not p.is_alive()]
+                done = []
+                for _, index, worker_id, status, value, error, elapsed in self.__drain(results, 0.5):
+                    job = busy.get(worker_id)
+                    if job is None or job[0] != index:
+                        continue
+                    del busy[worker_id]
+                    if status == 'crash':
+                        err(f'browser crashed on worker {worker_id}: {job[1]}')
+                        r = retry_or_fail(job, worker_id, error, elapsed)
+                    else:
+                        r = finish(job, worker_id, status == 'ok', value, error, elapsed)
+                    if r:
+                        done.append(r)
+
+                # worker process died: respawn and retry what it was running
+                for wid in dead:
+                    p = workers[wid][0]
+                    err(f'worker {wid} died (exit {p.exitcode}). respawning')
+                    self.stats['workers_restarted'] += 1
+                    workers[wid] = self.__spawn(wid, results)
+                    job = busy.pop(wid, None)
+                    if job is not None:
+                        r = retry_or_fail(job, wid, f'worker process exited with {p.exitcode}', 0.0)
+                        if r:
+                            done.append(r)
+
+                for r in done:
+                    if not ordered:
+                        yield r
+                        continue
+                    buffered[r.index] = r
+                    while next_index in buffered:
+                        yield buffered.pop(next_index)
+                        next_index += 1
+        finally:
+            self.__shutdown(workers, results)
+            elapsed = time.perf_counter() - self.started_at
+            info(f'crawl finished: {dict(self.stats)} in {elapsed:.1f}s ({self.throughput():.2f} jobs/s)')
+
+    def __shutdown(self, workers, results):
+        # workers finish their job and quit their browser on the sentinel. results are read meanwhile:
+        # a process with unread queue data does not exit. SIGTERM after shutdown_timeout, see _worker.
+        for p, tasks in workers.values():
+            if p.is_alive():
+                tasks.put(None)
+        deadline = time.perf_counter() + self.shutdown_timeout
+        while any(p.is_alive() for p, _ in workers.values()) and time.perf_counter() < deadline:
+            self.__drain(results, 0.1)
+        for wid, (p, _) in workers.items():
+            if p.is_alive():
+                err(f'worker {wid} did not stop in {self.shutdown_timeout}s. terminating')
+                p.terminate()
+                p.join(timeout=30)
+                if p.is_alive():
+                    p.kill()
+            p.join()
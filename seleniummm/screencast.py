@@ -0,0 +1,119 @@
+import base64
+import binascii
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+# base64 text decoded per write. multiple of 4 so every slice decodes on its own
+DECODE_CHUNK = 4 * 256 * 1024
+
+
+def write_base64(data, out):
+    # decodes slice by slice into out (path or binary file object) instead of holding the whole
+    # decoded image next to the base64 text. returns bytes written.
+    own = isinstance(out, str)
+    f = open(out, 'wb') if own else out
+    written = 0
+    try:
+        for offset in range(0, len(data), DECODE_CHUNK):
+            written += f.write(binascii.a2b_base64(data[offset:offset + DECODE_CHUNK]))
+    finally:
+        if own:
+            f.close()
+    return written
+
+
+@dataclass
+class Frame:
+    index: int
+    data: bytes
+    timestamp: float    # browser time of the frame, seconds
+    metadata: dict = field(default_factory=dict)
+
+
+class Screencast:
+    # Page.startScreencast frames of one tab, delivered over the cdp channel.
+    # frames wait in a queue of max_queue. when the consumer falls behind the oldest frame is dropped,
+    # so it always sees recent pictures and the browser is never held up. every_nth_frame skips frames
+    # in the browser before they are encoded. decoding happens in the consumer, not the reader thread.
+    #
+    #   with driver.screencast(max_width=640, every_nth_frame=2) as cast:
+    #       for frame in cast.frames(timeout=5):
+    #           ...
+    def __init__(self, channel, target_id, format='jpeg', quality=60, max_width=None, max_height=None,
+                 every_nth_frame=1, max_queue=8):
+        if format not in ('jpeg', 'png'):
+            raise ValueError(f'screencast format must be jpeg or png: {format}')
+        self.__channel = channel
+        self.__target_id = target_id
+        self.__params = {'format': format, 'everyNthFrame': every_nth_frame}
+        if format == 'jpeg':
+            self.__params['quality'] = quality
+        if max_width:
+            self.__params['maxWidth'] = max_width
+        if max_height:
+            self.__params['maxHeight'] = max_height
+        self.__queue = deque(maxlen=max_queue)
+        self.__ready = threading.Condition()
+        self.__session = None
+        self.running = False
+        self.received = 0
+        self.dropped = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.stop()
+
+    def start(self):
+        self.__session = self.__channel.attach(self.__target_id)
+        self.__channel.on('Page.screencastFrame', self.__on_frame, self.__session)
+        self.__channel.call('Page.startScreencast', self.__params, self.__session)
+        self.running = True
+        return self
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.__channel.off('Page.screencastFrame', self.__on_frame)
+        try:
+            self.__channel.call('Page.stopScreencast', {}, self.__session)
+        except Exception:
+            pass    # tab or channel already gone
+        with self.__ready:
+            self.__ready.notify_all()
+
+    def __on_frame(self, method, params):
+        # reader thread: ack right away (no reply awaited) and queue the still encoded frame
+        self.__channel.send('Page.screencastFrameAck', {'sessionId': params['sessionId']}, self.__session)
+        with self.__ready:
+            if len(self.__queue) == self.__queue.maxlen:
+                self.dropped += 1
+            self.__queue.append((self.received, params['data'], params.get('metadata', {})))
+            self.received += 1
+            self.__ready.notify()
+
+    def get(self, timeout=None):
+        # next frame, None on timeout or once stopped and drained
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__ready:
+            while not self.__queue:
+                if not self.running or self.__channel.closed:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.__ready.wait(remaining if remaining is not None else 1)
+            index, data, metadata = self.__queue.popleft()
+        return Frame(index, base64.b64decode(data), metadata.get('timestamp', 0.0), metadata)
+
+    def frames(self, timeout=None):
+        # yields frames until stopped, or until none arrives within timeout
+        while True:
+            frame = self.get(timeout)
+            if frame is None:
+                return
+            yield frame
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import uuid
+
+from . import js
+
+# fields accepted by Network.setCookies
+COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires',
+                 'priority', 'sameParty', 'sourceScheme', 'sourcePort', 'partitionKey')
+
+
+def _cookie_key(cookie):
+    return f'{cookie["domain"]}|{cookie["path"]}|{cookie["name"]}'
+
+
+def _settable(cookie):
+    c = {k: cookie[k] for k in COOKIE_FIELDS if k in cookie}
+    if cookie.get('session') or c.get('expires', -1) < 0:
+        c.pop('expires', None)
+    return c
+
+
+class SessionStore:
+    # cookies of every domain plus local/session storage per origin, kept in one sqlite file.
+    # save() writes only rows that changed. restore() sets all cookies with one Network.setCookies
+    # and seeds storage when each origin is next loaded, so no page load per domain is needed.
+    # storage is read from the page, so one save() captures only the origin shown at that time.
+    # rows of other origins are kept: save() on each origin to carry several.
+    def __init__(self, path):
+        import sqlite3
+        path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(path, check_same_thread=False)
+        self.__db.executescript('''
+            CREATE TABLE IF NOT EXISTS cookies (
+                session TEXT, key TEXT, data TEXT, PRIMARY KEY (session, key));
+            CREATE TABLE IF NOT EXISTS storage (
+                session TEXT, origin TEXT, kind TEXT, key TEXT, value TEXT,
+                PRIMARY KEY (session, origin, kind, key));
+        ''')
+        self.__db.commit()
+
+    def __sync(self, table, key_cols, session, scope, current):
+        # current: {key tuple: value}. scope: extra where clause values limiting what may be deleted
+        where = ' AND '.join(f'{c}=?' for c in ('session',) + key_cols[:len(scope)])
+        value_col = 'data' if table == 'cookies' else 'value'
+        rows = self.__db.execute(f'SELECT {", ".join(key_cols)}, {value_col} FROM {table} WHERE {where}',
+                                 (session,) + scope).fetchall()
+        stored = {tuple(r[:-1]): r[-1] for r in rows}
+
+        changed = [(session,) + k + (v,) for k, v in current.items() if stored.get(k) != v]
+        removed = [(session,) + k for k in stored if k not in current]
+        cols = ('session',) + key_cols
+        if changed:
+            self.__db.executemany(f'INSERT OR REPLACE INTO {table} ({", ".join(cols)}, {value_col}) '
+                                  f'VALUES ({", ".join("?" * (len(cols) + 1))})', changed)
+        if removed:
+            self.__db.executemany(f'DELETE FROM {table} WHERE {" AND ".join(f"{c}=?" for c in cols)}', removed)
+        return len(changed), len(removed)
+
+    def save(self, driver, session='default'):
+        # driver: seleniummm.WebDriver. cookies of all domains, storage of the current page's origin only.
+        cookies = driver.driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        current = {(_cookie_key(c),): json.dumps(_settable(c), sort_keys=True) for c in cookies}
+        snapshot = driver.driver.execute_script(js.STORAGE_SNAPSHOT)
+
+        with self.__lock:
+            changed, removed = self.__sync('cookies', ('key',), session, (), current)
+            if snapshot and snapshot['origin'] not in ('null', ''):
+                origin = snapshot['origin']
+                items = {(origin, kind, k): v for kind in ('local', 'session') for k, v in snapshot[kind].items()}
+                c, r = self.__sync('storage', ('origin', 'kind', 'key'), session, (origin,), items)
+                changed += c
+                removed += r
+            self.__db.commit()
+        return {'changed': changed, 'removed': removed}
+
+    def restore(self, driver, session='default'):
+        with self.__lock:
+            cookies = [json.loads(r[0]) for r in
+                       self.__db.execute('SELECT data FROM cookies WHERE session=?', (session,))]
+            storage = self.__db.execute('SELECT origin, kind, key, value FROM storage WHERE session=?',
+                                        (session,)).fetchall()
+
+        if cookies:
+            driver.driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+        if storage:
+            data = {}
+            for origin, kind, key, value in storage:
+                data.setdefault(origin, {'local': {}, 'session': {}})[kind][key] = value
+            source = js.STORAGE_SEED.replace('__DATA__', json.dumps(data)).replace('__TOKEN__', json.dumps(uuid.uuid4().hex))
+            # removed again by driver.reset(), so a pooled driver does not seed the next lease
+            driver.add_init_script(source)
+        return {'cookies': len(cookies), 'origins': len({r[0] for r in storage})}
+
+    def sessions(self):
+        with self.__lock:
+            return sorted({r[0] for r in self.__db.execute('SELECT session FROM cookies UNION SELECT session FROM storage')})
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
@@ -0,0 +1,96 @@
+import threading
+from dataclasses import dataclass
+
+from selenium.common.exceptions import WebDriverException
+
+
+def _is_tab(info):
+    # devtools windows (open_devtools=True) and prerendered pages are page targets as well,
+    # but chromedriver has no window handle for them
+    return (info['type'] == 'page' and not info.get('subtype')
+            and not info.get('url', '').startswith('devtools://'))
+
+
+@dataclass
+class TabInfo:
+    handle: str     # chromedriver window handle == devtools target id
+    title: str = ''
+    url: str = ''
+    opener: str = None
+
+
+class TabRegistry:
+    # local view of the browser's tabs.
+    # live: fed by Target.targetCreated/InfoChanged/Destroyed through on_event(), reads cost nothing.
+    # otherwise handles and count follow window_handles, a session command that keeps working after
+    # the current tab was closed. titles, urls and openers, which window_handles cannot give without
+    # switching into each window, come from a single Target.getTargets. chromedriver sends that
+    # through the current tab, so with the current tab closed the details are the last known ones.
+    def __init__(self, driver):
+        self.__driver = driver
+        self.__lock = threading.Lock()
+        self.__tabs = {}    # insertion order is creation order, so handles()[-1] is the newest tab
+        self.live = False
+
+    def __sync(self, handles):
+        # closed tabs leave, new ones are added in chromedriver's handle order
+        with self.__lock:
+            for handle in list(self.__tabs):
+                if handle not in handles:
+                    del self.__tabs[handle]
+            for handle in handles:
+                if handle not in self.__tabs:
+                    self.__tabs[handle] = TabInfo(handle)
+
+    def refresh(self):
+        self.__sync(self.__driver.window_handles)
+        try:
+            infos = self.__driver.execute_cdp_cmd('Target.getTargets', {})['targetInfos']
+        except WebDriverException:
+            return
+        with self.__lock:
+            for i in infos:
+                if i['targetId'] in self.__tabs:
+                    self.__update(i['targetId'], i)
+
+    def __update(self, target_id, info):
+        tab = self.__tabs.get(target_id)
+        if tab is None:
+            tab = self.__tabs[target_id] = TabInfo(target_id)
+        tab.title = info.get('title', '')
+        tab.url = info.get('url', '')
+        tab.opener = info.get('openerId')
+
+    def on_event(self, method, params):
+        info = params.get('targetInfo')
+        with self.__lock:
+            if method in ('Target.targetCreated', 'Target.targetInfoChanged'):
+                if _is_tab(info):
+                    self.__update(info['targetId'], info)
+            elif method == 'Target.targetDestroyed':
+                self.__tabs.pop(params['targetId'], None)
+
+    def tabs(self):
+        if not self.live:
+            self.refresh()
+        with self.__lock:
+            return list(self.__tabs.values())
+
+    def handles(self):
+        if not self.live:
+            self.__sync(self.__driver.window_handles)
+        with self.__lock:
+            return list(self.__tabs)
+
+    def titles(self):
+        return [t.title for t in self.tabs()]
+
+    def count(self):
+        return len(self.handles())
+
+    def opened_by(self, handle):
+        return [t for t in self.tabs() if t.opener == handle]
+
+    def forget(self, handle):
+        with self.__lock:
+            self.__tabs.pop(handle, None)
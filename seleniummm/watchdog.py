@@ -0,0 +1,152 @@
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from tedious import intent_logger
+info, dbg, err, logger = intent_logger.get('seleniummm')
+
+MB = 1024 * 1024
+
+
+@dataclass
+class WatchdogEvent:
+    kind: str           # 'sample', 'recycle_tab', 'restart'
+    reason: str = ''
+    navigations: int = 0
+    metrics: dict = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+
+def _process_tree_rss(root_pid):
+    # linux /proc only. sum of rss of root_pid and all of its descendants, in bytes
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    page = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page
+        except OSError:
+            pass
+        stack.extend(children.get(pid, ()))
+    return total
+
+
+class MemoryWatchdog:
+    # checked by WebDriver.get() before each navigation.
+    #   recycle_every: replace the tab with a fresh one every N navigations
+    #   sample_every: sample memory every N navigations. over a max_* threshold recycles the tab,
+    #                 over restart_rss_mb restarts the browser keeping cookies/storage (WebDriver.restart)
+    # samples use Performance.getMetrics (js heap, dom nodes) and /proc for the browser process tree rss.
+    def __init__(self, sample_every=5, recycle_every=None, max_js_heap_mb=None, max_dom_nodes=None,
+                 max_rss_mb=None, restart_rss_mb=None, on_event=None, history=100):
+        self.sample_every = sample_every
+        self.recycle_every = recycle_every
+        self.max_js_heap_mb = max_js_heap_mb
+        self.max_dom_nodes = max_dom_nodes
+        self.max_rss_mb = max_rss_mb
+        self.restart_rss_mb = restart_rss_mb
+        self.on_event = on_event
+        self.events = deque(maxlen=history)
+        self.__driver = None
+        self.__navigations = 0
+        self.__since_recycle = 0
+        self.__perf_enabled = False
+
+    def attach(self, driver):
+        self.__driver = driver
+        self.__since_recycle = 0
+        self.__perf_enabled = False
+
+    def __emit(self, kind, reason='', metrics=None):
+        event = WatchdogEvent(kind, reason, self.__navigations, metrics or {})
+        self.events.append(event)
+        if kind != 'sample':
+            info(f'watchdog {kind}: {reason}')
+        if self.on_event:
+            self.on_event(event)
+
+    def __browser_pid(self):
+        d = self.__driver.driver
+        pid = getattr(d, 'browser_pid', None)     # undetected_chromedriver
+        if pid is None:
+            service = getattr(d, 'service', None)
+            process = getattr(service, 'process', None)
+            pid = process.pid if process else None   # chromedriver. chrome runs as its child
+        return pid
+
+    def sample(self):
+        d = self.__driver.driver
+        if not self.__perf_enabled:
+            d.execute_cdp_cmd('Performance.enable', {})
+            self.__perf_enabled = True
+        values = {m['name']: m['value'] for m in d.execute_cdp_cmd('Performance.getMetrics', {})['metrics']}
+        metrics = {'js_heap_mb': values.get('JSHeapUsedSize', 0) / MB, 'dom_nodes': int(values.get('Nodes', 0)),
+                   'rss_mb': None}
+        pid = self.__browser_pid()
+        if pid is not None and os.path.isdir('/proc'):
+            metrics['rss_mb'] = _process_tree_rss(pid) / MB
+        return metrics
+
+    def __over(self, metrics):
+        if self.max_js_heap_mb and metrics['js_heap_mb'] > self.max_js_heap_mb:
+            return f'js heap {metrics["js_heap_mb"]:.0f}MB > {self.max_js_heap_mb}MB'
+        if self.max_dom_nodes and metrics['dom_nodes'] > self.max_dom_nodes:
+            return f'dom nodes {metrics["dom_nodes"]} > {self.max_dom_nodes}'
+        if self.max_rss_mb and metrics['rss_mb'] and metrics['rss_mb'] > self.max_rss_mb:
+            return f'rss {metrics["rss_mb"]:.0f}MB > {self.max_rss_mb}MB'
+        return None
+
+    def before_navigation(self):
+        # returns 'tab' or 'browser' when the tab was replaced or the browser restarted, None otherwise
+        self.__navigations += 1
+        self.__since_recycle += 1
+        if self.recycle_every and self.__since_recycle > self.recycle_every:
+            self.recycle_tab(f'every {self.recycle_every} navigations')
+            return 'tab'
+        if not self.sample_every or self.__navigations % self.sample_every != 0:
+            return None
+
+        try:
+            metrics = self.sample()
+        except Exception as e:
+            dbg('watchdog sample failed: ' + repr(e))
+            return None
+        self.__emit('sample', metrics=metrics)
+        if self.restart_rss_mb and metrics['rss_mb'] and metrics['rss_mb'] > self.restart_rss_mb:
+            self.__emit('restart', f'rss {metrics["rss_mb"]:.0f}MB > {self.restart_rss_mb}MB', metrics)
+            self.__driver.restart()     # re-attaches this watchdog
+            return 'browser'
+        reason = self.__over(metrics)
+        if reason:
+            self.recycle_tab(reason, metrics)
+            return 'tab'
+        return None
+
+    def recycle_tab(self, reason='', metrics=None):
+        # a fresh tab gets a fresh renderer. closing the old one releases its memory.
+        d = self.__driver.driver
+        old = d.current_window_handle
+        d.switch_to.new_window('tab')
+        new = d.current_window_handle
+        d.switch_to.window(old)
+        d.close()
+        d.switch_to.window(new)
+        self.__driver.__tab_replaced__(old)
+        self.__since_recycle = 0
+        self.__perf_enabled = False     # Performance.enable is per tab, sent again by the next sample
+        self.__emit('recycle_tab', reason, metrics)
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# marks responses served from the store so the response interceptor does not record them again
+HIT_HEADER = 'X-Seleniummm-Cache'
+
+MODES = ('record', 'replay', 'passthrough')
+
+
+class WireCache:
+    # http record/replay store for use_wire=True.
+    #   record:      always hit the network, store every response
+    #   replay:      serve from the store only. misses get 504 unless replay_miss='network'
+    #   passthrough: serve stored responses younger than ttl_sec, otherwise fetch and store
+    # bodies are content-addressed files under objects/, index.sqlite maps request key -> response.
+    def __init__(self, path, mode='replay', ttl_sec=3600, key_headers=(), replay_miss='error', max_status=499):
+        if mode not in MODES:
+            raise ValueError(f'unknown wire cache mode: {mode}')
+        self.mode = mode
+        self.ttl_sec = ttl_sec
+        self.key_headers = tuple(h.lower() for h in key_headers)
+        self.replay_miss = replay_miss
+        self.max_status = max_status
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+
+        self.root = Path(os.path.expanduser(path))
+        (self.root / 'objects').mkdir(parents=True, exist_ok=True)
+        self.__lock = threading.Lock()
+        import sqlite3
+        # interceptors run on selenium-wire's proxy threads
+        self.__db = sqlite3.connect(str(self.root / 'index.sqlite'), check_same_thread=False)
+        self.__db.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY, method TEXT, url TEXT, status INTEGER, reason TEXT,
+                                headers TEXT, body TEXT, stored_at REAL)''')
+        self.__db.commit()
+
+    def key(self, request):
+        h = hashlib.sha256(f'{request.method} {request.url}'.encode())
+        for name in self.key_headers:
+            h.update(f'\n{name}:{request.headers.get(name, "")}'.encode())
+        return h.hexdigest()
+
+    def __object_path(self, digest):
+        return self.root / 'objects' / digest[:2] / digest[2:]
+
+    def __write_body(self, body):
+        digest = hashlib.sha256(body).hexdigest()
+        p = self.__object_path(digest)
+        if not p.exists():
+            p.parent.mkdir(exist_ok=True)
+            tmp = p.with_name(f'{p.name}.{threading.get_ident()}.tmp')
+            tmp.write_bytes(body)
+            os.replace(tmp, p)
+        return digest
+
+    def lookup(self, request):
+        with self.__lock:
+            row = self.__db.execute('SELECT status, reason, headers, body, stored_at FROM responses WHERE key=?',
+                                    (self.key(request),)).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, digest, stored_at = row
+        if self.mode == 'passthrough' and time.time() - stored_at > self.ttl_sec:
+            return None
+        try:
+            body = self.__object_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        return status, reason, json.loads(headers), body
+
+    def store(self, request, response):
+        digest = self.__write_body(response.body or b'')
+        headers = json.dumps(list(response.headers.items()))
+        with self.__lock:
+            self.__db.execute('INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?,?,?)',
+                              (self.key(request), request.method, request.url, response.status_code,
+                               response.reason, headers, digest, time.time()))
+            self.__db.commit()
+        self.stored += 1
+
+    def request_interceptor(self, request):
+        if self.mode == 'record':
+            return
+        hit = self.lookup(request)
+        if hit is None:
+            self.misses += 1
+            if self.mode == 'replay' and self.replay_miss != 'network':
+                request.create_response(status_code=504, headers={HIT_HEADER: 'miss'}, body=b'not recorded')
+            return
+
+        self.hits += 1
+        status, reason, headers, body = hit
+        headers = [(k, v) for k, v in headers if k.lower() != HIT_HEADER.lower()] + [(HIT_HEADER, 'hit')]
+        request.create_response(status_code=status, headers=headers, body=body)
+
+    def response_interceptor(self, request, response):
+        if self.mode == 'replay' or HIT_HEADER in response.headers:
+            return
+        if response.status_code > self.max_status:
+            return
+        self.store(request, response)
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
@@ -0,0 +1,81 @@
+import pytest
+from selenium import webdriver as selenium_webdriver
+from selenium.common.exceptions import NoSuchWindowException
+
+
+class FakeSwitchTo:
+    def __init__(self, chrome):
+        self.chrome = chrome
+
+    def new_window(self, kind):
+        self.chrome.opened += 1
+        self.chrome.handles.append(f'tab{self.chrome.opened}')
+        self.chrome.current_window_handle = self.chrome.handles[-1]
+
+    def window(self, handle):
+        if handle not in self.chrome.handles:
+            raise NoSuchWindowException('no such window')
+        self.chrome.current_window_handle = handle
+
+
+class FakeChrome:
+    # attached chrome: records cdp commands with the tab they were sent to
+    instances = []
+
+    def __init__(self, service=None, options=None):
+        self.options = options
+        self.handles = ['tab0']
+        self.opened = 0
+        self.current_window_handle = 'tab0'
+        self.switch_to = FakeSwitchTo(self)
+        self.commands = []
+        self.scripts = []
+        self.script_result = None
+        self.on_script = None   # on_script(source, args) answers execute_script when set
+        self.cdp_results = {}   # method -> result of execute_cdp_cmd
+        self.quitted = False
+        self.minimized = 0
+        FakeChrome.instances.append(self)
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    def execute_cdp_cmd(self, method, params):
+        # a window command: sent through the current tab, like chromedriver does
+        if self.current_window_handle not in self.handles:
+            raise NoSuchWindowException('no such window')
+        self.commands.append((self.current_window_handle, method, params))
+        if method == 'Target.getTargets':
+            return {'targetInfos': [{'targetId': h, 'type': 'page', 'title': h.upper(), 'url': ''}
+                                    for h in reversed(self.handles)]}
+        if method == 'Page.addScriptToEvaluateOnNewDocument':
+            return {'identifier': str(len(self.commands))}
+        return self.cdp_results.get(method, {})
+
+    def execute_script(self, source, *args):
+        if self.current_window_handle not in self.handles:
+            raise NoSuchWindowException('no such window')
+        self.scripts.append(source)
+        if self.on_script:
+            return self.on_script(source, args)
+        return self.script_result
+
+    def set_script_timeout(self, sec):
+        pass
+
+    def close(self):
+        self.handles.remove(self.current_window_handle)
+
+    def minimize_window(self):
+        self.minimized += 1
+
+    def quit(self):
+        self.quitted = True
+
+
+@pytest.fixture
+def chrome(monkeypatch):
+    FakeChrome.instances = []
+    monkeypatch.setattr(selenium_webdriver, 'Chrome', FakeChrome)
+    return FakeChrome
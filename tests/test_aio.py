@@ -0,0 +1,33 @@
+import asyncio
+import threading
+import time
+
+from seleniummm.aio import AsyncWebDriver
+
+
+class FakeDriver:
+    def __init__(self):
+        self.running = 0
+        self.overlapped = False
+        self.guard = threading.Lock()
+
+    def slow(self, value):
+        with self.guard:
+            self.running += 1
+            self.overlapped |= self.running > 1
+        time.sleep(0.02)
+        with self.guard:
+            self.running -= 1
+        return value
+
+
+def test_created_outside_a_loop_and_used_in_several():
+    driver = FakeDriver()
+    d = AsyncWebDriver(driver)
+
+    async def burst():
+        return await asyncio.gather(*(d.slow(i) for i in range(4)))
+
+    assert asyncio.run(burst()) == [0, 1, 2, 3]
+    assert asyncio.run(burst()) == [0, 1, 2, 3]
+    assert not driver.overlapped
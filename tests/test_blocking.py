@@ -0,0 +1,64 @@
+import pytest
+
+from seleniummm.blocking import BlockRule, url_matches
+
+
+@pytest.mark.parametrize('url, pattern, expected', [
+    ('https://a.com/x.png', '*://*/*.png', True),
+    ('https://a.com/x.png?v=1', '*://*/*.png?*', True),
+    ('https://a.com/x.png?v=1', '*://*/*.png', False),     # needs the '?*' variant
+    ('https://a.com/x.pngx', '*://*/*.png', False),
+    ('https://a.com/x?y', '*://*/x[?]y', False),           # brackets are literal, not a class
+    ('https://a.com/x?y', '*://*/x?y', True),
+])
+def test_url_matches(url, pattern, expected):
+    assert url_matches(url, pattern) is expected
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.webmd.com/',
+    'https://www.iconfinder.com/icons',
+    'https://gifts.example.com/index.html',
+    'https://ogg.example.com/',
+    'https://example.com/styles.css.html',
+])
+def test_type_patterns_leave_documents_alone(url):
+    patterns = BlockRule.of('text-only').url_patterns()
+    assert not any(url_matches(url, p) for p in patterns)
+
+
+@pytest.mark.parametrize('url', [
+    'https://cdn.example.com/a/b/logo.png',
+    'https://cdn.example.com/clip.webm?token=abc',
+    'https://example.com/favicon.ico',
+    'https://fonts.example.com/f.woff2',
+    'https://example.com/site.css?v=3',
+])
+def test_type_patterns_match_resources(url):
+    patterns = BlockRule.of('text-only').url_patterns()
+    assert any(url_matches(url, p) for p in patterns)
+
+
+def test_tracker_patterns_are_domain_anchored():
+    rule = BlockRule.of('no-trackers')
+    assert rule.blocks('https://www.google-analytics.com/analytics.js')
+    assert rule.blocks('https://doubleclick.net/ad')
+    assert not rule.blocks('https://notcriteo.com/')
+    assert not rule.blocks('https://example.com/?ref=hotjar.com/')
+
+
+def test_blocks_by_fetch_dest():
+    rule = BlockRule.of({'types': ['image', 'script']})
+    assert rule.blocks('https://example.com/pixel', 'image')
+    assert rule.blocks('https://example.com/app', 'script')
+    assert not rule.blocks('https://example.com/', 'document')
+
+
+def test_of():
+    assert BlockRule.of(None) is None
+    rule = BlockRule(types=['font'])
+    assert BlockRule.of(rule) is rule
+    with pytest.raises(ValueError):
+        BlockRule.of('no-such-profile')
+    with pytest.raises(ValueError):
+        BlockRule(types=['video'])
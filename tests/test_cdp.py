@@ -0,0 +1,175 @@
+import io
+import json
+import queue
+import threading
+
+import pytest
+import websocket
+from selenium.common.exceptions import JavascriptException
+
+from seleniummm import WebDriver, js
+from seleniummm import cdp as cdp_module
+from seleniummm.cdp import CdpChannel, CdpError
+
+
+class FakeSocket:
+    # browser end of the devtools websocket. reply(msg) answers commands, push() sends events.
+    def __init__(self, reply):
+        self.reply = reply
+        self.sent = []
+        self.incoming = queue.Queue()
+
+    def settimeout(self, timeout):
+        pass
+
+    def send(self, text):
+        msg = json.loads(text)
+        self.sent.append(msg)
+        answer = self.reply(msg)
+        if answer is not None:
+            self.push(dict(answer, id=msg['id']))
+
+    def push(self, msg):
+        self.incoming.put(json.dumps(msg))
+
+    def recv(self):
+        text = self.incoming.get()
+        if text is None:
+            raise websocket.WebSocketConnectionClosedException('closed')
+        return text
+
+    def close(self):
+        self.incoming.put(None)
+
+
+def default_reply(msg):
+    if msg['method'] == 'Target.attachToTarget':
+        return {'result': {'sessionId': 'session-' + msg['params']['targetId']}}
+    if msg['method'] == 'Broken.method':
+        return {'error': {'code': -32601, 'message': 'method not found'}}
+    if msg['method'] == 'Silent.method':
+        return None
+    return {'result': {'echo': msg['params']}}
+
+
+@pytest.fixture
+def socket(monkeypatch):
+    sock = FakeSocket(default_reply)
+    version = json.dumps({'webSocketDebuggerUrl': 'ws://127.0.0.1:9222/devtools/browser/x'}).encode()
+    monkeypatch.setattr(cdp_module, 'urlopen', lambda url, timeout: io.BytesIO(version))
+    monkeypatch.setattr(websocket, 'create_connection', lambda url, **kwargs: sock)
+    return sock
+
+
+def test_call_and_error(socket):
+    channel = CdpChannel('127.0.0.1:9222', timeout=2)
+    assert channel.call('Page.enable', {'a': 1}) == {'echo': {'a': 1}}
+    with pytest.raises(CdpError) as e:
+        channel.call('Broken.method')
+    assert e.value.code == -32601
+    channel.close()
+
+
+def test_attach_is_cached_per_target(socket):
+    channel = CdpChannel('127.0.0.1:9222', timeout=2)
+    assert channel.attach('t1') == 'session-t1'
+    assert channel.attach('t1') == 'session-t1'
+    assert [m['method'] for m in socket.sent].count('Target.attachToTarget') == 1
+    channel.close()
+
+
+def test_events_are_filtered_by_session(socket):
+    channel = CdpChannel('127.0.0.1:9222', timeout=2)
+    got = {'any': [], 'one': []}
+    arrived = threading.Event()
+    channel.on('Page.loadEventFired', lambda method, params: got['any'].append(params['n']))
+    channel.on('Page.loadEventFired', lambda method, params: got['one'].append(params['n']), 'session-t1')
+    channel.on('Custom.last', lambda method, params: arrived.set())
+
+    socket.push({'method': 'Page.loadEventFired', 'params': {'n': 1}, 'sessionId': 'session-t1'})
+    socket.push({'method': 'Page.loadEventFired', 'params': {'n': 2}, 'sessionId': 'session-t2'})
+    socket.push({'method': 'Custom.last', 'params': {}})
+    assert arrived.wait(2)
+    assert got == {'any': [1, 2], 'one': [1]}
+    channel.close()
+
+
+def test_detach_forgets_session(socket):
+    channel = CdpChannel('127.0.0.1:9222', timeout=2)
+    channel.attach('t1')
+    arrived = threading.Event()
+    channel.on('Target.detachedFromTarget', lambda method, params: arrived.set())
+    socket.push({'method': 'Target.detachedFromTarget', 'params': {'sessionId': 'session-t1'}})
+    assert arrived.wait(2)
+    channel.attach('t1')
+    assert [m['method'] for m in socket.sent].count('Target.attachToTarget') == 2
+    channel.close()
+
+
+def test_lost_connection_fails_pending_calls(socket):
+    closed = threading.Event()
+    channel = CdpChannel('127.0.0.1:9222', timeout=2, on_close=closed.set)
+    future = channel.send('Silent.method')
+    socket.close()
+    assert closed.wait(2)
+    with pytest.raises(CdpError):
+        future.result(2)
+    assert channel.closed
+    with pytest.raises(CdpError):
+        channel.call('Page.enable')
+
+
+def test_evaluate_raises_javascript_errors(socket):
+    socket.reply = lambda msg: ({'result': {'sessionId': 's'}} if msg['method'] == 'Target.attachToTarget' else
+                                {'result': {'exceptionDetails': {'text': 'Uncaught', 'exception': {
+                                    'description': 'ReferenceError: x is not defined'}}}})
+    channel = CdpChannel('127.0.0.1:9222', timeout=2)
+    with pytest.raises(JavascriptException, match='ReferenceError'):
+        channel.evaluate('t1', 'x')
+    channel.close()
+
+
+class FakeChannel:
+    # what WebDriver.script() hands to the channel
+    def __init__(self, result):
+        self.result = result
+        self.closed = False
+        self.expressions = []
+
+    def evaluate(self, target_id, expression, await_promise=False, timeout=None):
+        self.expressions.append((target_id, expression))
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+    def close(self):
+        self.closed = True
+
+
+def test_script_runs_wrapped_over_channel(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, set_download_path=str(tmp_path))
+    driver.cdp = FakeChannel({'value': 42})
+    assert driver.script('return 6 * 7') == 42
+    [(target, expression)] = driver.cdp.expressions
+    assert target == 'tab0'
+    assert expression == js.CDP_CALL_BEGIN + 'return 6 * 7' + js.CDP_CALL_END + '[], false)'
+    assert chrome.instances[0].scripts == []
+    driver.quit()
+
+
+def test_script_with_nodes_is_unstashed(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, set_download_path=str(tmp_path))
+    driver.cdp = FakeChannel({'stashed': True})
+    chrome.instances[0].script_result = ['element']
+    assert driver.script('return document.body') == ['element']
+    assert chrome.instances[0].scripts == [js.UNSTASH]
+    driver.quit()
+
+
+def test_script_falls_back_to_chromedriver(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, set_download_path=str(tmp_path))
+    driver.cdp = FakeChannel(CdpError('target closed'))
+    chrome.instances[0].script_result = 'via chromedriver'
+    assert driver.script('return 1') == 'via chromedriver'
+    assert chrome.instances[0].scripts == ['return 1']
+    driver.quit()
@@ -0,0 +1,137 @@
+import os
+import threading
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from seleniummm.downloads import DownloadManager, DirectoryWatcher, finish_file, unique_path
+
+
+class FakeChannel:
+    def __init__(self):
+        self.closed = False
+        self.handlers = {}
+        self.calls = []
+
+    def on(self, method, callback, session_id=None):
+        self.handlers.setdefault(method, []).append(callback)
+
+    def call(self, method, params=None, session_id=None, timeout=None):
+        self.calls.append((method, params))
+        return {}
+
+    def emit(self, method, params):
+        for callback in self.handlers.get(method, ()):
+            callback(method, params)
+
+
+class FakeChrome:
+    def __init__(self, on_script):
+        self.on_script = on_script
+
+    def execute_script(self, source, url):
+        self.on_script(url)
+        return url
+
+
+class FakeDriver:
+    def __init__(self, on_script=lambda url: None):
+        self.cdp = FakeChannel()
+        self.driver = FakeChrome(on_script)
+
+    def open_cdp_channel(self):
+        return self.cdp
+
+
+def finish(manager, channel, guid, data=b'data'):
+    with open(os.path.join(manager.directory, guid), 'wb') as f:
+        f.write(data)
+    channel.emit('Browser.downloadProgress', {'guid': guid, 'state': 'completed'})
+
+
+def test_unique_path(tmp_path):
+    assert unique_path(str(tmp_path), 'a.txt') == str(tmp_path / 'a.txt')
+    (tmp_path / 'a.txt').write_text('')
+    assert unique_path(str(tmp_path), 'a.txt') == str(tmp_path / 'a (1).txt')
+
+
+def test_download_by_guid(tmp_path):
+    driver = FakeDriver()
+    manager = DownloadManager(driver, str(tmp_path))
+
+    def start(url):
+        driver.cdp.emit('Browser.downloadWillBegin', {'guid': 'g1', 'url': url, 'suggestedFilename': 'report.csv'})
+        threading.Timer(0.05, finish, (manager, driver.cdp, 'g1', b'a,b')).start()
+
+    driver.driver.on_script = start
+    result = manager.download('https://example.com/report.csv', timeout=5, hash_name='sha256')
+    assert result.path == str(tmp_path / 'report.csv')
+    assert result.size == 3
+    assert len(result.digest) == 64
+    behavior = dict(driver.cdp.calls)['Browser.setDownloadBehavior']
+    assert behavior['behavior'] == 'allowAndName' and behavior['eventsEnabled']
+
+
+def test_concurrent_downloads_are_not_mixed_up(tmp_path):
+    driver = FakeDriver()
+    manager = DownloadManager(driver, str(tmp_path))
+    barrier = threading.Barrier(2)
+    guids = {'https://example.com/a.bin': 'ga', 'https://example.com/b.bin': 'gb'}
+
+    def start(url):
+        barrier.wait()
+        driver.cdp.emit('Browser.downloadWillBegin', {'guid': guids[url], 'url': url,
+                                                      'suggestedFilename': url.rsplit('/', 1)[1]})
+        if url.endswith('b.bin'):   # b finishes first
+            finish(manager, driver.cdp, 'gb', b'bb')
+        else:
+            threading.Timer(0.1, finish, (manager, driver.cdp, 'ga', b'a')).start()
+
+    driver.driver.on_script = start
+    results = {}
+    threads = [threading.Thread(target=lambda u=u: results.setdefault(u, manager.download(u, timeout=5)))
+               for u in guids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert os.path.basename(results['https://example.com/a.bin'].path) == 'a.bin'
+    assert results['https://example.com/a.bin'].size == 1
+    assert os.path.basename(results['https://example.com/b.bin'].path) == 'b.bin'
+
+
+def test_canceled_download_raises(tmp_path):
+    driver = FakeDriver()
+    manager = DownloadManager(driver, str(tmp_path))
+
+    def start(url):
+        driver.cdp.emit('Browser.downloadWillBegin', {'guid': 'g', 'url': url, 'suggestedFilename': 'x'})
+        driver.cdp.emit('Browser.downloadProgress', {'guid': 'g', 'state': 'canceled'})
+
+    driver.driver.on_script = start
+    with pytest.raises(Exception, match='canceled'):
+        manager.download('https://example.com/x', timeout=5)
+
+
+def test_download_timeout(tmp_path):
+    manager = DownloadManager(FakeDriver(), str(tmp_path))
+    with pytest.raises(TimeoutException):
+        manager.download('https://example.com/x', timeout=0.1)
+
+
+def test_directory_watcher_ignores_partial_files(tmp_path):
+    with DirectoryWatcher(str(tmp_path)) as watcher:
+        (tmp_path / 'a.bin.crdownload').write_bytes(b'x')
+        (tmp_path / 'a.bin').write_bytes(b'x')
+        assert watcher.wait_new_file(2) == str(tmp_path / 'a.bin')
+
+
+def test_finish_file_copies_and_hashes(tmp_path):
+    src = tmp_path / 'src.bin'
+    src.write_bytes(b'hello')
+    dst = tmp_path / 'out'
+    dst.mkdir()
+    path, digest = finish_file(str(src), str(dst), 'md5')
+    assert path == str(dst / 'src.bin')
+    assert (dst / 'src.bin').read_bytes() == b'hello'
+    assert digest == '5d41402abc4b2a76b9719d911017c592'
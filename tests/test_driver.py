@@ -0,0 +1,161 @@
+import os
+
+import pytest
+from selenium.common.exceptions import NoSuchWindowException, TimeoutException
+from selenium.webdriver.remote.webelement import WebElement
+
+from seleniummm import WebDriver
+from seleniummm.watchdog import MemoryWatchdog
+
+
+def test_restart_relaunches_with_same_arguments(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, wait_timeout_sec=7, set_download_path=str(tmp_path))
+    driver.restart(keep_session=False)
+    first, second = chrome.instances
+    assert first.quitted and not second.quitted
+    assert driver.driver is second
+    assert second.options.debugger_address == '127.0.0.1:9222'
+    assert driver.get_wait_timeout() == 7
+    driver.quit()
+
+
+def test_restart_keeps_own_download_dir(chrome):
+    driver = WebDriver(attach_to=9222)
+    directory = driver.downloads.directory
+    driver.restart(keep_session=False)
+    assert driver.downloads.directory == directory and os.path.isdir(directory)
+    driver.quit()
+    assert not os.path.exists(directory)
+
+
+def test_recycled_tab_gets_tab_setup(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, set_download_path=str(tmp_path), watchdog=MemoryWatchdog(sample_every=None))
+    driver.set_blocked_resources('no-media')
+    driver.add_init_script('window.seeded = 1')
+    [chrome] = chrome.instances
+    driver.watchdog.recycle_tab('test')
+
+    assert chrome.handles == ['tab1']
+    sent = [(method, params) for handle, method, params in chrome.commands if handle == 'tab1']
+    assert ('Page.addScriptToEvaluateOnNewDocument', {'source': 'window.seeded = 1'}) in sent
+    assert any(method == 'Network.setBlockedURLs' and params['urls'] for method, params in sent)
+
+    driver.quit()
+
+
+class ClosingElement(WebElement):
+    # clicking it closes its own tab, like a window.close() button
+    def __init__(self, chrome):
+        super().__init__(chrome, 'closing')
+        self.chrome = chrome
+
+    def click(self):
+        self.chrome.close()
+
+
+def test_switch_after_closing_current_tab(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, set_download_path=str(tmp_path))
+    [chrome] = chrome.instances
+    driver.open_new_tab()
+    assert driver.tabs.handles() == ['tab0', 'tab1']
+    assert driver.get_all_window_titles() == ['TAB0', 'TAB1']
+
+    chrome.close()      # tab1, still current: window commands fail from here
+    driver.switch_to_window(0)
+    assert chrome.current_window_handle == 'tab0'
+    driver.quit()
+
+
+def test_minimized_click_closing_its_tab(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, set_download_path=str(tmp_path), minimize=True)
+    [chrome] = chrome.instances
+    driver.open_new_tab()
+    minimized = chrome.minimized
+    driver.click(ClosingElement(chrome))
+    assert chrome.minimized == minimized + 1     # window count changed
+    assert driver.tabs.count() == 1
+    driver.quit()
+
+
+class Pages:
+    # page side of get_many: location.href assignments and readiness checks, per tab
+    def __init__(self, chrome, slow=()):
+        self.chrome = chrome
+        self.slow = set(slow)
+        self.urls = {}
+        self.most_tabs = 0
+
+    def __call__(self, source, args):
+        handle = self.chrome.current_window_handle
+        if 'location.href = url' in source:
+            self.urls[handle] = args[0]
+            self.most_tabs = max(self.most_tabs, len(self.chrome.handles))
+            return True
+        return self.urls[handle] not in self.slow
+
+
+def current_url(driver, url):
+    pages = driver.driver.on_script
+    return pages.urls[driver.driver.current_window_handle]
+
+
+@pytest.fixture
+def many(chrome, tmp_path):
+    driver = WebDriver(attach_to=9222, set_download_path=str(tmp_path))
+    pages = Pages(driver.driver)
+    driver.driver.on_script = pages
+    yield driver, pages
+    driver.quit()
+
+
+URLS = [f'https://example.com/{i}' for i in range(5)]
+
+
+def test_get_many_reuses_up_to_max_tabs(many):
+    driver, pages = many
+    results = list(driver.get_many(URLS, max_tabs=2, handler=current_url, timeout=5))
+    assert sorted(r.url for r in results) == URLS
+    assert all(r.error is None and r.value == r.url for r in results)
+    assert pages.most_tabs == 2
+    assert driver.driver.handles == ['tab0']
+    assert driver.driver.current_window_handle == 'tab0'
+
+
+def test_get_many_timeout_and_handler_error(many):
+    driver, pages = many
+    pages.slow.add(URLS[1])
+
+    def handler(d, url):
+        if url == URLS[2]:
+            raise ValueError('bad page')
+        return url
+
+    results = {r.url: r for r in driver.get_many(URLS[:3], max_tabs=3, handler=handler, timeout=0.2)}
+    assert results[URLS[0]].value == URLS[0]
+    assert isinstance(results[URLS[1]].error, TimeoutException)
+    assert isinstance(results[URLS[2]].error, ValueError)
+    assert driver.driver.handles == ['tab0']
+
+
+def test_get_many_handler_closing_its_tab(many):
+    driver, pages = many
+
+    def handler(d, url):
+        if url == URLS[1]:
+            d.driver.close()
+        return url
+
+    results = list(driver.get_many(URLS, max_tabs=2, handler=handler, timeout=5))
+    assert sorted(r.url for r in results) == URLS
+    errors = [r for r in results if r.error is not None]
+    assert len(errors) == 1 and isinstance(errors[0].error, NoSuchWindowException)
+    assert driver.driver.handles == ['tab0']
+
+
+def test_get_many_closed_early(many):
+    driver, pages = many
+    results = driver.get_many(URLS, max_tabs=3, timeout=5)
+    next(results)
+    results.close()
+    assert driver.driver.handles == ['tab0']
+    assert driver.driver.current_window_handle == 'tab0'
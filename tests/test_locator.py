@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from seleniummm import Locator
+
+
+def test_kinds():
+    assert Locator(css='a.b').condition == (By.CSS_SELECTOR, 'a.b')
+    assert Locator(cls='row').condition == (By.CLASS_NAME, 'row')
+    assert Locator(xpath='//a').kind == 'xpath'
+    assert tuple(Locator(id='x')) == (By.ID, 'x')
+
+
+def test_css_with_separator_is_deep():
+    locator = Locator(css='x-app >>> iframe >>> button')
+    assert locator.kind == 'deep'
+    assert locator.by == 'deep'
+    assert Locator(deep='x-app >>> button') == Locator(css='x-app >>> button')
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'css': 'a', 'id': 'b'}, {'css': ''}, {'id': 3}])
+def test_invalid(kwargs):
+    with pytest.raises(ValueError):
+        Locator(**kwargs)
+
+
+@pytest.mark.parametrize('value', ['x-app >>> ', '>>> a', 'a >>>  >>> b'])
+def test_empty_deep_segment(value):
+    with pytest.raises(ValueError, match='empty segment'):
+        Locator(css=value)
+
+
+def test_immutable_and_hashable():
+    locator = Locator(css='a')
+    with pytest.raises(AttributeError):
+        locator.value = 'b'
+    with pytest.raises(AttributeError):
+        del locator.value
+    assert {Locator(css='a'): 1}[locator] == 1
+    assert Locator(css='a') != Locator(xpath='a')
+
+
+def test_pickle():
+    locator = Locator(css='x-app >>> button')
+    assert pickle.loads(pickle.dumps(locator)) == locator
@@ -0,0 +1,133 @@
+import json
+import threading
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from seleniummm import Locator
+from seleniummm.metrics import (MemorySink, PrometheusSink, JsonLinesSink, Histogram, BUCKETS,
+                                instrument, uninstrument, locator_kind)
+
+
+class FakeDriver:
+    # find_element is called from click, like WebDriver.click(locator)
+    def find_element(self, locator=None, **kwargs):
+        return 'element'
+
+    def click(self, locator=None, **kwargs):
+        self.find_element(locator, **kwargs)
+
+    def get(self, url):
+        if url == 'slow':
+            raise TimeoutException('slow')
+        if url == 'bad':
+            raise ValueError('bad')
+
+
+def test_histogram_buckets_and_outcomes():
+    h = Histogram()
+    h.add(0.001, 'ok')
+    h.add(0.3, 'error')
+    h.add(100, 'timeout')
+    assert h.count == 3
+    assert h.buckets[0] == 1
+    assert h.buckets[BUCKETS.index(0.5)] == 1
+    assert h.buckets[-1] == 1
+    assert (h.errors, h.timeouts) == (1, 1)
+
+
+def test_locator_kind():
+    assert locator_kind((Locator(css='a'),), {}) == 'css'
+    assert locator_kind((), {'xpath': '//a'}) == 'xpath'
+    assert locator_kind((), {'css': 'x-host >>> a'}) == 'deep'
+    assert locator_kind((Locator(css='x-host >>> a'),), {}) == 'deep'
+    assert locator_kind(('https://example.com',), {}) == ''
+
+
+def test_instrument_records_outermost_call_only():
+    sink = MemorySink()
+    d = FakeDriver()
+    instrument(d, sink, 'standard', commands=('find_element', 'click', 'get'))
+    d.click(css='a >>> b')
+    d.find_element(id='x')
+    with pytest.raises(TimeoutException):
+        d.get('slow')
+    with pytest.raises(ValueError):
+        d.get('bad')
+
+    keys = set(sink.histograms)
+    assert keys == {('click', 'deep', 'standard'), ('find_element', 'id', 'standard'), ('get', '', 'standard')}
+    get = sink.histograms[('get', '', 'standard')]
+    assert (get.count, get.errors, get.timeouts) == (2, 1, 1)
+
+    uninstrument(d, commands=('find_element', 'click', 'get'))
+    d.click(id='y')
+    assert sum(h.count for h in sink.histograms.values()) == 4
+
+
+def test_nesting_is_per_thread():
+    sink = MemorySink()
+    d = FakeDriver()
+    instrument(d, sink, 'standard', commands=('find_element',))
+    threads = [threading.Thread(target=lambda: [d.find_element(id='x') for _ in range(100)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sink.histograms[('find_element', 'id', 'standard')].count == 400
+
+
+def test_summary():
+    sink = MemorySink()
+    sink.record('get', 1.0, 'ok', '', 'standard')
+    sink.record('get', 3.0, 'timeout', '', 'standard')
+    [row] = sink.summary()
+    assert row['count'] == 2
+    assert row['mean_sec'] == 2.0
+    assert row['timeout_rate'] == 0.5
+    assert row['error_rate'] == 0.0
+
+
+def test_prometheus_render():
+    sink = PrometheusSink()
+    sink.record('click', 0.02, 'ok', 'css', 'standard')
+    sink.record('click', 0.2, 'error', 'css', 'standard')
+    text = sink.render()
+    labels = 'command="click",locator="css",flavor="standard"'
+    assert '# TYPE seleniummm_command_seconds histogram' in text
+    assert f'seleniummm_command_seconds_bucket{{{labels},le="0.01"}} 0' in text
+    assert f'seleniummm_command_seconds_bucket{{{labels},le="0.025"}} 1' in text
+    assert f'seleniummm_command_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f'seleniummm_command_seconds_count{{{labels}}} 2' in text
+    assert f'seleniummm_command_errors_total{{{labels}}} 1' in text
+    assert text.endswith('\n')
+
+
+def test_prometheus_render_while_recording():
+    sink = PrometheusSink()
+    stop = threading.Event()
+
+    def record():
+        i = 0
+        while not stop.is_set():
+            sink.record(f'cmd{i % 50}', 0.01, 'ok', '', 'standard')
+            i += 1
+
+    t = threading.Thread(target=record)
+    t.start()
+    try:
+        for _ in range(200):
+            sink.render()
+    finally:
+        stop.set()
+        t.join()
+
+
+def test_json_lines_sink(tmp_path):
+    path = tmp_path / 'metrics.jsonl'
+    sink = JsonLinesSink(str(path))
+    sink.record('get', 0.5, 'ok', '', 'standard')
+    sink.close()
+    record = json.loads(path.read_text())
+    assert record['command'] == 'get'
+    assert record['sec'] == 0.5
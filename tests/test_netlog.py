@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from seleniummm.netlog import NetworkLogReader, NetworkRequest, NetworkFinished
+
+
+def entry(method, params):
+    return {'message': json.dumps({'message': {'method': method, 'params': params}}, separators=(',', ':'))}
+
+
+REQUEST = entry('Network.requestWillBeSent', {'requestId': '1', 'type': 'Document', 'timestamp': 1.0,
+                                              'request': {'url': 'https://example.com/', 'method': 'GET'}})
+RESPONSE = entry('Network.responseReceived', {'requestId': '1', 'timestamp': 1.5, 'response': {
+    'url': 'https://example.com/', 'status': 200, 'mimeType': 'text/html', 'fromDiskCache': True}})
+FINISHED = entry('Network.loadingFinished', {'requestId': '1', 'timestamp': 2.0, 'encodedDataLength': 512.0})
+# the wanted method only appears inside the payload
+DECOY = entry('Runtime.consoleAPICalled', {'args': [{'value': {'method': 'Network.loadingFinished'}}]})
+
+
+class FakeDriver:
+    def __init__(self, *batches):
+        self.batches = list(batches)
+
+    def get_log(self, kind):
+        assert kind == 'performance'
+        return self.batches.pop(0) if self.batches else []
+
+
+def test_poll_parses_wanted_events():
+    reader = NetworkLogReader(FakeDriver([REQUEST, RESPONSE, FINISHED]))
+    request, response, finished = reader.poll()
+    assert request == NetworkRequest('1', 'https://example.com/', 'GET', 'Document', 1.0)
+    assert (response.status, response.mime_type, response.from_cache) == (200, 'text/html', True)
+    assert finished == NetworkFinished('1', 2.0, 512)
+    assert list(reader.events) == [request, response, finished]
+
+
+def test_unwanted_and_decoy_entries_are_dropped():
+    reader = NetworkLogReader(FakeDriver([REQUEST, RESPONSE, DECOY, FINISHED]), events=('finished',))
+    assert reader.poll() == [NetworkFinished('1', 2.0, 512)]
+    assert reader.dropped == 3
+
+
+def test_incremental_and_bounded():
+    reader = NetworkLogReader(FakeDriver([REQUEST], [FINISHED, FINISHED]), maxlen=2)
+    reader.poll()
+    reader.poll()
+    assert [type(e) for e in reader.events] == [NetworkFinished, NetworkFinished]
+    reader.clear()
+    assert len(reader.events) == 0
+
+
+def test_callback_instead_of_buffer():
+    seen = []
+    reader = NetworkLogReader(FakeDriver([REQUEST]), callback=seen.append)
+    reader.poll()
+    assert len(seen) == 1 and len(reader.events) == 0
+
+
+def test_unknown_event():
+    with pytest.raises(ValueError):
+        NetworkLogReader(FakeDriver(), events=('request', 'websocket'))
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+
+from selenium.common.exceptions import NoSuchElementException, UnexpectedAlertPresentException, WebDriverException
+
+from seleniummm import js
+from seleniummm.plan import InteractionPlan
+
+
+class FakeElement:
+    def __init__(self, log, name):
+        self.log = log
+        self.name = name
+
+    def clear(self):
+        pass
+
+    def send_keys(self, text):
+        self.log.append(('fill', self.name))
+
+    def is_selected(self):
+        return False
+
+    def click(self):
+        self.log.append(('click', self.name))
+
+
+class FakeChrome:
+    # run_plan(steps) returns the batch result or raises; progress is what PLAN_PROGRESS reads back
+    def __init__(self, run_plan, progress=None):
+        self.run_plan = run_plan
+        self.progress = progress
+        self.batches = []
+
+    def execute_script(self, source, *args):
+        if source == js.RUN_PLAN:
+            steps, token = args
+            self.batches.append([s['action'] for s in steps])
+            self.token = token
+            return self.run_plan(steps)
+        assert source == js.PLAN_PROGRESS
+        if isinstance(self.progress, Exception):
+            raise self.progress
+        return None if self.progress is None else {'token': args[0], 'done': self.progress}
+
+
+class FakeDriver:
+    def __init__(self, run_plan, progress=None):
+        self.driver = FakeChrome(run_plan, progress)
+        self.log = []
+        self.frame = None   # frame the driver is in, None: top document
+
+    def find_element(self, locator):
+        # deep locators end inside the frame of their element, as WebDriver.find_element does
+        if locator.kind == 'deep':
+            self.frame = locator.value.split('>>>')[-2].strip()
+        elif self.frame is not None:
+            raise NoSuchElementException(f'{locator.value} in frame {self.frame}')
+        return FakeElement(self.log, locator.value)
+
+    @contextmanager
+    def __frames_restored__(self):
+        frame = self.frame
+        try:
+            yield
+        finally:
+            self.frame = frame
+
+    def click(self, element):
+        self.log.append(('click', element.name))
+
+    def mouse_over(self, element):
+        self.log.append(('hover', element.name))
+
+
+def ok(steps):
+    return [{'ok': True} for _ in steps]
+
+
+def outcome(results):
+    return [(r.index, r.ok, r.via) for r in results]
+
+
+def test_batch():
+    driver = FakeDriver(ok)
+    results = InteractionPlan(driver).fill('#id', 'me').check('#agree').click('#submit').run()
+    assert outcome(results) == [(0, True, 'script'), (1, True, 'script'), (2, True, 'script')]
+    assert driver.driver.batches == [['fill', 'check', 'click']]
+    assert driver.log == []
+
+
+def test_failed_step_falls_back_to_webdriver():
+    driver = FakeDriver(lambda steps: [{'ok': True}, {'ok': False, 'error': 'element not found: #agree'}])
+    results = InteractionPlan(driver).fill('#id', 'me').check('#agree').click('#submit').run()
+    assert outcome(results) == [(0, True, 'script'), (1, True, 'webdriver'), (2, True, 'webdriver')]
+    assert driver.log == [('click', '#agree'), ('click', '#submit')]
+
+
+def test_failed_step_without_fallback():
+    driver = FakeDriver(lambda steps: [{'ok': False, 'error': 'element not found: #id'}])
+    results = InteractionPlan(driver).fill('#id', 'me').click('#submit').run(fallback=False)
+    assert outcome(results) == [(0, False, 'script')]
+    assert results[0].error == 'element not found: #id'
+    assert driver.log == []
+
+
+def test_hover_goes_through_webdriver():
+    driver = FakeDriver(ok)
+    results = InteractionPlan(driver).fill('#q', 'x').hover('#menu').click('#item').run()
+    assert outcome(results) == [(0, True, 'script'), (1, True, 'webdriver'), (2, True, 'script')]
+    assert driver.driver.batches == [['fill'], ['click']]
+    assert driver.log == [('hover', '#menu')]
+
+
+def test_interrupted_batch_is_not_replayed():
+    # the submit click opened an alert, cutting off the script after the fill
+    def run_plan(steps):
+        raise UnexpectedAlertPresentException('alert')
+
+    driver = FakeDriver(run_plan, progress=1)
+    results = InteractionPlan(driver).fill('#id', 'me').click('#submit').click('#next').run()
+    assert outcome(results) == [(0, True, 'script'), (1, False, 'script')]
+    assert 'interrupted' in results[1].error
+    assert driver.log == []
+
+
+def test_interrupted_after_last_step():
+    # the final click navigated within the origin; progress survived in sessionStorage
+    def run_plan(steps):
+        raise WebDriverException('script was cut off')
+
+    driver = FakeDriver(run_plan, progress=2)
+    results = InteractionPlan(driver).fill('#id', 'me').click('#submit').run()
+    assert outcome(results) == [(0, True, 'script'), (1, True, 'script')]
+
+
+def test_unknown_progress_is_not_replayed():
+    def run_plan(steps):
+        raise UnexpectedAlertPresentException('alert')
+
+    driver = FakeDriver(run_plan, progress=UnexpectedAlertPresentException('alert'))
+    results = InteractionPlan(driver).fill('#id', 'me').click('#submit').run()
+    assert outcome(results) == [(0, False, 'script')]
+    assert 'progress unknown' in results[0].error
+    assert driver.log == []
+
+
+def test_fallback_after_deep_frame_step():
+    driver = FakeDriver(lambda steps: [{'ok': False, 'error': 'element not found: iframe'}])
+    results = InteractionPlan(driver).fill('x-login >>> iframe >>> #id', 'me').click('#submit').run()
+    assert outcome(results) == [(0, True, 'webdriver'), (1, True, 'webdriver')]
+    assert driver.log == [('fill', 'x-login >>> iframe >>> #id'), ('click', '#submit')]
+    assert driver.frame is None
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from seleniummm import pool as pool_module
+from seleniummm.pool import WebDriverPool
+
+
+class FakeDriver:
+    # stands in for WebDriver. launches fail while `failures` is above zero
+    failures = 0
+    lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        with FakeDriver.lock:
+            if FakeDriver.failures > 0:
+                FakeDriver.failures -= 1
+                raise RuntimeError('launch failed')
+        self.alive = True
+        self.resets = 0
+
+    def is_alive(self):
+        return self.alive
+
+    def reset(self):
+        self.resets += 1
+        return True
+
+    def quit(self):
+        self.alive = False
+
+
+@pytest.fixture
+def fake_driver(monkeypatch):
+    FakeDriver.failures = 0
+    monkeypatch.setattr(pool_module, 'WebDriver', FakeDriver)
+    monkeypatch.setattr(pool_module, 'REPLACE_RETRY_DELAYS', (0.01, 0.01))
+    return FakeDriver
+
+
+def test_lease_resets_driver(fake_driver):
+    with WebDriverPool(size=1) as pool:
+        with pool.lease(timeout=1) as driver:
+            assert pool.idle_count() == 0
+        assert driver.resets == 1
+        assert pool.idle_count() == 1
+
+
+def test_broken_driver_is_replaced_after_failed_launches(fake_driver):
+    with WebDriverPool(size=1) as pool:
+        driver = pool.acquire(timeout=1)
+        driver.alive = False
+        fake_driver.failures = 2    # first two replacement launches fail, the third succeeds
+        pool.release(driver)
+        replacement = pool.acquire(timeout=5)
+        assert replacement is not driver
+        assert replacement.alive
+
+
+def test_acquire_raises_once_replacements_give_up(fake_driver):
+    with WebDriverPool(size=1) as pool:
+        driver = pool.acquire(timeout=1)
+        driver.alive = False
+        fake_driver.failures = 10
+        pool.release(driver)
+        with pytest.raises(Exception, match='no drivers left'):
+            pool.acquire(timeout=None)
+
+
+def test_acquire_times_out_while_leased(fake_driver):
+    with WebDriverPool(size=1) as pool:
+        pool.acquire(timeout=1)
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.2)
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from seleniummm.profiles import ProfileTemplate
+
+
+@pytest.fixture
+def template(tmp_path):
+    root = tmp_path / 'template'
+    (root / 'Default' / 'Extensions' / 'abc' / '1.0').mkdir(parents=True)
+    (root / 'Default' / 'Extensions' / 'abc' / '1.0' / 'manifest.json').write_text('{}')
+    (root / 'Default' / 'Cache').mkdir()
+    (root / 'Default' / 'Cache' / 'data_0').write_text('cache')
+    (root / 'Default' / 'Cookies').write_text('sqlite')
+    (root / 'SingletonLock').write_text('lock')
+    return root
+
+
+def test_hardlink_shares_only_read_only_files(template, tmp_path):
+    clone = ProfileTemplate(str(template), link='hardlink', clone_dir=str(tmp_path)).clone()
+    try:
+        manifest = os.path.join('Default', 'Extensions', 'abc', '1.0', 'manifest.json')
+        cookies = os.path.join('Default', 'Cookies')
+        assert os.path.samefile(template / manifest, os.path.join(clone, manifest))
+        assert not os.path.samefile(template / cookies, os.path.join(clone, cookies))
+
+        with open(os.path.join(clone, cookies), 'w') as f:
+            f.write('written by a clone')
+        assert (template / cookies).read_text() == 'sqlite'
+    finally:
+        ProfileTemplate.discard(clone)
+
+
+def test_clone_skips_locks_and_caches(template, tmp_path):
+    clone = ProfileTemplate(str(template), link='copy', clone_dir=str(tmp_path)).clone()
+    try:
+        assert not os.path.exists(os.path.join(clone, 'SingletonLock'))
+        assert not os.path.exists(os.path.join(clone, 'Default', 'Cache'))
+        assert os.path.isfile(os.path.join(clone, 'Default', 'Cookies'))
+    finally:
+        ProfileTemplate.discard(clone)
+
+
+def test_failed_clone_is_removed(template, tmp_path, monkeypatch):
+    clones = tmp_path / 'clones'
+    clones.mkdir()
+
+    def fail(*args):
+        raise OSError('disk full')
+
+    monkeypatch.setattr('shutil.copy2', fail)
+    with pytest.raises(OSError):
+        ProfileTemplate(str(template), link='copy', clone_dir=str(clones)).clone()
+    assert list(clones.iterdir()) == []
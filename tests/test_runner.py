@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from seleniummm import runner
+from seleniummm.runner import CrawlRunner
+
+
+class FakeDriver:
+    # stands in for WebDriver in forked workers. quit() leaves a file behind to count clean shutdowns.
+    def __init__(self, marks):
+        self.marks = marks
+
+    def is_alive(self):
+        return True
+
+    def quit(self):
+        open(os.path.join(self.marks, f'quit-{os.getpid()}'), 'w').close()
+
+
+def echo(driver, item):
+    return item.upper()
+
+
+def die_once(driver, item):
+    # the worker process exits mid-job the first time it sees 'b'
+    mark = os.path.join(driver.marks, 'died')
+    if item == 'b' and not os.path.exists(mark):
+        open(mark, 'w').close()
+        os._exit(3)
+    return item
+
+
+@pytest.fixture
+def marks(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner, 'WebDriver', FakeDriver)
+    return str(tmp_path)
+
+
+def quits(marks):
+    return len([name for name in os.listdir(marks) if name.startswith('quit-')])
+
+
+def test_ordered_results(marks):
+    crawl = CrawlRunner(workers=2, driver_kwargs={'marks': marks}, handler=echo, start_method='fork')
+    results = list(crawl.run(['a', 'b', 'c', 'd'], ordered=True))
+    assert [r.value for r in results] == ['A', 'B', 'C', 'D']
+    assert crawl.stats['completed'] == 4
+    assert quits(marks) == 2
+
+
+def test_dead_worker_job_is_retried(marks):
+    crawl = CrawlRunner(workers=2, driver_kwargs={'marks': marks}, handler=die_once, start_method='fork')
+    results = {r.item: r for r in crawl.run(['a', 'b', 'c'])}
+    assert sorted(results) == ['a', 'b', 'c']
+    assert all(r.ok for r in results.values())
+    assert results['b'].attempts == 2
+    assert crawl.stats['workers_restarted'] == 1
+    assert crawl.stats['completed'] == 3
+
+
+def test_closing_early_shuts_workers_down(marks):
+    crawl = CrawlRunner(workers=2, driver_kwargs={'marks': marks}, handler=echo, start_method='fork')
+    results = crawl.run(['a', 'b', 'c', 'd'])
+    next(results)
+    results.close()
+    assert quits(marks) == 2
@@ -0,0 +1,135 @@
+import base64
+import io
+
+import pytest
+from selenium.webdriver.remote.webelement import WebElement
+
+from seleniummm import WebDriver, screencast
+from seleniummm.screencast import Screencast, write_base64
+
+
+class FakeChannel:
+    def __init__(self):
+        self.closed = False
+        self.handlers = {}
+        self.calls = []
+        self.sent = []
+
+    def attach(self, target_id):
+        return 'session-' + target_id
+
+    def on(self, method, callback, session_id=None):
+        self.handlers.setdefault(method, []).append(callback)
+
+    def off(self, method, callback):
+        self.handlers[method] = [h for h in self.handlers.get(method, []) if h != callback]
+
+    def call(self, method, params=None, session_id=None, timeout=None):
+        self.calls.append((method, params, session_id))
+        return {}
+
+    def send(self, method, params=None, session_id=None):
+        self.sent.append((method, params, session_id))
+
+    def emit(self, method, params):
+        for callback in list(self.handlers.get(method, ())):
+            callback(method, params)
+
+
+def frame(n):
+    return {'sessionId': n, 'data': base64.b64encode(f'frame{n}'.encode()).decode(),
+            'metadata': {'timestamp': float(n)}}
+
+
+def test_write_base64_in_slices(tmp_path, monkeypatch):
+    monkeypatch.setattr(screencast, 'DECODE_CHUNK', 8)
+    data = bytes(range(256)) * 3
+    encoded = base64.b64encode(data).decode()
+
+    path = str(tmp_path / 'out.bin')
+    assert write_base64(encoded, path) == len(data)
+    assert open(path, 'rb').read() == data
+
+    f = io.BytesIO()
+    assert write_base64(encoded, f) == len(data)
+    assert f.getvalue() == data and not f.closed
+
+
+def test_start_params():
+    channel = FakeChannel()
+    Screencast(channel, 't1', max_width=640, every_nth_frame=2).start()
+    assert channel.calls == [('Page.startScreencast', {'format': 'jpeg', 'everyNthFrame': 2, 'quality': 60,
+                                                       'maxWidth': 640}, 'session-t1')]
+    channel = FakeChannel()
+    Screencast(channel, 't1', format='png').start()
+    assert 'quality' not in channel.calls[0][1]
+    with pytest.raises(ValueError):
+        Screencast(channel, 't1', format='gif')
+
+
+def test_frames_are_acked_and_oldest_dropped():
+    channel = FakeChannel()
+    cast = Screencast(channel, 't1', max_queue=2).start()
+    for n in range(4):
+        channel.emit('Page.screencastFrame', frame(n))
+    assert [params['sessionId'] for _, params, _ in channel.sent] == [0, 1, 2, 3]
+    assert (cast.received, cast.dropped) == (4, 2)
+
+    first = cast.get(timeout=1)
+    assert (first.index, first.data, first.timestamp) == (2, b'frame2', 2.0)
+    assert cast.get(timeout=1).data == b'frame3'
+    assert cast.get(timeout=0.05) is None
+
+
+def test_stopped_screencast_drains_then_ends():
+    channel = FakeChannel()
+    with Screencast(channel, 't1').start() as cast:
+        channel.emit('Page.screencastFrame', frame(0))
+    assert ('Page.stopScreencast', {}, 'session-t1') in channel.calls
+    channel.emit('Page.screencastFrame', frame(1))     # after off(): not delivered
+    assert [f.data for f in cast.frames()] == [b'frame0']
+    assert cast.get() is None
+
+
+@pytest.fixture
+def driver(chrome, tmp_path):
+    d = WebDriver(attach_to=9222, set_download_path=str(tmp_path))
+    d.driver.cdp_results['Page.captureScreenshot'] = {'data': base64.b64encode(b'image').decode()}
+    yield d
+    d.quit()
+
+
+def screenshot_params(d):
+    return [params for _, method, params in d.driver.commands if method == 'Page.captureScreenshot'][-1]
+
+
+def test_capture_viewport(driver, tmp_path):
+    assert driver.capture() == b'image'
+    assert screenshot_params(driver) == {'format': 'jpeg', 'captureBeyondViewport': False, 'quality': 80}
+    path = str(tmp_path / 'shot.png')
+    assert driver.capture(out=path, format='png') == path
+    assert open(path, 'rb').read() == b'image'
+    assert 'quality' not in screenshot_params(driver)
+    with pytest.raises(ValueError):
+        driver.capture(format='bmp')
+
+
+def test_capture_clip(driver):
+    driver.capture({'x': 10, 'y': 20, 'width': 300, 'height': 200}, scale=2)
+    assert screenshot_params(driver)['clip'] == {'x': 10, 'y': 20, 'width': 300, 'height': 200, 'scale': 2}
+    with pytest.raises(ValueError, match='empty capture area'):
+        driver.capture({'x': 0, 'y': 0, 'width': 0, 'height': 10})
+
+
+def test_capture_element_and_full_page(driver):
+    driver.driver.on_script = lambda source, args: {'x': 0, 'y': 500, 'width': 120, 'height': 40}
+    driver.capture(WebElement(driver.driver, 'e1'))
+    params = screenshot_params(driver)
+    assert params['captureBeyondViewport'] is True
+    assert params['clip'] == {'x': 0, 'y': 500, 'width': 120, 'height': 40, 'scale': 1}
+
+    driver.driver.on_script = lambda source, args: {'x': 0, 'y': 0, 'width': 1280, 'height': 5000}
+    driver.capture(full_page=True)
+    params = screenshot_params(driver)
+    assert params['captureBeyondViewport'] is True
+    assert params['clip']['height'] == 5000
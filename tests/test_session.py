@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from seleniummm import SessionStore
+from seleniummm import js
+
+
+class FakeChrome:
+    def __init__(self, cookies, snapshot):
+        self.cookies = cookies
+        self.snapshot = snapshot
+        self.commands = []
+
+    def execute_cdp_cmd(self, method, params):
+        self.commands.append((method, params))
+        if method == 'Network.getAllCookies':
+            return {'cookies': self.cookies}
+        return {}
+
+    def execute_script(self, source, *args):
+        assert source == js.STORAGE_SNAPSHOT
+        return self.snapshot
+
+
+class FakeDriver:
+    def __init__(self, cookies=(), snapshot=None):
+        self.driver = FakeChrome(list(cookies), snapshot)
+        self.init_scripts = []
+
+    def add_init_script(self, source):
+        self.init_scripts.append(source)
+        return str(len(self.init_scripts))
+
+
+COOKIE = {'name': 'sid', 'value': 'abc', 'domain': '.example.com', 'path': '/', 'secure': True,
+          'httpOnly': True, 'sameSite': 'Lax', 'expires': -1, 'session': True, 'size': 6}
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SessionStore(str(tmp_path / 'session.sqlite'))
+    yield s
+    s.close()
+
+
+def test_save_writes_only_changes(store):
+    driver = FakeDriver([COOKIE], {'origin': 'https://example.com', 'local': {'a': '1'}, 'session': {'b': '2'}})
+    assert store.save(driver) == {'changed': 3, 'removed': 0}
+    assert store.save(driver) == {'changed': 0, 'removed': 0}
+
+    driver.driver.snapshot = {'origin': 'https://example.com', 'local': {'a': '9'}, 'session': {}}
+    assert store.save(driver) == {'changed': 1, 'removed': 1}
+
+
+def test_save_keeps_other_origins(store):
+    store.save(FakeDriver([], {'origin': 'https://a.com', 'local': {'k': 'a'}, 'session': {}}))
+    store.save(FakeDriver([], {'origin': 'https://b.com', 'local': {'k': 'b'}, 'session': {}}))
+    driver = FakeDriver()
+    assert store.restore(driver) == {'cookies': 0, 'origins': 2}
+
+
+def test_restore_sets_cookies_and_seed_script(store):
+    store.save(FakeDriver([COOKIE], {'origin': 'https://example.com', 'local': {'a': '1'}, 'session': {}}))
+    driver = FakeDriver()
+    assert store.restore(driver) == {'cookies': 1, 'origins': 1}
+
+    method, params = driver.driver.commands[0]
+    assert method == 'Network.setCookies'
+    [cookie] = params['cookies']
+    assert 'expires' not in cookie     # session cookie
+    assert 'size' not in cookie        # not settable
+    assert cookie['name'] == 'sid'
+
+    [source] = driver.init_scripts
+    assert '__DATA__' not in source and '__TOKEN__' not in source
+    assert json.dumps({'https://example.com': {'local': {'a': '1'}, 'session': {}}}) in source
+
+
+def test_opaque_origin_is_not_saved(store):
+    store.save(FakeDriver([COOKIE], None))
+    driver = FakeDriver()
+    assert store.restore(driver) == {'cookies': 1, 'origins': 0}
+    assert driver.init_scripts == []
+
+
+def test_sessions_are_separate(store):
+    store.save(FakeDriver([COOKIE]), session='alice')
+    store.save(FakeDriver([]), session='bob')
+    assert store.sessions() == ['alice']
+    assert store.restore(FakeDriver(), session='bob') == {'cookies': 0, 'origins': 0}
@@ -0,0 +1,99 @@
+from selenium.common.exceptions import NoSuchWindowException
+
+from seleniummm.tabs import TabRegistry
+
+
+def page(target_id, url='https://example.com/', opener=None, type='page', subtype=None):
+    info = {'targetId': target_id, 'type': type, 'url': url, 'title': target_id.upper()}
+    if subtype:
+        info['subtype'] = subtype
+    if opener:
+        info['openerId'] = opener
+    return info
+
+
+class FakeChrome:
+    # getTargets lists the newest target first, window_handles in creation order
+    def __init__(self):
+        self.targets = []
+
+    def open(self, info):
+        self.targets.insert(0, info)
+
+    def close(self, target_id):
+        self.targets = [t for t in self.targets if t['targetId'] != target_id]
+
+    def execute_cdp_cmd(self, method, params):
+        assert method == 'Target.getTargets'
+        return {'targetInfos': list(self.targets)}
+
+    @property
+    def window_handles(self):
+        # chromedriver lists no window for devtools and prerendered pages
+        return [t['targetId'] for t in reversed(self.targets)
+                if t['type'] == 'page' and not t.get('subtype') and not t['url'].startswith('devtools://')]
+
+
+def test_creation_order_is_kept_across_refreshes():
+    chrome = FakeChrome()
+    chrome.open(page('a'))
+    tabs = TabRegistry(chrome)
+    assert tabs.handles() == ['a']
+
+    chrome.open(page('b', opener='a'))
+    chrome.open(page('c', opener='a'))
+    assert tabs.handles() == ['a', 'b', 'c']
+    assert [t.handle for t in tabs.opened_by('a')] == ['b', 'c']
+
+    chrome.close('b')
+    chrome.open(page('d'))
+    assert tabs.handles() == ['a', 'c', 'd']
+    assert tabs.titles() == ['A', 'C', 'D']
+
+
+def test_devtools_and_other_targets_are_not_tabs():
+    chrome = FakeChrome()
+    chrome.open(page('a'))
+    chrome.open(page('dt', url='devtools://devtools/bundled/devtools_app.html'))
+    chrome.open(page('sw', type='service_worker'))
+    chrome.open(page('pre', subtype='prerender'))
+    tabs = TabRegistry(chrome)
+    assert tabs.handles() == ['a']
+    assert tabs.count() == 1
+    assert tabs.titles() == ['A']
+
+
+def test_live_events():
+    chrome = FakeChrome()
+    chrome.open(page('a'))
+    tabs = TabRegistry(chrome)
+    tabs.refresh()
+    tabs.live = True
+    tabs.on_event('Target.targetCreated', {'targetInfo': page('b')})
+    tabs.on_event('Target.targetCreated', {'targetInfo': page('dt', url='devtools://devtools/x')})
+    tabs.on_event('Target.targetCreated', {'targetInfo': page('pre', subtype='prerender')})
+    tabs.on_event('Target.targetInfoChanged', {'targetInfo': page('a', url='https://example.com/next')})
+    assert tabs.handles() == ['a', 'b']
+    assert tabs.tabs()[0].url == 'https://example.com/next'
+
+    tabs.on_event('Target.targetDestroyed', {'targetId': 'a'})
+    assert tabs.handles() == ['b']
+    tabs.forget('b')
+    assert tabs.handles() == []
+
+
+def test_handles_without_cdp():
+    # handles and count never need Target.getTargets, which fails once the current tab is closed
+    chrome = FakeChrome()
+    chrome.open(page('a'))
+    chrome.open(page('b'))
+    tabs = TabRegistry(chrome)
+    tabs.refresh()
+
+    def closed(method, params):
+        raise NoSuchWindowException('no such window')
+    chrome.execute_cdp_cmd = closed
+    chrome.close('b')
+    assert tabs.handles() == ['a']
+    assert tabs.count() == 1
+    assert tabs.titles() == ['A']     # last known
@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from seleniummm.wirecache import WireCache, HIT_HEADER
+
+
+class FakeHeaders(dict):
+    # selenium-wire headers: case-insensitive get
+    def get(self, name, default=None):
+        for k, v in self.items():
+            if k.lower() == name.lower():
+                return v
+        return default
+
+    def __contains__(self, name):
+        return any(k.lower() == name.lower() for k in self)
+
+
+class FakeRequest:
+    def __init__(self, url, method='GET', headers=None):
+        self.url = url
+        self.method = method
+        self.headers = FakeHeaders(headers or {})
+        self.response = None
+
+    def create_response(self, status_code, headers, body):
+        self.response = FakeResponse(status_code, dict(headers), body)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None, body=b'', reason='OK'):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = FakeHeaders(headers or {'Content-Type': 'text/html'})
+        self.body = body
+
+
+def record(cache, url, body=b'page', status=200, **request_kwargs):
+    request = FakeRequest(url, **request_kwargs)
+    cache.request_interceptor(request)
+    assert request.response is None
+    cache.response_interceptor(request, FakeResponse(status, body=body))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def test_record_then_replay(path):
+    cache = WireCache(path, mode='record')
+    record(cache, 'https://example.com/')
+    cache.close()
+
+    cache = WireCache(path, mode='replay')
+    request = FakeRequest('https://example.com/')
+    cache.request_interceptor(request)
+    assert request.response.status_code == 200
+    assert request.response.body == b'page'
+    assert request.response.headers[HIT_HEADER] == 'hit'
+    # served from the store, not stored again
+    cache.response_interceptor(request, FakeResponse(headers=request.response.headers, body=b'page'))
+    assert (cache.hits, cache.stored) == (1, 0)
+    cache.close()
+
+
+def test_replay_miss(path):
+    cache = WireCache(path, mode='replay')
+    request = FakeRequest('https://example.com/missing')
+    cache.request_interceptor(request)
+    assert request.response.status_code == 504
+    assert cache.misses == 1
+
+    cache.replay_miss = 'network'
+    request = FakeRequest('https://example.com/missing')
+    cache.request_interceptor(request)
+    assert request.response is None
+    cache.close()
+
+
+def test_passthrough_ttl(path):
+    cache = WireCache(path, mode='passthrough', ttl_sec=3600)
+    record(cache, 'https://example.com/')
+    request = FakeRequest('https://example.com/')
+    cache.request_interceptor(request)
+    assert request.response is not None
+
+    cache.ttl_sec = -1     # everything is stale
+    request = FakeRequest('https://example.com/')
+    cache.request_interceptor(request)
+    assert request.response is None
+    cache.close()
+
+
+def test_key_headers_and_method(path):
+    cache = WireCache(path, mode='record', key_headers=('Accept-Language',))
+    a = cache.key(FakeRequest('https://example.com/', headers={'accept-language': 'ko'}))
+    b = cache.key(FakeRequest('https://example.com/', headers={'accept-language': 'en'}))
+    c = cache.key(FakeRequest('https://example.com/', method='POST', headers={'accept-language': 'ko'}))
+    assert len({a, b, c}) == 3
+    cache.close()
+
+
+def test_error_responses_not_stored(path):
+    cache = WireCache(path, mode='record')
+    record(cache, 'https://example.com/down', status=503)
+    assert cache.stored == 0
+    cache.close()
+
+
+def test_bodies_are_shared(path):
+    cache = WireCache(path, mode='record')
+    record(cache, 'https://example.com/a', body=b'same')
+    record(cache, 'https://example.com/b', body=b'same')
+    objects = [f for _, _, files in os.walk(os.path.join(path, 'objects')) for f in files]
+    assert cache.stored == 2 and len(objects) == 1
+    cache.close()
+
+
+def test_unknown_mode(path):
+    with pytest.raises(ValueError):
+        WireCache(path, mode='offline')